@@ -3,24 +3,39 @@ from __future__ import annotations
 import logging
 
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
-from apps.api.src.db.database import init_db
+from apps.api.src.db.async_database import close_async_connections
+from apps.api.src.db.database import close_all_connections, init_db
 from apps.api.src.routes.clinics import router as clinics_router
 from apps.api.src.routes.dashboard import router as dashboard_router
 from apps.api.src.routes.entries import router as entries_router
+from apps.api.src.routes.jobs import router as jobs_router
+from apps.api.src.routes.metrics import router as metrics_router
 from apps.api.src.routes.reprocess import router as reprocess_router
 from apps.api.src.routes.rollups import router as rollups_router
 from apps.api.src.services.clinic_service import seed_clinics
+from apps.api.src.services.job_worker import JobWorker
 
 logging.basicConfig(level=logging.INFO)
 
 app = FastAPI(title="Dental Income Tracker")
 
+job_worker = JobWorker()
+
 
 @app.on_event("startup")
 def startup_event() -> None:
     init_db()
     seed_clinics()
+    job_worker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    await run_in_threadpool(job_worker.stop)
+    await close_async_connections()
+    close_all_connections()
 
 
 app.include_router(dashboard_router)
@@ -28,3 +43,5 @@ app.include_router(clinics_router)
 app.include_router(entries_router)
 app.include_router(rollups_router)
 app.include_router(reprocess_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import sqlite3
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+import aiosqlite
+
+from apps.api.src.db.database import (
+    BUSY_TIMEOUT_MS,
+    CACHE_SIZE_KIB,
+    MMAP_SIZE_BYTES,
+    database_path,
+)
+
+ASYNC_POOL_SIZE = 4
+
+# Each aiosqlite connection owns a (non-daemon) worker thread and resolves
+# results on whichever loop awaited them, so idle connections are shared
+# process-wide and must be closed on shutdown.
+_idle: dict[Path, list[aiosqlite.Connection]] = {}
+
+
+async def _open(db_path: Path) -> aiosqlite.Connection:
+    connection = await aiosqlite.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+    connection.row_factory = sqlite3.Row
+    for pragma in (
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA cache_size = -{CACHE_SIZE_KIB}",
+        f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}",
+        "PRAGMA temp_store = MEMORY",
+    ):
+        await connection.execute(pragma)
+    return connection
+
+
+@asynccontextmanager
+async def get_async_connection() -> AsyncIterator[aiosqlite.Connection]:
+    db_path = database_path()
+    idle = _idle.setdefault(db_path, [])
+    connection = idle.pop() if idle else await _open(db_path)
+    try:
+        yield connection
+        await connection.commit()
+    except BaseException:
+        await connection.rollback()
+        await connection.close()
+        raise
+    if len(idle) < ASYNC_POOL_SIZE:
+        idle.append(connection)
+    else:
+        await connection.close()
+
+
+async def close_async_connections() -> None:
+    while _idle:
+        _, connections = _idle.popitem()
+        for connection in connections:
+            await connection.close()
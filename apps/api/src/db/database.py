@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+import weakref
 from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterator
 
-from apps.api.src.utils.config import load_settings
+from apps.api.src.db.migrations import apply_migrations
+from apps.api.src.utils.config import get_settings
 
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KIB = 20_000
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
 
+
+@lru_cache(maxsize=16)
 def _sqlite_path(database_url: str) -> Path:
     if not database_url.startswith("sqlite:///"):
         raise ValueError("Only sqlite:/// paths are supported in MVP")
@@ -15,73 +24,154 @@ def _sqlite_path(database_url: str) -> Path:
 
 
 def init_db() -> None:
-    settings = load_settings()
+    settings = get_settings()
     db_path = _sqlite_path(settings.database_url)
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with sqlite3.connect(db_path) as connection:
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
         connection.execute("PRAGMA foreign_keys = ON")
-        connection.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS clinics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                pay_percentage REAL NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS uploads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                filename TEXT NOT NULL,
-                clinic_id INTEGER NOT NULL,
-                entry_date TEXT,
-                status TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                raw_ocr_text TEXT,
-                production_amount REAL,
-                collections_amount REAL,
-                error_reason TEXT,
-                FOREIGN KEY (clinic_id) REFERENCES clinics(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS rollups (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                week_start TEXT NOT NULL,
-                clinic_id INTEGER,
-                total_production REAL NOT NULL,
-                total_collections REAL NOT NULL,
-                estimated_pay REAL NOT NULL,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (clinic_id) REFERENCES clinics(id)
-            );
-
-            CREATE TABLE IF NOT EXISTS entry_details (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                upload_id INTEGER NOT NULL,
-                entry_date TEXT,
-                patient_name TEXT,
-                tooth_number TEXT,
-                treatment_code TEXT,
-                description TEXT,
-                charges REAL,
-                payments REAL,
-                phone_number TEXT,
-                raw_line TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (upload_id) REFERENCES uploads(id) ON DELETE CASCADE
-            );
-            """
+        apply_migrations(connection)
+    finally:
+        connection.close()
+
+
+class PooledConnection:
+    def __init__(self, db_path: Path) -> None:
+        self.connection = sqlite3.connect(
+            db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False
         )
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        self.connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+        self.connection.execute("PRAGMA temp_store = MEMORY")
+        self.depth = 0
+        self.closed = False
+        self.after_commit: dict[Callable[[], None], None] = {}
+        weakref.finalize(self, self.connection.close)
+
+    def close(self) -> None:
+        self.closed = True
+        self.connection.close()
+
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pool: "weakref.WeakSet[PooledConnection]" = weakref.WeakSet()
+_pool_counters = {"opened": 0, "checkouts": 0, "reused": 0}
+
+
+def _thread_connection(db_path: Path) -> PooledConnection:
+    connections: dict[Path, PooledConnection] | None = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    pooled = connections.get(db_path)
+    with _pool_lock:
+        _pool_counters["checkouts"] += 1
+        if pooled is not None and not pooled.closed:
+            _pool_counters["reused"] += 1
+            return pooled
+    pooled = PooledConnection(db_path)
+    connections[db_path] = pooled
+    with _pool_lock:
+        _pool_counters["opened"] += 1
+        _pool.add(pooled)
+    return pooled
 
 
 @contextmanager
 def get_connection() -> Iterator[sqlite3.Connection]:
-    settings = load_settings()
-    db_path = _sqlite_path(settings.database_url)
-    connection = sqlite3.connect(db_path)
-    connection.row_factory = sqlite3.Row
-    connection.execute("PRAGMA foreign_keys = ON")
+    pooled = _thread_connection(database_path())
+    if pooled.depth:
+        with _savepoint(pooled):
+            yield pooled.connection
+        return
+    # Nested get_connection() calls on one thread share the outer transaction;
+    # only the outermost block commits or rolls back.
+    pooled.depth += 1
     try:
-        yield connection
-        connection.commit()
+        yield pooled.connection
+        pooled.connection.commit()
+    except BaseException:
+        pooled.after_commit.clear()
+        pooled.connection.rollback()
+        raise
     finally:
-        connection.close()
+        pooled.depth -= 1
+    if pooled.depth == 0 and pooled.after_commit:
+        callbacks = list(pooled.after_commit)
+        pooled.after_commit.clear()
+        for callback in callbacks:
+            callback()
+
+
+@contextmanager
+def _savepoint(pooled: PooledConnection) -> Iterator[None]:
+    # A nested block that raises undoes only its own writes (and drops its
+    # after-commit callbacks), so an outer block that catches the error does
+    # not commit them.
+    connection = pooled.connection
+    callbacks = dict(pooled.after_commit)
+    pooled.depth += 1
+    try:
+        if not connection.in_transaction:
+            # Nothing of the outer block is pending yet, so a rollback only
+            # discards this block's writes; a savepoint here would commit on
+            # release and break callers that issue their own BEGIN.
+            try:
+                yield
+            except BaseException:
+                pooled.after_commit = callbacks
+                connection.rollback()
+                raise
+            return
+        name = f"nested_{pooled.depth}"
+        connection.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except BaseException:
+            pooled.after_commit = callbacks
+            if connection.in_transaction:
+                connection.execute(f"ROLLBACK TO {name}")
+                connection.execute(f"RELEASE {name}")
+            raise
+        connection.execute(f"RELEASE {name}")
+    finally:
+        pooled.depth -= 1
+
+
+def call_after_commit(callback: Callable[[], None]) -> None:
+    # Runs once the outermost get_connection() block on this thread commits
+    # (immediately outside one); a rollback drops it.
+    connections = getattr(_local, "connections", None) or {}
+    pooled = connections.get(database_path())
+    if pooled is None or pooled.depth == 0:
+        callback()
+        return
+    pooled.after_commit[callback] = None
+
+
+def database_path() -> Path:
+    return _sqlite_path(get_settings().database_url)
+
+
+def pool_stats() -> dict[str, int]:
+    with _pool_lock:
+        connections = list(_pool)
+        return {
+            **_pool_counters,
+            "open": len(connections),
+            "in_use": sum(1 for pooled in connections if pooled.depth > 0),
+        }
+
+
+def close_all_connections() -> None:
+    with _pool_lock:
+        connections = list(_pool)
+        _pool.clear()
+    for pooled in connections:
+        pooled.close()
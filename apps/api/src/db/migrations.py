@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _run_script(script: str) -> Callable[[sqlite3.Connection], None]:
+    def apply(connection: sqlite3.Connection) -> None:
+        for statement in script.split(";"):
+            if statement.strip():
+                connection.execute(statement)
+
+    return apply
+
+
+BASE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS clinics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        pay_percentage REAL NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS uploads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        filename TEXT NOT NULL,
+        clinic_id INTEGER NOT NULL,
+        entry_date TEXT,
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        raw_ocr_text TEXT,
+        production_amount REAL,
+        collections_amount REAL,
+        error_reason TEXT,
+        FOREIGN KEY (clinic_id) REFERENCES clinics(id)
+    );
+
+    CREATE TABLE IF NOT EXISTS rollups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        week_start TEXT NOT NULL,
+        clinic_id INTEGER,
+        total_production REAL NOT NULL,
+        total_collections REAL NOT NULL,
+        estimated_pay REAL NOT NULL,
+        upload_count INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (clinic_id) REFERENCES clinics(id)
+    );
+
+    CREATE TABLE IF NOT EXISTS entry_details (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        upload_id INTEGER NOT NULL,
+        entry_date TEXT,
+        patient_name TEXT,
+        tooth_number TEXT,
+        treatment_code TEXT,
+        description TEXT,
+        charges REAL,
+        payments REAL,
+        phone_number TEXT,
+        raw_line TEXT,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (upload_id) REFERENCES uploads(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS ocr_cache (
+        image_hash TEXT NOT NULL,
+        engine_version TEXT NOT NULL,
+        raw_text TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (image_hash, engine_version)
+    );
+
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        run_after TEXT NOT NULL,
+        last_error TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+"""
+
+
+def _add_rollup_upload_count(connection: sqlite3.Connection) -> None:
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(rollups)")}
+    if "upload_count" in columns:
+        return
+    connection.execute(
+        "ALTER TABLE rollups ADD COLUMN upload_count INTEGER NOT NULL DEFAULT 0"
+    )
+    connection.execute(
+        """
+        UPDATE rollups SET upload_count = (
+            SELECT COUNT(*)
+            FROM uploads
+            JOIN clinics ON clinics.id = uploads.clinic_id
+            WHERE uploads.status = 'processed'
+              AND uploads.entry_date >= rollups.week_start
+              AND uploads.entry_date < date(rollups.week_start, '+7 days')
+              AND (rollups.clinic_id IS NULL OR uploads.clinic_id = rollups.clinic_id)
+        )
+        """
+    )
+
+
+HOT_PATH_INDEXES = """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_uploads_filename ON uploads (filename);
+
+    CREATE INDEX IF NOT EXISTS idx_uploads_status_created
+        ON uploads (status, created_at);
+
+    CREATE INDEX IF NOT EXISTS idx_uploads_status_entry_date
+        ON uploads (status, entry_date, clinic_id, production_amount, collections_amount);
+
+    CREATE INDEX IF NOT EXISTS idx_rollups_week_clinic ON rollups (week_start, clinic_id);
+
+    CREATE INDEX IF NOT EXISTS idx_entry_details_upload ON entry_details (upload_id);
+
+    CREATE INDEX IF NOT EXISTS idx_clinics_name ON clinics (name);
+
+    CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs (status, run_after);
+"""
+
+
+def _add_hot_path_indexes(connection: sqlite3.Connection) -> None:
+    duplicates = connection.execute(
+        "SELECT filename FROM uploads GROUP BY filename HAVING COUNT(*) > 1 LIMIT 5"
+    ).fetchall()
+    if duplicates:
+        names = ", ".join(row[0] for row in duplicates)
+        raise MigrationError(
+            f"uploads.filename must be unique before migrating; duplicates: {names}"
+        )
+    _run_script(HOT_PATH_INDEXES)(connection)
+
+
+KEYSET_INDEXES = """
+    UPDATE entry_details
+    SET entry_date = (SELECT entry_date FROM uploads WHERE uploads.id = entry_details.upload_id)
+    WHERE entry_date IS NULL;
+
+    CREATE INDEX IF NOT EXISTS idx_entry_details_sort
+        ON entry_details (COALESCE(entry_date, ''), id);
+
+    CREATE INDEX IF NOT EXISTS idx_uploads_created ON uploads (created_at, id);
+"""
+
+
+def _add_column(
+    connection: sqlite3.Connection, table: str, column: str, definition: str
+) -> None:
+    columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _add_job_priority_and_totals_box(connection: sqlite3.Connection) -> None:
+    _add_column(connection, "jobs", "priority", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, "clinics", "totals_box", "TEXT")
+    connection.execute("DROP INDEX IF EXISTS idx_jobs_status_run_after")
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_status_priority
+            ON jobs (status, priority, run_after)
+        """
+    )
+
+
+OCR_WORDS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ocr_words (
+        upload_id INTEGER PRIMARY KEY,
+        word_count INTEGER NOT NULL,
+        refined_count INTEGER NOT NULL DEFAULT 0,
+        data BLOB NOT NULL,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (upload_id) REFERENCES uploads(id) ON DELETE CASCADE
+    );
+"""
+
+
+def _add_upload_content_hash(connection: sqlite3.Connection) -> None:
+    _add_column(connection, "uploads", "content_hash", "TEXT")
+    # Rows ingested before hashing keep NULL and never collide.
+    connection.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_uploads_content_hash
+            ON uploads (content_hash) WHERE content_hash IS NOT NULL
+        """
+    )
+
+
+INGEST_MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ingest_manifest (
+        name TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime_ns INTEGER,
+        content_hash TEXT,
+        upload_id INTEGER,
+        seen_at TEXT NOT NULL,
+        FOREIGN KEY (upload_id) REFERENCES uploads(id) ON DELETE SET NULL
+    ) WITHOUT ROWID;
+
+    -- Files registered before the manifest existed have no size/mtime, so the
+    -- next ingest re-stats and hashes them once without registering them again.
+    INSERT OR IGNORE INTO ingest_manifest (name, content_hash, upload_id, seen_at)
+    SELECT filename, content_hash, id, created_at FROM uploads;
+"""
+
+
+DAILY_FACTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS daily_facts (
+        day TEXT NOT NULL,
+        clinic_id INTEGER NOT NULL,
+        total_production REAL NOT NULL,
+        total_collections REAL NOT NULL,
+        upload_count INTEGER NOT NULL,
+        PRIMARY KEY (day, clinic_id)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_daily_facts_clinic_day ON daily_facts (clinic_id, day);
+
+    INSERT OR IGNORE INTO daily_facts (
+        day, clinic_id, total_production, total_collections, upload_count
+    )
+    SELECT date(uploads.entry_date), uploads.clinic_id,
+           SUM(COALESCE(uploads.production_amount, 0)),
+           SUM(COALESCE(uploads.collections_amount, 0)), COUNT(*)
+    FROM uploads
+    JOIN clinics ON clinics.id = uploads.clinic_id
+    WHERE uploads.status = 'processed' AND date(uploads.entry_date) IS NOT NULL
+    GROUP BY date(uploads.entry_date), uploads.clinic_id;
+"""
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "base schema", _run_script(BASE_SCHEMA)),
+    Migration(2, "rollups.upload_count", _add_rollup_upload_count),
+    Migration(3, "hot path indexes and unique upload filenames", _add_hot_path_indexes),
+    Migration(4, "keyset pagination indexes", _run_script(KEYSET_INDEXES)),
+    Migration(5, "jobs.priority and clinics.totals_box", _add_job_priority_and_totals_box),
+    Migration(6, "ocr_words", _run_script(OCR_WORDS_SCHEMA)),
+    Migration(7, "uploads.content_hash", _add_upload_content_hash),
+    Migration(8, "ingest_manifest", _run_script(INGEST_MANIFEST_SCHEMA)),
+    Migration(
+        9,
+        "uploads.storage_path",
+        lambda connection: _add_column(connection, "uploads", "storage_path", "TEXT"),
+    ),
+    Migration(
+        10,
+        "uploads.archive_path",
+        lambda connection: _add_column(connection, "uploads", "archive_path", "TEXT"),
+    ),
+    Migration(11, "daily_facts", _run_script(DAILY_FACTS_SCHEMA)),
+    Migration(
+        12,
+        "uploads.storage_path index",
+        _run_script(
+            "CREATE INDEX IF NOT EXISTS idx_uploads_storage_path ON uploads (storage_path);"
+        ),
+    ),
+]
+
+
+def schema_version(connection: sqlite3.Connection) -> int:
+    return int(connection.execute("PRAGMA user_version").fetchone()[0])
+
+
+def apply_migrations(connection: sqlite3.Connection) -> list[int]:
+    applied: list[int] = []
+    for migration in MIGRATIONS:
+        if migration.version <= schema_version(connection):
+            continue
+        # IMMEDIATE takes the write lock up front so two processes starting
+        # at once cannot both apply the same migration.
+        connection.execute("BEGIN IMMEDIATE")
+        if migration.version <= schema_version(connection):
+            connection.execute("COMMIT")
+            continue
+        try:
+            migration.apply(connection)
+            connection.execute(f"PRAGMA user_version = {migration.version}")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        logger.info("Applied migration %s: %s", migration.version, migration.description)
+        applied.append(migration.version)
+    return applied
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import BaseModel
 
@@ -37,3 +37,36 @@ class RollupOut(BaseModel):
     total_collections: float
     estimated_pay: float
     created_at: str
+
+
+class RollupRangeOut(BaseModel):
+    period_start: date
+    clinic_id: Optional[int]
+    total_production: float
+    total_collections: float
+    estimated_pay: float
+    upload_count: int
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_after: str
+    last_error: Optional[str]
+    created_at: str
+    updated_at: str
+
+
+class OCRWordOut(BaseModel):
+    text: str
+    confidence: float
+    left: int
+    top: int
+    width: int
+    height: int
+    line: int
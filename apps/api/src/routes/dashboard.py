@@ -1,172 +1,197 @@
 from __future__ import annotations
 
-import shutil
 import uuid
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, timezone
 from pathlib import Path
-
-from fastapi import APIRouter, File, Form, Request, UploadFile
-from fastapi.responses import RedirectResponse
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 
-from apps.api.src.db.database import get_connection
 from apps.api.src.services.clinic_service import get_or_create_clinic
-from apps.api.src.services.process_service import process_new_uploads
-from apps.api.src.services.rollup_service import refresh_weekly_rollups
-from apps.api.src.utils.config import load_settings
+from apps.api.src.services.dashboard_service import (
+    DashboardData,
+    get_dashboard_data,
+    get_dashboard_page,
+)
+from apps.api.src.services.job_service import enqueue_job
+from apps.api.src.services.listing_service import (
+    ListingFilters,
+    details_page,
+    iter_ndjson,
+    iter_pages,
+    listing_filters,
+)
+from apps.api.src.services.upload_service import (
+    UploadFormError,
+    UploadTooLargeError,
+    check_content_length,
+    find_upload_by_hash,
+    receive_form_upload,
+    register_upload,
+)
+from apps.api.src.utils.config import get_settings
+from apps.api.src.utils.pagination import CursorError, clamp_page_size
 
 router = APIRouter()
 
 templates = Jinja2Templates(directory="apps/api/src/templates")
 
 
-def _get_dashboard_data() -> tuple[str | None, int | None, list[dict], list[dict]]:
-    with get_connection() as connection:
-        latest_week = connection.execute(
-            "SELECT week_start FROM rollups ORDER BY week_start DESC LIMIT 1"
-        ).fetchone()
-
-        rollups = []
-        if latest_week:
-            rollups = connection.execute(
-                """
-                SELECT rollups.*, clinics.name AS clinic_name
-                FROM rollups
-                LEFT JOIN clinics ON clinics.id = rollups.clinic_id
-                WHERE rollups.week_start = ?
-                ORDER BY rollups.clinic_id
-                """,
-                (latest_week["week_start"],),
-            ).fetchall()
-        clinics = connection.execute("SELECT id, name FROM clinics ORDER BY name").fetchall()
+def _dashboard_context(data: DashboardData) -> dict[str, Any]:
+    return {
+        "latest_week": data.latest_week,
+        "week_number": data.week_number,
+        "rollups": data.rollups,
+        "clinics": data.clinics,
+    }
 
-    week_start = latest_week["week_start"] if latest_week else None
-    week_number = None
-    if week_start:
-        week_number = date.fromisoformat(week_start).isocalendar().week
 
-    return (week_start, week_number, rollups, clinics)
+def _render_dashboard(data: DashboardData) -> str:
+    return templates.get_template("index.html").render(_dashboard_context(data))
 
 
-def _build_dashboard_response(
+async def _build_dashboard_response(
     request: Request,
     upload_message: str | None = None,
     upload_error: str | None = None,
+    status_code: int = 200,
 ) -> templates.TemplateResponse:
-    latest_week, week_number, rollups, clinics = _get_dashboard_data()
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
-            "latest_week": latest_week,
-            "week_number": week_number,
-            "rollups": rollups,
-            "clinics": clinics,
+            **_dashboard_context(await get_dashboard_data()),
             "upload_message": upload_message,
             "upload_error": upload_error,
         },
+        status_code=status_code,
     )
 
 
 @router.get("/")
-def get_dashboard(request: Request):
-    upload_message = "Upload received. Processing started." if request.query_params.get(
-        "uploaded"
-    ) else None
-    return _build_dashboard_response(request, upload_message=upload_message)
+async def get_dashboard(request: Request):
+    if request.query_params.get("uploaded"):
+        job_id = request.query_params.get("job")
+        duplicate_id = request.query_params.get("duplicate")
+        if duplicate_id:
+            upload_message = (
+                f"This image was already uploaded as entry #{duplicate_id}; "
+                "it was not processed again."
+            )
+        elif job_id:
+            upload_message = f"Upload received. Processing job #{job_id} queued."
+        else:
+            upload_message = "Upload received. Processing started."
+        return await _build_dashboard_response(request, upload_message=upload_message)
+
+    page = await get_dashboard_page(_render_dashboard)
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(page.html, headers=headers)
 
 
 @router.get("/details")
-def get_details(request: Request):
-    with get_connection() as connection:
-        detail_rows = connection.execute(
-            """
-            SELECT entry_details.*, uploads.entry_date AS upload_date,
-                   uploads.filename, clinics.name AS clinic_name
-            FROM entry_details
-            JOIN uploads ON uploads.id = entry_details.upload_id
-            LEFT JOIN clinics ON clinics.id = uploads.clinic_id
-            ORDER BY COALESCE(entry_details.entry_date, uploads.entry_date) DESC,
-                     entry_details.id DESC
-            """
-        ).fetchall()
-
-    details = []
-    for row in detail_rows:
-        entry_date = row["entry_date"] or row["upload_date"]
-        week_number = None
-        if entry_date:
-            week_number = date.fromisoformat(entry_date).isocalendar().week
-        details.append(
-            {
-                **dict(row),
-                "entry_date": entry_date,
-                "week_number": week_number,
-            }
+async def get_details(
+    request: Request,
+    after: str | None = None,
+    limit: int | None = None,
+    response_format: str = Query("html", alias="format", pattern="^(html|json|ndjson)$"),
+    filters: ListingFilters = Depends(listing_filters),
+):
+    page_size = clamp_page_size(limit)
+    try:
+        page = await details_page(filters, after, page_size)
+    except CursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if response_format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(iter_pages(details_page, filters, page, page_size)),
+            media_type="application/x-ndjson",
+        )
+
+    if response_format == "json":
+        return JSONResponse(
+            jsonable_encoder({"items": page.items, "next_cursor": page.next_cursor})
         )
 
+    next_url = None
+    if page.next_cursor:
+        next_url = str(request.url.include_query_params(after=page.next_cursor))
     return templates.TemplateResponse(
         "details.html",
         {
             "request": request,
-            "details": details,
+            "details": page.items,
+            "next_url": next_url,
         },
     )
 
+
 @router.post("/upload")
-async def post_upload(
-    request: Request,
-    clinic_id: int | None = Form(None),
-    entry_date: str = Form(...),
-    file: UploadFile = File(...),
-):
-    if not file.filename:
-        return _build_dashboard_response(
+async def post_upload(request: Request):
+    settings = get_settings()
+    unique_suffix = uuid.uuid4().hex[:8]
+    timestamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d%H%M%S")
+    try:
+        check_content_length(request.headers.get("content-length"), settings.max_upload_bytes)
+        form = await receive_form_upload(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            settings.uploads_dir,
+            "file",
+            lambda filename: f"{timestamp}_{unique_suffix}_{Path(filename).name}",
+            settings.max_upload_bytes,
+        )
+    except UploadTooLargeError as exc:
+        return await _build_dashboard_response(request, upload_error=str(exc), status_code=413)
+    except UploadFormError as exc:
+        return await _build_dashboard_response(request, upload_error=str(exc), status_code=400)
+
+    received = form.received
+    if received is None:
+        return await _build_dashboard_response(
             request, upload_error="Please choose an image to upload."
         )
     try:
-        parsed_date = date.fromisoformat(entry_date)
+        parsed_date = date.fromisoformat(form.fields.get("entry_date", ""))
     except ValueError:
-        return _build_dashboard_response(
+        received.path.unlink(missing_ok=True)
+        return await _build_dashboard_response(
             request,
             upload_error="Please provide a valid entry date (YYYY-MM-DD).",
         )
+    clinic_field = form.fields.get("clinic_id", "")
+    if clinic_field and not clinic_field.isdigit():
+        received.path.unlink(missing_ok=True)
+        return await _build_dashboard_response(request, upload_error="Please choose a clinic.")
+    clinic_id = int(clinic_field) if clinic_field else None
 
-    settings = load_settings()
-    settings.uploads_dir.mkdir(parents=True, exist_ok=True)
-    safe_name = Path(file.filename).name
-    unique_suffix = uuid.uuid4().hex[:8]
-    timestamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d%H%M%S")
-    stored_name = f"{timestamp}_{unique_suffix}_{safe_name}"
-    destination = settings.uploads_dir / stored_name
-
-    with destination.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    existing_id = await find_upload_by_hash(received.content_hash)
+    if existing_id is not None:
+        received.path.unlink(missing_ok=True)
+        return RedirectResponse(url=f"/?uploaded=1&duplicate={existing_id}", status_code=303)
 
     if clinic_id is None:
-        clinic_id = get_or_create_clinic("Unassigned")
+        clinic_id = await run_in_threadpool(get_or_create_clinic, "Unassigned")
 
     created_at = datetime.now(tz=timezone.utc).isoformat()
-    with get_connection() as connection:
-        connection.execute(
-            """
-            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
-            VALUES (?, ?, ?, 'new', ?)
-            """,
-            (stored_name, clinic_id, parsed_date.isoformat(), created_at),
-        )
-
-    week_start = parsed_date - timedelta(days=parsed_date.weekday())
-    try:
-        process_new_uploads()
-        refresh_weekly_rollups(week_start)
-    except Exception as exc:
-        return _build_dashboard_response(
-            request,
-            upload_error=(
-                "Upload saved, but processing failed. "
-                f"Run the process/rollup scripts or try again. ({exc})"
-            ),
-        )
+    upload_id, created = await register_upload(
+        received, settings.uploads_dir, clinic_id, parsed_date.isoformat(), created_at
+    )
+    if not created:
+        return RedirectResponse(url=f"/?uploaded=1&duplicate={upload_id}", status_code=303)
 
-    return RedirectResponse(url="/?uploaded=1", status_code=303)
+    job_id = await run_in_threadpool(enqueue_job, "process_upload", {"upload_id": upload_id})
+    return RedirectResponse(url=f"/?uploaded=1&job={job_id}", status_code=303)
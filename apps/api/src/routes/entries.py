@@ -2,27 +2,82 @@ from __future__ import annotations
 
 from datetime import date
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
 
-from apps.api.src.db.database import get_connection
-from apps.api.src.models.schemas import UploadEntry
+from apps.api.src.db.async_database import get_async_connection
+from apps.api.src.models.schemas import OCRWordOut, UploadEntry
+from apps.api.src.services.archive_service import thumbnail_path_for
+from apps.api.src.services.ocr_words_service import get_ocr_words
+from apps.api.src.services.listing_service import (
+    ListingFilters,
+    entries_page,
+    iter_ndjson,
+    iter_pages,
+    listing_filters,
+)
+from apps.api.src.utils.config import get_settings
+from apps.api.src.utils.pagination import CursorError, clamp_page_size
 
 router = APIRouter()
 
 
 @router.get("/entries", response_model=list[UploadEntry])
-def get_entries() -> list[UploadEntry]:
-    with get_connection() as connection:
-        rows = connection.execute(
-            """
-            SELECT id, filename, clinic_id, entry_date, status, created_at,
-                   production_amount, collections_amount, error_reason
-            FROM uploads
-            ORDER BY created_at DESC
-            """
-        ).fetchall()
+async def get_entries(
+    response: Response,
+    after: str | None = None,
+    limit: int | None = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    filters: ListingFilters = Depends(listing_filters),
+):
+    page_size = clamp_page_size(limit)
+    try:
+        page = await entries_page(filters, after, page_size)
+    except CursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if response_format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(iter_pages(entries_page, filters, page, page_size)),
+            media_type="application/x-ndjson",
+        )
+
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
     entries = []
-    for row in rows:
+    for row in page.items:
         entry_date = date.fromisoformat(row["entry_date"]) if row["entry_date"] else None
-        entries.append({**dict(row), "entry_date": entry_date})
+        entries.append({**row, "entry_date": entry_date})
     return entries
+
+
+@router.get("/entries/{upload_id}/words", response_model=list[OCRWordOut])
+def get_entry_words(upload_id: int, max_confidence: float | None = None):
+    words = get_ocr_words(upload_id)
+    if words is None:
+        raise HTTPException(status_code=404, detail="No OCR word data for this upload")
+    return [
+        word._asdict()
+        for word in words
+        if max_confidence is None or word.confidence <= max_confidence
+    ]
+
+
+@router.get("/entries/{upload_id}/thumbnail")
+async def get_entry_thumbnail(upload_id: int):
+    async with get_async_connection() as connection:
+        async with connection.execute(
+            "SELECT archive_path FROM uploads WHERE id = ?", (upload_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+    if row is None or row["archive_path"] is None:
+        raise HTTPException(status_code=404, detail="No thumbnail for this upload")
+    path = get_settings().archive_dir / thumbnail_path_for(row["archive_path"])
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No thumbnail for this upload")
+    # Named by content hash, so a given URL's bytes never change.
+    return FileResponse(
+        path,
+        media_type="image/webp",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
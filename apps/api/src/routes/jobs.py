@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException
+
+from apps.api.src.models.schemas import JobOut
+from apps.api.src.services.job_service import get_job
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job_status(job_id: int) -> JobOut:
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from apps.api.src.db.database import pool_stats
+
+router = APIRouter()
+
+
+@router.get("/metrics/db")
+def get_db_metrics() -> dict[str, int]:
+    return pool_stats()
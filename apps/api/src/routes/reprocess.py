@@ -2,14 +2,23 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException
 
+from apps.api.src.services.job_service import BACKGROUND_PRIORITY, enqueue_job
 from apps.api.src.services.process_service import reprocess_upload
 
 router = APIRouter()
 
 
 @router.post("/reprocess/{upload_id}")
-def post_reprocess(upload_id: int) -> dict[str, str]:
-    success = reprocess_upload(upload_id)
+def post_reprocess(upload_id: int, force_ocr: bool = False) -> dict[str, str]:
+    success = reprocess_upload(upload_id, force_ocr=force_ocr)
     if not success:
         raise HTTPException(status_code=404, detail="Upload not found")
     return {"status": "reprocessed"}
+
+
+@router.post("/reparse", status_code=202)
+def post_reparse() -> dict[str, int | str]:
+    # Replaying the whole history can outlast any HTTP timeout; a job worker
+    # runs it and GET /jobs/{job_id} reports progress.
+    job_id = enqueue_job("reparse_uploads", {}, priority=BACKGROUND_PRIORITY)
+    return {"status": "queued", "job_id": job_id}
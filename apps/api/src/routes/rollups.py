@@ -2,25 +2,26 @@ from __future__ import annotations
 
 from datetime import date
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 
-from apps.api.src.db.database import get_connection
-from apps.api.src.models.schemas import RollupOut
+from apps.api.src.db.async_database import get_async_connection
+from apps.api.src.models.schemas import RollupOut, RollupRangeOut
+from apps.api.src.services.report_service import GRAIN_PERIODS, range_rollups
 
 router = APIRouter()
 
 
 @router.get("/weekly-rollups", response_model=list[RollupOut])
-def get_weekly_rollups() -> list[RollupOut]:
-    with get_connection() as connection:
-        rows = connection.execute(
+async def get_weekly_rollups() -> list[RollupOut]:
+    async with get_async_connection() as connection:
+        rows = await connection.execute_fetchall(
             """
             SELECT id, week_start, clinic_id, total_production, total_collections,
                    estimated_pay, created_at
             FROM rollups
             ORDER BY week_start DESC, clinic_id
             """
-        ).fetchall()
+        )
 
     rollups = []
     for row in rows:
@@ -31,3 +32,18 @@ def get_weekly_rollups() -> list[RollupOut]:
             }
         )
     return rollups
+
+
+@router.get("/rollups", response_model=list[RollupRangeOut])
+async def get_rollups(
+    grain: str = Query("week", pattern=f"^({'|'.join(GRAIN_PERIODS)})$"),
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    clinic_id: int | None = None,
+) -> list[RollupRangeOut]:
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    rows = await range_rollups(grain, date_from, date_to, clinic_id)
+    return [
+        {**row, "period_start": date.fromisoformat(row["period_start"])} for row in rows
+    ]
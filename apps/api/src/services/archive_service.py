@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from apps.api.src.db.database import get_connection
+from apps.api.src.services.storage_service import ARCHIVE_SUFFIX, shard_path
+from apps.api.src.utils.config import Settings
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SUFFIX = ".thumb.webp"
+THUMBNAIL_QUALITY = 70
+PRUNE_BATCH_SIZE = 500
+
+
+def archive_path_for(content_hash: str) -> str:
+    return shard_path(content_hash, ARCHIVE_SUFFIX)
+
+
+def thumbnail_path_for(archive_path: str) -> str:
+    return archive_path.removesuffix(ARCHIVE_SUFFIX) + THUMBNAIL_SUFFIX
+
+
+def _save_atomic(image: Image.Image, destination: Path, **options) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    try:
+        image.save(temp, "WEBP", **options)
+        os.replace(temp, destination)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+def write_archive(source: Path, content_hash: str, settings: Settings) -> str:
+    relative = archive_path_for(content_hash)
+    destination = settings.archive_dir / relative
+    thumbnail = settings.archive_dir / thumbnail_path_for(relative)
+    if destination.exists() and thumbnail.exists():
+        return relative
+    with Image.open(source) as original:
+        image = original
+        if image.mode not in {"RGB", "RGBA", "L"}:
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        # Lossless and untransposed: OCR reads the raw pixels, so the archive
+        # must match them for clinic crop/totals boxes to keep lining up.
+        _save_atomic(image, destination, lossless=True, quality=100, method=4)
+        # Only the thumbnail is for people, so it follows the EXIF orientation.
+        preview = ImageOps.exif_transpose(original)
+        if preview.mode not in {"RGB", "RGBA", "L"}:
+            preview = preview.convert("RGBA" if "A" in preview.getbands() else "RGB")
+        preview.thumbnail((settings.thumbnail_size, settings.thumbnail_size))
+        _save_atomic(preview, thumbnail, quality=THUMBNAIL_QUALITY)
+    return relative
+
+
+def archive_upload(upload_id: int, source: Path, content_hash: str, settings: Settings) -> None:
+    try:
+        relative = write_archive(source, content_hash, settings)
+    except Exception:
+        # The original is still in place; a later `make archive` retries.
+        logger.exception("Failed to archive upload %s", upload_id)
+        return
+    with get_connection() as connection:
+        connection.execute(
+            "UPDATE uploads SET archive_path = ? WHERE id = ?", (relative, upload_id)
+        )
+
+
+def archive_stored_upload(upload_id: int, settings: Settings) -> None:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT storage_path, content_hash, archive_path FROM uploads WHERE id = ?",
+            (upload_id,),
+        ).fetchone()
+    if row is None or row["archive_path"] or not row["storage_path"]:
+        return
+    source = settings.processed_dir / row["storage_path"]
+    if not source.exists():
+        return
+    content_hash = row["content_hash"] or Path(row["storage_path"]).stem
+    archive_upload(upload_id, source, content_hash, settings)
+
+
+@dataclass
+class ArchiveSummary:
+    archived: int = 0
+    pruned: int = 0
+    bytes_freed: int = 0
+
+
+def archive_pending(settings: Settings) -> ArchiveSummary:
+    summary = ArchiveSummary()
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT id, storage_path, content_hash FROM uploads
+            WHERE status = 'processed' AND archive_path IS NULL AND storage_path IS NOT NULL
+            ORDER BY id
+            """
+        ).fetchall()
+    for row in rows:
+        source = settings.processed_dir / row["storage_path"]
+        if not source.exists():
+            continue
+        content_hash = row["content_hash"] or Path(row["storage_path"]).stem
+        archive_upload(int(row["id"]), source, content_hash, settings)
+        summary.archived += 1
+    return summary
+
+
+ARCHIVE_PRUNE_SQL = """
+    UPDATE uploads SET archive_path = ?, storage_path = NULL
+    WHERE storage_path = ?
+"""
+
+
+def prune_originals(settings: Settings, max_age_days: float) -> ArchiveSummary:
+    summary = ArchiveSummary()
+    cutoff = (datetime.now(tz=timezone.utc) - timedelta(days=max_age_days)).isoformat()
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT id, storage_path, archive_path FROM uploads
+            WHERE archive_path IS NOT NULL AND storage_path IS NOT NULL AND created_at < ?
+            ORDER BY id
+            """,
+            (cutoff,),
+        ).fetchall()
+    for start in range(0, len(rows), PRUNE_BATCH_SIZE):
+        pruned = []
+        for row in rows[start : start + PRUNE_BATCH_SIZE]:
+            if not (settings.archive_dir / row["archive_path"]).exists():
+                continue
+            original = settings.processed_dir / row["storage_path"]
+            try:
+                size = original.stat().st_size
+                original.unlink()
+            except FileNotFoundError:
+                size = 0
+            pruned.append((row["archive_path"], row["storage_path"]))
+            summary.bytes_freed += size
+        with get_connection() as connection:
+            # Storage is content-addressed, so every row sharing the original
+            # now reads the same archive copy.
+            connection.executemany(ARCHIVE_PRUNE_SQL, pruned)
+        summary.pruned += len(pruned)
+    return summary
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from array import array
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from itertools import repeat
+from typing import NamedTuple, Sequence
+
+from apps.api.src.services.clinic_service import detect_clinic_id
+from apps.api.src.services.detail_service import (
+    ENTRY_DETAIL_DELETE,
+    ENTRY_DETAIL_INSERT,
+    DetailRecord,
+    iter_detail_lines,
+)
+from apps.api.src.services.rollup_service import apply_upload_deltas, upload_contributions
+from apps.api.src.services.rules import get_parser
+from apps.api.src.services.rules.base import BaseParser
+
+logger = logging.getLogger(__name__)
+
+MISSING = float("nan")
+
+
+class UploadText(NamedTuple):
+    upload_id: int
+    clinic_id: int | None
+    clinic_name: str | None
+    entry_date: str | None
+    raw_text: str
+
+
+@dataclass
+class ParsedBatch:
+    # One slot per parsed upload; totals use NaN for "not found".
+    upload_ids: array = field(default_factory=lambda: array("q"))
+    clinic_ids: list[int | None] = field(default_factory=list)
+    production: array = field(default_factory=lambda: array("d"))
+    collections: array = field(default_factory=lambda: array("d"))
+    # One slot per detail line across the batch; details holds a tuple per
+    # DetailRecord field.
+    detail_upload_ids: array = field(default_factory=lambda: array("q"))
+    details: DetailRecord = field(default_factory=lambda: DetailRecord(*[()] * 9))
+    failures: dict[int, str] = field(default_factory=dict)
+
+
+@lru_cache(maxsize=4096)
+def _default_date(entry_date: str | None) -> date | None:
+    return datetime.fromisoformat(entry_date).date() if entry_date else None
+
+
+@lru_cache(maxsize=4096)
+def _isoformat(value: date | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def parse_upload_batch(
+    uploads: Sequence[UploadText], clinic_names: dict[int, str]
+) -> ParsedBatch:
+    batch = ParsedBatch()
+    parsers: dict[str | None, BaseParser] = {}
+    records: list[DetailRecord] = []
+    for upload in uploads:
+        line_count = len(records)
+        try:
+            detected_clinic_id = detect_clinic_id(upload.raw_text)
+            clinic_id, clinic_name = upload.clinic_id, upload.clinic_name
+            if detected_clinic_id:
+                clinic_id = detected_clinic_id
+                clinic_name = clinic_names.get(detected_clinic_id)
+            parser = parsers.get(clinic_name)
+            if parser is None:
+                parser = parsers[clinic_name] = get_parser(clinic_name)
+            parsed = parser.parse(upload.raw_text)
+            records.extend(
+                iter_detail_lines(upload.raw_text, _default_date(upload.entry_date))
+            )
+        except Exception as exc:
+            logger.exception("Failed to parse upload %s", upload.upload_id)
+            del records[line_count:]
+            batch.failures[upload.upload_id] = str(exc)
+            continue
+
+        batch.upload_ids.append(upload.upload_id)
+        batch.clinic_ids.append(clinic_id)
+        batch.production.append(
+            MISSING if parsed.production_amount is None else parsed.production_amount
+        )
+        batch.collections.append(
+            MISSING if parsed.collections_amount is None else parsed.collections_amount
+        )
+        batch.detail_upload_ids.extend(repeat(upload.upload_id, len(records) - line_count))
+
+    if records:
+        batch.details = DetailRecord._make(zip(*records))
+    return batch
+
+
+def write_parsed_batch(connection: sqlite3.Connection, batch: ParsedBatch) -> int:
+    upload_ids = batch.upload_ids.tolist()
+    before = upload_contributions(connection, upload_ids)
+    # SQLite binds NaN as NULL, so missing totals go in as they are.
+    connection.executemany(
+        """
+        UPDATE uploads
+        SET production_amount = ?, collections_amount = ?,
+            status = 'processed', error_reason = NULL, clinic_id = ?
+        WHERE id = ?
+        """,
+        zip(batch.production, batch.collections, batch.clinic_ids, upload_ids),
+    )
+    after = upload_contributions(connection, upload_ids)
+    apply_upload_deltas(
+        connection, ((before[upload_id], after[upload_id]) for upload_id in upload_ids)
+    )
+
+    connection.executemany(ENTRY_DETAIL_DELETE, zip(upload_ids))
+    details = batch.details
+    cursor = connection.executemany(
+        ENTRY_DETAIL_INSERT,
+        zip(
+            batch.detail_upload_ids,
+            map(_isoformat, details.entry_date),
+            details.patient_name,
+            details.tooth_number,
+            details.treatment_code,
+            details.description,
+            details.charges,
+            details.payments,
+            details.phone_number,
+            details.raw_line,
+            repeat(datetime.now(tz=timezone.utc).isoformat()),
+        ),
+    )
+    return max(cursor.rowcount, 0)
@@ -1,19 +1,20 @@
 from __future__ import annotations
 
-from typing import Any
-
 import re
+from typing import Any
 
 from apps.api.src.db.database import get_connection
-from apps.api.src.utils.config import load_clinics_config, load_settings
+from apps.api.src.services.dashboard_service import invalidate_dashboard
+from apps.api.src.utils.config import get_settings, load_clinics_config
 
 
 def seed_clinics() -> None:
-    settings = load_settings()
+    settings = get_settings()
     clinics = load_clinics_config(settings.clinics_config_path)
     if not clinics:
         return
 
+    inserted = False
     with get_connection() as connection:
         existing = {
             row["name"]: row["id"]
@@ -28,6 +29,17 @@ def seed_clinics() -> None:
                 "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
                 (name, float(pay_percentage)),
             )
+            inserted = True
+    if inserted:
+        invalidate_clinic_matcher()
+        invalidate_dashboard()
+
+
+def is_configured_clinic(name: str | None) -> bool:
+    if not name:
+        return False
+    clinics = load_clinics_config(get_settings().clinics_config_path)
+    return any(clinic.get("name") == name for clinic in clinics)
 
 
 def list_clinics() -> list[dict[str, Any]]:
@@ -49,39 +61,105 @@ def create_clinic(name: str, pay_percentage: float) -> dict[str, Any]:
             "SELECT id, name, pay_percentage FROM clinics WHERE id = ?",
             (clinic_id,),
         ).fetchone()
+    invalidate_clinic_matcher()
+    invalidate_dashboard()
     return dict(row)
 
 
+CLINIC_BY_NAME_SQL = "SELECT id FROM clinics WHERE name = ?"
+
+
 def get_or_create_clinic(name: str) -> int:
-    settings = load_settings()
+    settings = get_settings()
     with get_connection() as connection:
-        row = connection.execute(
-            "SELECT id FROM clinics WHERE name = ?",
-            (name,),
-        ).fetchone()
+        row = connection.execute(CLINIC_BY_NAME_SQL, (name,)).fetchone()
         if row:
             return int(row["id"])
         cursor = connection.execute(
             "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
             (name, settings.pay_percentage),
         )
-        return int(cursor.lastrowid)
+        clinic_id = int(cursor.lastrowid)
+    invalidate_clinic_matcher()
+    invalidate_dashboard()
+    return clinic_id
+
+
+def _trie_pattern(node: dict[str, dict]) -> str:
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    # A name may end here or continue into a longer one; the greedy optional
+    # group tries the longer name first.
+    return f"(?:{body})?" if "" in node else body
+
+
+class ClinicMatcher:
+    def __init__(self, clinics: list[tuple[int, str]]) -> None:
+        self._clinics: dict[str, tuple[int, int]] = {}
+        trie: dict[str, dict] = {}
+        for order, (clinic_id, name) in enumerate(clinics):
+            if not name:
+                continue
+            key = name.lower()
+            if key in self._clinics:
+                continue
+            self._clinics[key] = (order, clinic_id)
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self._pattern = (
+            re.compile(rf"(?=\b({_trie_pattern(trie)})\b)", re.IGNORECASE)
+            if trie
+            else None
+        )
+
+    def match(self, raw_text: str) -> int | None:
+        if self._pattern is None:
+            return None
+        best: tuple[int, int, int] | None = None
+        for match in self._pattern.finditer(raw_text):
+            found = self._clinics.get(match.group(1).lower())
+            if found is None:
+                continue
+            order, clinic_id = found
+            candidate = (-len(match.group(1)), order, clinic_id)
+            if best is None or candidate < best:
+                best = candidate
+        return best[2] if best else None
+
+
+# Clinics are only ever inserted, so their count and highest id change
+# whenever another process (seed, CLI, API) adds one.
+CLINICS_VERSION_SQL = "SELECT COUNT(*), MAX(id) FROM clinics"
+
+_matchers: dict[str, tuple[tuple[int, int | None], ClinicMatcher]] = {}
+
+
+def invalidate_clinic_matcher() -> None:
+    _matchers.clear()
+
+
+def _clinic_matcher() -> ClinicMatcher:
+    database_url = get_settings().database_url
+    cached = _matchers.get(database_url)
+    with get_connection() as connection:
+        version = tuple(connection.execute(CLINICS_VERSION_SQL).fetchone())
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        clinics = connection.execute("SELECT id, name FROM clinics ORDER BY id").fetchall()
+    matcher = ClinicMatcher([(int(row["id"]), row["name"]) for row in clinics])
+    _matchers[database_url] = (version, matcher)
+    return matcher
 
 
 def detect_clinic_id(raw_text: str) -> int | None:
     if not raw_text:
         return None
-    with get_connection() as connection:
-        clinics = connection.execute("SELECT id, name FROM clinics").fetchall()
-    matches: list[tuple[int, int]] = []
-    for clinic in clinics:
-        name = clinic["name"]
-        if not name:
-            continue
-        pattern = re.compile(rf"\b{re.escape(name)}\b", re.IGNORECASE)
-        if pattern.search(raw_text):
-            matches.append((int(clinic["id"]), len(name)))
-    if not matches:
-        return None
-    matches.sort(key=lambda item: item[1], reverse=True)
-    return matches[0][0]
+    return _clinic_matcher().match(raw_text)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable
+
+from apps.api.src.db.async_database import get_async_connection
+from apps.api.src.db.database import call_after_commit, database_path
+from apps.api.src.utils.config import get_settings
+
+
+@dataclass(frozen=True)
+class DashboardData:
+    latest_week: str | None
+    week_number: int | None
+    rollups: list[dict[str, Any]]
+    clinics: list[dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class DashboardPage:
+    html: str
+    etag: str
+
+
+@dataclass
+class _CachedDashboard:
+    version: tuple[int, int]
+    data: DashboardData
+    page: DashboardPage | None = None
+
+
+_lock = threading.Lock()
+_generation = 0
+_cache: dict[Path, _CachedDashboard] = {}
+
+
+def _marker_path(db_path: Path) -> Path:
+    return db_path.with_name(f"{db_path.name}-dashboard")
+
+
+def _version(db_path: Path) -> tuple[int, int]:
+    # The marker file carries invalidations from other processes (scripts,
+    # job workers in another container) without a query.
+    try:
+        marker = _marker_path(db_path).stat().st_mtime_ns
+    except FileNotFoundError:
+        marker = 0
+    return _generation, marker
+
+
+def _bump() -> None:
+    global _generation
+    db_path = database_path()
+    with _lock:
+        _generation += 1
+        _cache.clear()
+    try:
+        _marker_path(db_path).touch()
+    except OSError:
+        pass
+
+
+def invalidate_dashboard() -> None:
+    call_after_commit(_bump)
+
+
+LATEST_WEEK_SQL = "SELECT week_start FROM rollups ORDER BY week_start DESC LIMIT 1"
+
+WEEK_ROLLUPS_SQL = """
+    SELECT rollups.*, clinics.name AS clinic_name
+    FROM rollups
+    LEFT JOIN clinics ON clinics.id = rollups.clinic_id
+    WHERE rollups.week_start = ?
+    ORDER BY rollups.clinic_id
+"""
+
+
+async def _load_dashboard_data() -> DashboardData:
+    async with get_async_connection() as connection:
+        async with connection.execute(LATEST_WEEK_SQL) as cursor:
+            latest_week = await cursor.fetchone()
+
+        rollups = []
+        if latest_week:
+            rollups = await connection.execute_fetchall(
+                WEEK_ROLLUPS_SQL, (latest_week["week_start"],)
+            )
+        clinics = await connection.execute_fetchall("SELECT id, name FROM clinics ORDER BY name")
+
+    week_start = latest_week["week_start"] if latest_week else None
+    week_number = None
+    if week_start:
+        week_number = date.fromisoformat(week_start).isocalendar().week
+
+    return DashboardData(
+        week_start,
+        week_number,
+        [dict(row) for row in rollups],
+        [dict(row) for row in clinics],
+    )
+
+
+async def _cached_entry() -> _CachedDashboard:
+    db_path = database_path()
+    version = _version(db_path)
+    entry = _cache.get(db_path)
+    if entry is not None and entry.version == version:
+        return entry
+    # The version is read before querying, so a write that commits meanwhile
+    # leaves this entry already stale.
+    entry = _CachedDashboard(version, await _load_dashboard_data())
+    if get_settings().dashboard_cache:
+        with _lock:
+            if version == _version(db_path):
+                _cache[db_path] = entry
+    return entry
+
+
+async def get_dashboard_data() -> DashboardData:
+    return (await _cached_entry()).data
+
+
+async def get_dashboard_page(render: Callable[[DashboardData], str]) -> DashboardPage:
+    entry = await _cached_entry()
+    page = entry.page
+    if page is None:
+        html = render(entry.data)
+        page = entry.page = DashboardPage(
+            html, f'"{hashlib.sha256(html.encode("utf-8")).hexdigest()[:32]}"'
+        )
+    return page
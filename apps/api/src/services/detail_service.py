@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import re
+import sqlite3
 from datetime import date
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple
 
 
 DATE_PATTERN = re.compile(r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})")
@@ -12,8 +15,46 @@ CURRENCY_PATTERN = re.compile(r"\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})")
 PATIENT_PATTERN = re.compile(
     r"(?:patient|pt)\s*[:\-]\s*([A-Za-z ,.'-]+)", re.IGNORECASE
 )
+# The field patterns above as one left-to-right scan. Only the patient label
+# is consumed (names run into "D1110" and must still be scanned), and no two
+# alternatives can start on the same character except a dotted phone number
+# and an amount. "overlap" catches a consumed token followed by something a
+# date, phone number or amount starting inside it could run on into; those
+# lines (and dotted phone numbers) fall back to the per-field search. The
+# leading class lets the engine skip characters no token can start with.
+DETAIL_TOKEN_PATTERN = re.compile(
+    r"""
+    (?=[\d$\#A-Zpt])
+    (?:
+      (?:
+          (?P<date>\d{1,2}[/-]\d{1,2}[/-]\d{2,4})
+        | (?P<phone>\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b)
+        | (?P<amount>\$?\d{1,3}(?:,\d{3})*(?:\.\d{2}))
+        | (?P<code>\b[A-Z]\d{3,4}\b)
+        | (?P<tooth>(?i:tooth|tooth\#|\#)\s*(?P<tooth_number>\d{1,2}))
+      )
+      (?=(?P<overlap>[/\-.,\d]|(?<=\d{3})\s\d))?
+    | (?P<patient>(?i:patient|pt)\s*[:\-]\s*)(?=(?P<patient_name>(?i:[A-Za-z ,.'-]+)))
+    )
+    """,
+    re.VERBOSE,
+)
+WHITESPACE_RUN = re.compile(r"\s{2,}")
+
 
+class DetailRecord(NamedTuple):
+    entry_date: date | None
+    patient_name: str | None
+    tooth_number: str | None
+    treatment_code: str | None
+    description: str
+    charges: float | None
+    payments: float | None
+    phone_number: str | None
+    raw_line: str
 
+
+@lru_cache(maxsize=1024)
 def _parse_date(value: str) -> date | None:
     for separator in ("/", "-"):
         parts = value.split(separator)
@@ -37,12 +78,88 @@ def _clean_description(line: str, tokens: list[str]) -> str:
     for token in tokens:
         if token:
             cleaned = cleaned.replace(token, "")
-    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip(" -\t")
+    cleaned = WHITESPACE_RUN.sub(" ", cleaned).strip(" -\t")
     return cleaned
 
 
-def parse_detail_lines(raw_text: str, default_date: date | None) -> list[dict[str, object]]:
-    details: list[dict[str, object]] = []
+ENTRY_DETAIL_INSERT = """
+    INSERT INTO entry_details (
+        upload_id, entry_date, patient_name, tooth_number, treatment_code,
+        description, charges, payments, phone_number, raw_line, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+ENTRY_DETAIL_DELETE = "DELETE FROM entry_details WHERE upload_id = ?"
+
+DetailRow = tuple[
+    int, str | None, str | None, str | None, str | None, str, float | None,
+    float | None, str | None, str, str,
+]
+
+
+def parse_detail_lines(raw_text: str, default_date: date | None) -> list[DetailRecord]:
+    return list(iter_detail_lines(raw_text, default_date))
+
+
+def _amount_value(amount: str) -> float:
+    return float(amount.replace("$", "").replace(",", ""))
+
+
+LineFields = tuple[
+    str | None, str | None, str | None, str | None, str | None, str | None,
+    str | None, list[str],
+]
+
+
+def _scan_fields(line: str) -> LineFields | None:
+    date_text = phone = patient = patient_name = code = tooth = tooth_number = None
+    amounts: list[str] = []
+    for (
+        date_token, phone_token, amount, code_token, tooth_token, number, overlap,
+        label, name,
+    ) in DETAIL_TOKEN_PATTERN.findall(line):
+        if overlap:
+            return None
+        if amount:
+            amounts.append(amount)
+        elif date_token:
+            if date_text is None:
+                date_text = date_token
+        elif phone_token:
+            if "." in phone_token:
+                return None
+            if phone is None:
+                phone = phone_token
+        elif code_token:
+            if code is None:
+                code = code_token
+        elif tooth_token:
+            if tooth is None:
+                tooth, tooth_number = tooth_token, number
+        elif patient is None:
+            patient, patient_name = label + name, name.strip()
+    return date_text, phone, patient, patient_name, code, tooth, tooth_number, amounts
+
+
+def _search_fields(line: str) -> LineFields:
+    date_match = DATE_PATTERN.search(line)
+    phone_match = PHONE_PATTERN.search(line)
+    patient_match = PATIENT_PATTERN.search(line)
+    code_match = TREATMENT_CODE_PATTERN.search(line)
+    tooth_match = TOOTH_PATTERN.search(line)
+    return (
+        date_match.group(1) if date_match else None,
+        phone_match.group(0) if phone_match else None,
+        patient_match.group(0) if patient_match else None,
+        patient_match.group(1).strip() if patient_match else None,
+        code_match.group(0) if code_match else None,
+        tooth_match.group(0) if tooth_match else None,
+        tooth_match.group(1) if tooth_match else None,
+        CURRENCY_PATTERN.findall(line),
+    )
+
+
+def iter_detail_lines(raw_text: str, default_date: date | None) -> Iterator[DetailRecord]:
     for line in (line.strip() for line in raw_text.splitlines()):
         if not line:
             continue
@@ -50,66 +167,59 @@ def parse_detail_lines(raw_text: str, default_date: date | None) -> list[dict[st
         if "production" in lowered or "collections" in lowered:
             continue
 
-        date_match = DATE_PATTERN.search(line)
-        parsed_date = _parse_date(date_match.group(1)) if date_match else None
-        phone_match = PHONE_PATTERN.search(line)
-        patient_match = PATIENT_PATTERN.search(line)
-        treatment_match = TREATMENT_CODE_PATTERN.search(line)
-        tooth_match = TOOTH_PATTERN.search(line)
-        amounts = [match.group(0) for match in CURRENCY_PATTERN.finditer(line)]
-
-        charges = None
-        payments = None
-        if amounts:
-            parsed_amounts = []
-            for amount in amounts:
-                raw = amount.replace("$", "").replace(",", "")
-                try:
-                    parsed_amounts.append(float(raw))
-                except ValueError:
-                    continue
-            if parsed_amounts:
-                charges = parsed_amounts[0]
-                if len(parsed_amounts) > 1:
-                    payments = parsed_amounts[1]
-
-        tokens = [
-            date_match.group(1) if date_match else "",
-            phone_match.group(0) if phone_match else "",
-            patient_match.group(0) if patient_match else "",
-            treatment_match.group(0) if treatment_match else "",
-            tooth_match.group(0) if tooth_match else "",
-            *amounts,
-        ]
-        description = _clean_description(line, tokens)
-        patient_name = patient_match.group(1).strip() if patient_match else None
-        tooth_number = tooth_match.group(1) if tooth_match else None
-
-        has_signal = any(
-            value is not None and value != ""
-            for value in (
-                patient_name,
-                tooth_number,
-                treatment_match.group(0) if treatment_match else None,
-                charges,
-                payments,
-                phone_match.group(0) if phone_match else None,
-            )
-        )
-        if not has_signal:
+        # Tokens that could overlap (a date running out of a code, amounts
+        # inside a dotted phone number) need each field's own leftmost match.
+        fields = _scan_fields(line) or _search_fields(line)
+        date_text, phone, patient, patient_name, code, tooth, tooth_number, amounts = fields
+        if not (patient_name or tooth_number or code or amounts or phone):
             continue
 
-        details.append(
-            {
-                "entry_date": parsed_date or default_date,
-                "patient_name": patient_name,
-                "tooth_number": tooth_number,
-                "treatment_code": treatment_match.group(0) if treatment_match else None,
-                "description": description or line,
-                "charges": charges,
-                "payments": payments,
-                "phone_number": phone_match.group(0) if phone_match else None,
-                "raw_line": line,
-            }
+        description = _clean_description(
+            line,
+            [date_text or "", phone or "", patient or "", code or "", tooth or "", *amounts],
         )
-    return details
+        yield DetailRecord(
+            (_parse_date(date_text) if date_text else None) or default_date,
+            patient_name,
+            tooth_number,
+            code,
+            description or line,
+            _amount_value(amounts[0]) if amounts else None,
+            _amount_value(amounts[1]) if len(amounts) > 1 else None,
+            phone,
+            line,
+        )
+
+
+def iter_detail_rows(
+    upload_id: int, raw_text: str, default_date: date | None, created_at: str
+) -> Iterator[DetailRow]:
+    iso_dates: dict[date, str] = {}
+    for detail in iter_detail_lines(raw_text, default_date):
+        entry_date = detail.entry_date
+        entry_date_iso = None
+        if entry_date:
+            entry_date_iso = iso_dates.get(entry_date)
+            if entry_date_iso is None:
+                entry_date_iso = iso_dates[entry_date] = entry_date.isoformat()
+        yield (
+            upload_id,
+            entry_date_iso,
+            detail.patient_name,
+            detail.tooth_number,
+            detail.treatment_code,
+            detail.description,
+            detail.charges,
+            detail.payments,
+            detail.phone_number,
+            detail.raw_line,
+            created_at,
+        )
+
+
+def write_entry_details(
+    connection: sqlite3.Connection, upload_id: int, rows: Iterable[DetailRow]
+) -> int:
+    connection.execute(ENTRY_DETAIL_DELETE, (upload_id,))
+    cursor = connection.executemany(ENTRY_DETAIL_INSERT, rows)
+    return max(cursor.rowcount, 0)
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import json
 import logging
+import os
 import re
+import sqlite3
+import time
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import NamedTuple
 
 from apps.api.src.db.database import get_connection
-from apps.api.src.utils.config import load_settings
+from apps.api.src.services.ocr_service import hash_image
+from apps.api.src.utils.config import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,42 +32,178 @@ def _parse_date_from_filename(filename: str) -> str | None:
     return None
 
 
-def _default_clinic_id() -> int:
-    with get_connection() as connection:
-        row = connection.execute("SELECT id FROM clinics ORDER BY id LIMIT 1").fetchone()
-        if not row:
-            raise ValueError("No clinics available. Create a clinic before ingesting.")
-        return int(row["id"])
+def _default_clinic_id(connection: sqlite3.Connection) -> int:
+    row = connection.execute("SELECT id FROM clinics ORDER BY id LIMIT 1").fetchone()
+    if not row:
+        raise ValueError("No clinics available. Create a clinic before ingesting.")
+    return int(row["id"])
+
+
+KNOWN_FILENAMES_SQL = (
+    "SELECT filename FROM uploads WHERE filename IN (SELECT value FROM json_each(?))"
+)
+
+# Scoped to the names in the folder, so the cost follows the folder, not
+# everything ever ingested.
+MANIFEST_LOOKUP_SQL = """
+    SELECT name, size, mtime_ns FROM ingest_manifest
+    WHERE name IN (SELECT value FROM json_each(?))
+"""
+
+MANIFEST_PRUNE_SQL = """
+    DELETE FROM ingest_manifest WHERE name NOT IN (SELECT value FROM json_each(?))
+"""
+
+MANIFEST_UPSERT_SQL = """
+    INSERT INTO ingest_manifest (name, size, mtime_ns, content_hash, upload_id, seen_at)
+    VALUES (
+        :name, :size, :mtime_ns, :content_hash,
+        COALESCE(
+            (SELECT id FROM uploads WHERE filename = :name),
+            (SELECT id FROM uploads WHERE content_hash = :content_hash)
+        ),
+        :seen_at
+    )
+    ON CONFLICT (name) DO UPDATE SET
+        size = excluded.size,
+        mtime_ns = excluded.mtime_ns,
+        content_hash = excluded.content_hash,
+        upload_id = COALESCE(excluded.upload_id, ingest_manifest.upload_id),
+        seen_at = excluded.seen_at
+"""
+
+
+class ScannedFile(NamedTuple):
+    name: str
+    size: int
+    mtime_ns: int
+
+
+class IngestRun(NamedTuple):
+    upload_ids: list[int]
+    deferred: int
+
+
+def _scan_folder(uploads_dir: Path) -> list[ScannedFile]:
+    scanned: list[ScannedFile] = []
+    with os.scandir(uploads_dir) as entries:
+        for entry in entries:
+            # is_file() comes from the directory listing, so subdirectories
+            # such as .incoming/ cost no extra stat.
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            scanned.append(ScannedFile(entry.name, stat.st_size, stat.st_mtime_ns))
+    return scanned
 
 
-def ingest_uploads() -> list[int]:
-    settings = load_settings()
+def _scan_changes(
+    scanned: list[ScannedFile],
+    manifest: dict[str, tuple[int | None, int | None]],
+    settle_seconds: float = 0.0,
+) -> tuple[list[ScannedFile], int]:
+    changed: list[ScannedFile] = []
+    deferred = 0
+    settled_before = time.time_ns() - int(settle_seconds * 1e9)
+    for entry in scanned:
+        # Only files not already in the manifest with the same size/mtime are hashed.
+        if manifest.get(entry.name) == (entry.size, entry.mtime_ns):
+            continue
+        if settle_seconds and entry.mtime_ns > settled_before:
+            # Possibly still being written; left for a later scan.
+            deferred += 1
+            continue
+        changed.append(entry)
+    return changed, deferred
+
+
+def ingest_uploads(full_rescan: bool = False) -> list[int]:
+    return ingest_settled_uploads(full_rescan=full_rescan).upload_ids
+
+
+def ingest_settled_uploads(full_rescan: bool = False, settle_seconds: float = 0.0) -> IngestRun:
+    settings = get_settings()
     uploads_dir = settings.uploads_dir
     uploads_dir.mkdir(parents=True, exist_ok=True)
 
-    processed_ids: list[int] = []
+    scanned = _scan_folder(uploads_dir)
+    folder_names = json.dumps([entry.name for entry in scanned])
+    manifest = {}
+    if not full_rescan:
+        with get_connection() as connection:
+            manifest = {
+                row[0]: (row[1], row[2])
+                for row in connection.execute(MANIFEST_LOOKUP_SQL, (folder_names,))
+            }
+    hashes: dict[str, str] = {}
+    changed, deferred = _scan_changes(scanned, manifest, settle_seconds)
+    for entry in changed:
+        # Moved to processed/ or deleted since the scan.
+        try:
+            hashes[entry.name] = hash_image(uploads_dir / entry.name)
+        except FileNotFoundError:
+            continue
+    changed = [entry for entry in changed if entry.name in hashes]
+    if not changed:
+        return IngestRun([], deferred)
+
+    seen_at = datetime.now(tz=timezone.utc).isoformat()
     with get_connection() as connection:
-        existing_files = {
+        # Files processed out of the folder since the last change; done only
+        # in a run that writes anyway, so idle passes stay read-only.
+        connection.execute(MANIFEST_PRUNE_SQL, (folder_names,))
+        known = {
             row["filename"]
-            for row in connection.execute("SELECT filename FROM uploads")
+            for row in connection.execute(KNOWN_FILENAMES_SQL, (json.dumps(list(hashes)),))
         }
-
-        for file_path in sorted(uploads_dir.iterdir()):
-            if file_path.is_dir():
-                continue
-            if file_path.name in existing_files:
-                continue
-
-            entry_date = _parse_date_from_filename(file_path.name)
-            created_at = datetime.now(tz=timezone.utc).isoformat()
-            clinic_id = _default_clinic_id()
-            cursor = connection.execute(
+        new_files = sorted(
+            (entry for entry in changed if entry.name not in known),
+            key=lambda entry: entry.name,
+        )
+        if new_files:
+            clinic_id = _default_clinic_id(connection)
+            # Screenshots whose bytes are already registered (under any name)
+            # are recorded in the manifest but not queued again.
+            connection.executemany(
+                """
+                INSERT OR IGNORE INTO uploads (filename, clinic_id, entry_date, status,
+                                               created_at, content_hash)
+                VALUES (?, ?, ?, 'new', ?, ?)
+                """,
+                [
+                    (
+                        entry.name,
+                        clinic_id,
+                        _parse_date_from_filename(entry.name),
+                        seen_at,
+                        hashes[entry.name],
+                    )
+                    for entry in new_files
+                ],
+            )
+        connection.executemany(
+            MANIFEST_UPSERT_SQL,
+            [
+                {**entry._asdict(), "content_hash": hashes[entry.name], "seen_at": seen_at}
+                for entry in changed
+            ],
+        )
+        new_ids = [
+            int(row["id"])
+            for row in connection.execute(
                 """
-                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
-                VALUES (?, ?, ?, ?, ?)
+                SELECT id FROM uploads
+                WHERE created_at = ? AND filename IN (SELECT value FROM json_each(?))
+                ORDER BY id
                 """,
-                (file_path.name, clinic_id, entry_date, "new", created_at),
+                (seen_at, json.dumps([entry.name for entry in new_files])),
             )
-            processed_ids.append(int(cursor.lastrowid))
-            logger.info("Registered upload %s", file_path.name)
-    return processed_ids
+        ]
+
+    logger.info(
+        "Scanned %s changed files: %s registered, %s duplicates or already known",
+        len(changed),
+        len(new_ids),
+        len(changed) - len(new_ids),
+    )
+    return IngestRun(new_ids, deferred)
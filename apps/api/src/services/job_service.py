@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from apps.api.src.db.database import call_after_commit, get_connection
+from apps.api.src.utils.config import get_settings
+
+MAX_RETRY_DELAY_SECONDS = 15 * 60
+# Lower values are claimed first.
+DEFAULT_PRIORITY = 0
+BACKGROUND_PRIORITY = 10
+
+job_available = threading.Event()
+
+
+def _now() -> datetime:
+    return datetime.now(tz=timezone.utc)
+
+
+def _job_from_row(row: Any) -> dict[str, Any]:
+    return {**dict(row), "payload": json.loads(row["payload"])}
+
+
+def enqueue_job(
+    kind: str, payload: dict[str, Any], priority: int = DEFAULT_PRIORITY
+) -> int:
+    settings = get_settings()
+    now = _now().isoformat()
+    with get_connection() as connection:
+        cursor = connection.execute(
+            """
+            INSERT INTO jobs (
+                kind, payload, status, priority, attempts, max_attempts, run_after,
+                created_at, updated_at
+            ) VALUES (?, ?, 'queued', ?, 0, ?, ?, ?, ?)
+            """,
+            (kind, json.dumps(payload), priority, settings.job_max_attempts, now, now, now),
+        )
+        job_id = int(cursor.lastrowid)
+        # Workers woken before the row commits would find nothing to claim.
+        call_after_commit(job_available.set)
+    return job_id
+
+
+def get_job(job_id: int) -> dict[str, Any] | None:
+    with get_connection() as connection:
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_from_row(row) if row else None
+
+
+CLAIM_JOB_SQL = """
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1, updated_at = ?
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE status = 'queued' AND run_after <= ?
+        ORDER BY priority, run_after, id
+        LIMIT 1
+    )
+    RETURNING *
+"""
+
+
+def claim_next_job() -> dict[str, Any] | None:
+    now = _now().isoformat()
+    with get_connection() as connection:
+        row = connection.execute(CLAIM_JOB_SQL, (now, now)).fetchone()
+    return _job_from_row(row) if row else None
+
+
+def complete_job(job_id: int) -> None:
+    with get_connection() as connection:
+        connection.execute(
+            """
+            UPDATE jobs SET status = 'succeeded', last_error = NULL, updated_at = ?
+            WHERE id = ?
+            """,
+            (_now().isoformat(), job_id),
+        )
+
+
+def fail_job(job_id: int, error: str) -> None:
+    settings = get_settings()
+    now = _now()
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT attempts, max_attempts FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if not row:
+            return
+        attempts = int(row["attempts"])
+        if attempts >= int(row["max_attempts"]):
+            connection.execute(
+                """
+                UPDATE jobs SET status = 'failed', last_error = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (error, now.isoformat(), job_id),
+            )
+            return
+        delay = min(
+            settings.job_retry_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS
+        )
+        connection.execute(
+            """
+            UPDATE jobs SET status = 'queued', last_error = ?, run_after = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (error, (now + timedelta(seconds=delay)).isoformat(), now.isoformat(), job_id),
+        )
+
+
+def requeue_running_jobs() -> int:
+    now = _now().isoformat()
+    with get_connection() as connection:
+        cursor = connection.execute(
+            """
+            UPDATE jobs SET status = 'queued', run_after = ?, updated_at = ?
+            WHERE status = 'running'
+            """,
+            (now, now),
+        )
+        return int(cursor.rowcount)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+from apps.api.src.services.archive_service import archive_stored_upload
+from apps.api.src.services.job_service import (
+    claim_next_job,
+    complete_job,
+    fail_job,
+    job_available,
+    requeue_running_jobs,
+)
+from apps.api.src.services.preprocess_service import parse_box
+from apps.api.src.services.process_service import complete_upload_details, process_upload
+from apps.api.src.services.reparse_service import reparse_uploads
+from apps.api.src.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 1.0
+
+
+class JobError(RuntimeError):
+    pass
+
+
+def _handle_process_upload(payload: dict[str, Any]) -> None:
+    upload_id = int(payload["upload_id"])
+    if not process_upload(upload_id, force_ocr=bool(payload.get("force_ocr"))):
+        raise JobError(f"Processing failed for upload {upload_id}")
+
+
+def _handle_process_details(payload: dict[str, Any]) -> None:
+    totals_box = payload.get("totals_box")
+    complete_upload_details(
+        int(payload["upload_id"]),
+        force_ocr=bool(payload.get("force_ocr")),
+        totals_box=parse_box("totals_box", totals_box) if totals_box else None,
+    )
+
+
+def _handle_archive_upload(payload: dict[str, Any]) -> None:
+    archive_stored_upload(int(payload["upload_id"]), get_settings())
+
+
+def _handle_reparse_uploads(payload: dict[str, Any]) -> None:
+    summary = reparse_uploads()
+    logger.info("Reparsed %s uploads (%s failed)", summary.reparsed, summary.failed)
+
+
+JOB_HANDLERS: Dict[str, Callable[[dict[str, Any]], None]] = {
+    "process_upload": _handle_process_upload,
+    "process_details": _handle_process_details,
+    "archive_upload": _handle_archive_upload,
+    "reparse_uploads": _handle_reparse_uploads,
+}
+
+
+def run_next_job() -> bool:
+    job = claim_next_job()
+    if not job:
+        return False
+    handler = JOB_HANDLERS.get(job["kind"])
+    try:
+        if handler is None:
+            raise JobError(f"No handler for job kind {job['kind']}")
+        handler(job["payload"])
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+        fail_job(int(job["id"]), str(exc))
+    else:
+        complete_job(int(job["id"]))
+    return True
+
+
+class JobWorker:
+    def __init__(self, workers: int | None = None) -> None:
+        self.workers = workers or get_settings().job_workers
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        requeued = requeue_running_jobs()
+        if requeued:
+            logger.info("Requeued %s interrupted jobs", requeued)
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        job_available.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if run_next_job():
+                    continue
+            except Exception:
+                logger.exception("Job worker loop error")
+            job_available.wait(POLL_INTERVAL_SECONDS)
+            job_available.clear()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, AsyncIterator
+
+from apps.api.src.db.async_database import get_async_connection
+from apps.api.src.utils.pagination import decode_cursor, encode_cursor
+
+
+@dataclass(frozen=True)
+class ListingFilters:
+    clinic_id: int | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    week_start: date | None = None
+
+    def date_bounds(self) -> tuple[str | None, str | None]:
+        if self.week_start:
+            start = self.week_start - timedelta(days=self.week_start.weekday())
+            return start.isoformat(), (start + timedelta(days=7)).isoformat()
+        upper = self.date_to + timedelta(days=1) if self.date_to else None
+        return (
+            self.date_from.isoformat() if self.date_from else None,
+            upper.isoformat() if upper else None,
+        )
+
+
+def listing_filters(
+    clinic_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    week: date | None = None,
+) -> ListingFilters:
+    return ListingFilters(
+        clinic_id=clinic_id, date_from=date_from, date_to=date_to, week_start=week
+    )
+
+
+@dataclass
+class Page:
+    items: list[dict[str, Any]]
+    next_cursor: str | None
+
+
+def _keyset_conditions(
+    sort_expression: str,
+    id_column: str,
+    filters: ListingFilters,
+    after: str | None,
+    date_expression: str,
+) -> tuple[list[str], list[Any]]:
+    conditions: list[str] = []
+    params: list[Any] = []
+    if after:
+        sort_value, last_id = decode_cursor(after, 2)
+        # Spelled out instead of a row-value comparison so SQLite can seek the
+        # (sort, id) index rather than scan it.
+        conditions.append(
+            f"{sort_expression} <= ? AND ({sort_expression} < ? OR {id_column} < ?)"
+        )
+        params.extend([sort_value, sort_value, int(last_id)])
+    if filters.clinic_id is not None:
+        conditions.append("uploads.clinic_id = ?")
+        params.append(filters.clinic_id)
+    lower, upper = filters.date_bounds()
+    if lower:
+        conditions.append(f"{date_expression} >= ?")
+        params.append(lower)
+    if upper:
+        conditions.append(f"{date_expression} < ?")
+        params.append(upper)
+    return conditions, params
+
+
+def _where(conditions: list[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+DETAIL_SORT = "COALESCE(entry_details.entry_date, '')"
+
+
+def details_query(
+    filters: ListingFilters, after: str | None, limit: int
+) -> tuple[str, tuple[Any, ...]]:
+    conditions, params = _keyset_conditions(
+        DETAIL_SORT, "entry_details.id", filters, after, DETAIL_SORT
+    )
+    sql = f"""
+        SELECT entry_details.*, uploads.entry_date AS upload_date,
+               uploads.filename, clinics.name AS clinic_name
+        FROM entry_details
+        JOIN uploads ON uploads.id = entry_details.upload_id
+        LEFT JOIN clinics ON clinics.id = uploads.clinic_id
+        {_where(conditions)}
+        ORDER BY {DETAIL_SORT} DESC, entry_details.id DESC
+        LIMIT ?
+    """
+    return sql, (*params, limit + 1)
+
+
+async def details_page(filters: ListingFilters, after: str | None, limit: int) -> Page:
+    async with get_async_connection() as connection:
+        rows = await connection.execute_fetchall(*details_query(filters, after, limit))
+
+    items = []
+    for row in rows[:limit]:
+        entry_date = row["entry_date"] or row["upload_date"]
+        week_number = None
+        if entry_date:
+            week_number = date.fromisoformat(entry_date).isocalendar().week
+        items.append({**dict(row), "entry_date": entry_date, "week_number": week_number})
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["entry_date"] or "", last["id"])
+    return Page(items=items, next_cursor=next_cursor)
+
+
+def entries_query(
+    filters: ListingFilters, after: str | None, limit: int
+) -> tuple[str, tuple[Any, ...]]:
+    conditions, params = _keyset_conditions(
+        "uploads.created_at", "uploads.id", filters, after, "uploads.entry_date"
+    )
+    sql = f"""
+        SELECT id, filename, clinic_id, entry_date, status, created_at,
+               production_amount, collections_amount, error_reason
+        FROM uploads
+        {_where(conditions)}
+        ORDER BY uploads.created_at DESC, uploads.id DESC
+        LIMIT ?
+    """
+    return sql, (*params, limit + 1)
+
+
+async def entries_page(filters: ListingFilters, after: str | None, limit: int) -> Page:
+    async with get_async_connection() as connection:
+        rows = await connection.execute_fetchall(*entries_query(filters, after, limit))
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return Page(items=[dict(row) for row in rows[:limit]], next_cursor=next_cursor)
+
+
+async def iter_pages(
+    fetch_page, filters: ListingFilters, page: Page, page_size: int
+) -> AsyncIterator[dict[str, Any]]:
+    while True:
+        for item in page.items:
+            yield item
+        if not page.next_cursor:
+            return
+        page = await fetch_page(filters, page.next_cursor, page_size)
+
+
+async def iter_ndjson(items: AsyncIterator[dict[str, Any]]) -> AsyncIterator[str]:
+    async for item in items:
+        yield json.dumps(item, default=str) + "\n"
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+
+from apps.api.src.db.database import get_connection
+
+
+def get_cached_ocr(image_hash: str, engine_version: str) -> str | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            """
+            SELECT raw_text FROM ocr_cache
+            WHERE image_hash = ? AND engine_version = ?
+            """,
+            (image_hash, engine_version),
+        ).fetchone()
+    return row["raw_text"] if row else None
+
+
+def store_cached_ocr(
+    connection: sqlite3.Connection,
+    image_hash: str,
+    engine_version: str,
+    raw_text: str,
+) -> None:
+    connection.execute(
+        """
+        INSERT OR REPLACE INTO ocr_cache (image_hash, engine_version, raw_text, created_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        (
+            image_hash,
+            engine_version,
+            raw_text,
+            datetime.now(tz=timezone.utc).isoformat(),
+        ),
+    )
@@ -1,30 +1,383 @@
 from __future__ import annotations
 
+import hashlib
 import logging
+import re
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Dict, NamedTuple
 
 from PIL import Image
 
+from apps.api.src.services.preprocess_service import (
+    CropBox,
+    PreprocessConfig,
+    PreprocessResult,
+    preprocess_image,
+)
+from apps.api.src.utils.config import get_settings
+
 logger = logging.getLogger(__name__)
 
+OCR_CONFIG = ""
+OCR_LANG = "eng"
+LAYOUT_SCAN_WIDTH = 800
+DIGIT_WHITELIST = "0123456789$.,-"
+DIGITS_CONFIG = f"--psm 7 -c tessedit_char_whitelist={DIGIT_WHITELIST}"
+REOCR_SCALE = 3
+REOCR_PADDING = 4
+AMOUNT_SHAPE = re.compile(r"^\$|[.,]\w{2}$")
+MAX_MISREAD_LETTERS = 2
+TOTALS_KEYWORD = re.compile(r"^(production|prod\.?|collections?|coll\.?)[:\-]?$", re.I)
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 class OCRError(RuntimeError):
     pass
 
 
-def run_ocr(image_path: Path) -> str:
+def hash_image(image_path: Path) -> str:
+    digest = hashlib.sha256()
+    with image_path.open("rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRWord(NamedTuple):
+    text: str
+    confidence: float
+    left: int
+    top: int
+    width: int
+    height: int
+    line: int
+
+
+class OCRPage(NamedTuple):
+    text: str
+    words: list[OCRWord]
+    refined: int
+
+
+class OCRBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def version(self) -> str: ...
+
+    @abstractmethod
+    def image_to_string(self, image: Image.Image) -> str: ...
+
+    @abstractmethod
+    def image_to_data(self, image: Image.Image) -> list[OCRWord]: ...
+
+    @abstractmethod
+    def read_digits(self, image: Image.Image) -> tuple[str, float]: ...
+
+
+class PytesseractBackend(OCRBackend):
+    name = "tesseract"
+
+    def __init__(self) -> None:
+        try:
+            import pytesseract
+        except ImportError as exc:  # pragma: no cover - environment dependent
+            raise OCRError("pytesseract is not installed") from exc
+        self._pytesseract = pytesseract
+
+    def version(self) -> str:
+        try:
+            return str(self._pytesseract.get_tesseract_version())
+        except Exception:  # pragma: no cover - environment dependent
+            return "unknown"
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return self._pytesseract.image_to_string(image, config=OCR_CONFIG)
+
+    def _data(self, image: Image.Image, config: str) -> list[OCRWord]:
+        data = self._pytesseract.image_to_data(
+            image, config=config, output_type=self._pytesseract.Output.DICT
+        )
+        words = []
+        lines: dict[tuple[int, int, int], int] = {}
+        for index, text in enumerate(data["text"]):
+            if not text.strip():
+                continue
+            key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+            words.append(
+                OCRWord(
+                    text,
+                    float(data["conf"][index]),
+                    int(data["left"][index]),
+                    int(data["top"][index]),
+                    int(data["width"][index]),
+                    int(data["height"][index]),
+                    lines.setdefault(key, len(lines)),
+                )
+            )
+        return words
+
+    def image_to_data(self, image: Image.Image) -> list[OCRWord]:
+        return self._data(image, OCR_CONFIG)
+
+    def read_digits(self, image: Image.Image) -> tuple[str, float]:
+        words = self._data(image, DIGITS_CONFIG)
+        if not words:
+            return "", 0.0
+        return "".join(word.text for word in words), min(word.confidence for word in words)
+
+
+class TesserocrBackend(OCRBackend):
+    # One libtesseract handle stays loaded, so each image skips the process
+    # spawn, temp files and model load that pytesseract pays per call.
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG) -> None:
+        try:
+            import tesserocr
+        except ImportError as exc:
+            raise OCRError("tesserocr is not installed") from exc
+        try:
+            self._api = tesserocr.PyTessBaseAPI(lang=lang)
+        except RuntimeError as exc:  # pragma: no cover - environment dependent
+            raise OCRError(f"Could not initialise libtesseract: {exc}") from exc
+        self._version = tesserocr.tesseract_version().split()[1]
+        self._tesserocr = tesserocr
+        self._lang = lang
+        self._digits_api = None
+        weakref.finalize(self, self._api.End)
+
+    def version(self) -> str:
+        return self._version
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self._api.SetImage(image)
+        try:
+            return self._api.GetUTF8Text()
+        finally:
+            self._api.Clear()
+
+    def image_to_data(self, image: Image.Image) -> list[OCRWord]:
+        level = self._tesserocr.RIL.WORD
+        self._api.SetImage(image)
+        try:
+            self._api.Recognize()
+            words = []
+            line = -1
+            for word in self._tesserocr.iterate_level(self._api.GetIterator(), level):
+                if line < 0 or word.IsAtBeginningOf(self._tesserocr.RIL.TEXTLINE):
+                    line += 1
+                text = word.GetUTF8Text(level)
+                if not text or not text.strip():
+                    continue
+                left, top, right, bottom = word.BoundingBox(level)
+                words.append(
+                    OCRWord(
+                        text, word.Confidence(level), left, top, right - left, bottom - top, line
+                    )
+                )
+            return words
+        finally:
+            self._api.Clear()
+
+    def read_digits(self, image: Image.Image) -> tuple[str, float]:
+        if self._digits_api is None:
+            self._digits_api = self._tesserocr.PyTessBaseAPI(
+                lang=self._lang, psm=self._tesserocr.PSM.SINGLE_LINE
+            )
+            self._digits_api.SetVariable("tessedit_char_whitelist", DIGIT_WHITELIST)
+            weakref.finalize(self, self._digits_api.End)
+        self._digits_api.SetImage(image)
+        try:
+            return self._digits_api.GetUTF8Text().strip(), float(self._digits_api.MeanTextConf())
+        finally:
+            self._digits_api.Clear()
+
+
+OCR_BACKENDS: Dict[str, Callable[[], OCRBackend]] = {
+    "tesserocr": TesserocrBackend,
+    "pytesseract": PytesseractBackend,
+}
+
+_local = threading.local()
+
+
+def _create_backend(name: str) -> OCRBackend:
+    if name != "auto":
+        if name not in OCR_BACKENDS:
+            raise OCRError(f"Unknown OCR backend: {name}")
+        return OCR_BACKENDS[name]()
+    try:
+        return TesserocrBackend()
+    except OCRError as exc:
+        logger.debug("Falling back to pytesseract: %s", exc)
+        return PytesseractBackend()
+
+
+def get_ocr_backend() -> OCRBackend:
+    # libtesseract handles are not thread-safe, so each job thread and each
+    # OCR worker process keeps its own long-lived engine.
+    name = get_settings().ocr_backend
+    backends: dict[str, OCRBackend] | None = getattr(_local, "backends", None)
+    if backends is None:
+        backends = _local.backends = {}
+    backend = backends.get(name)
+    if backend is None:
+        backend = backends[name] = _create_backend(name)
+    return backend
+
+
+def ocr_engine_version() -> str:
+    return _engine_version(get_settings().ocr_backend)
+
+
+@lru_cache(maxsize=4)
+def _engine_version(backend_name: str) -> str:
     try:
-        import pytesseract
-    except ImportError as exc:  # pragma: no cover - environment dependent
-        raise OCRError("pytesseract is not installed") from exc
+        backend = get_ocr_backend()
+        version = f"{backend.name}-{backend.version()}"
+    except OCRError:  # pragma: no cover - environment dependent
+        version = "tesseract-unknown"
+    return f"{version}|{OCR_CONFIG}"
+
+
+def ocr_cache_version(crop_box: CropBox | None = None) -> str:
+    settings = get_settings()
+    preprocess = PreprocessConfig.from_settings(settings)
+    version = f"{ocr_engine_version()}|{preprocess.signature()}"
+    if settings.ocr_word_data:
+        version += f"|refine<{settings.ocr_min_confidence:g}"
+    if crop_box:
+        version += "|box=" + ",".join(f"{value:g}" for value in crop_box)
+    return version
+
+
+def _prepare(image_path: Path, crop_box: CropBox | None) -> PreprocessResult:
+    with Image.open(image_path) as image:
+        return preprocess_image(
+            image, PreprocessConfig.from_settings(get_settings()), crop_box
+        )
+
+
+def _log_timings(image_path: Path, prepared: PreprocessResult) -> None:
+    logger.info(
+        "OCR %s %sx%s: %s",
+        image_path.name,
+        *prepared.image.size,
+        " ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in prepared.timings.items()),
+    )
+
+
+def run_ocr(image_path: Path, crop_box: CropBox | None = None) -> str:
+    backend = get_ocr_backend()
 
     if not image_path.exists():
         raise OCRError(f"Image not found: {image_path}")
 
     try:
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image)
+        prepared = _prepare(image_path, crop_box)
+        started = time.perf_counter()
+        text = backend.image_to_string(prepared.image)
+        prepared.timings[backend.name] = time.perf_counter() - started
+        _log_timings(image_path, prepared)
         return text
     except Exception as exc:  # pragma: no cover - tesseract runtime
         logger.exception("OCR failed for %s", image_path)
         raise OCRError("OCR processing failed") from exc
+
+
+def words_to_text(words: list[OCRWord]) -> str:
+    lines: dict[int, list[str]] = {}
+    for word in words:
+        lines.setdefault(word.line, []).append(word.text)
+    return "\n".join(" ".join(texts) for _, texts in sorted(lines.items()))
+
+
+def looks_like_amount(text: str) -> bool:
+    # "$8,7G5.43" still counts (a misread digit is exactly what we want to
+    # fix); treatment codes, phone numbers and dates do not.
+    return (
+        any(char.isdigit() for char in text)
+        and sum(char.isalpha() for char in text) <= MAX_MISREAD_LETTERS
+        and AMOUNT_SHAPE.search(text) is not None
+    )
+
+
+def refine_numeric_words(
+    backend: OCRBackend, image: Image.Image, words: list[OCRWord], min_confidence: float
+) -> tuple[list[OCRWord], int]:
+    # Only shaky numeric tokens are re-read, each from its own small crop at
+    # higher resolution with a digit whitelist, so the page is OCR'd once.
+    refined = 0
+    result = []
+    for word in words:
+        if word.confidence < min_confidence and looks_like_amount(word.text):
+            crop = image.crop(
+                (
+                    max(0, word.left - REOCR_PADDING),
+                    max(0, word.top - REOCR_PADDING),
+                    min(image.width, word.left + word.width + REOCR_PADDING),
+                    min(image.height, word.top + word.height + REOCR_PADDING),
+                )
+            )
+            crop = crop.resize(
+                (crop.width * REOCR_SCALE, crop.height * REOCR_SCALE), Image.Resampling.LANCZOS
+            )
+            text, confidence = backend.read_digits(crop)
+            if text and confidence > word.confidence:
+                word = word._replace(text=text, confidence=confidence)
+                refined += 1
+        result.append(word)
+    return result, refined
+
+
+def run_ocr_words(image_path: Path, crop_box: CropBox | None = None) -> OCRPage:
+    backend = get_ocr_backend()
+
+    if not image_path.exists():
+        raise OCRError(f"Image not found: {image_path}")
+
+    try:
+        prepared = _prepare(image_path, crop_box)
+        started = time.perf_counter()
+        words = backend.image_to_data(prepared.image)
+        prepared.timings[backend.name] = time.perf_counter() - started
+        started = time.perf_counter()
+        words, refined = refine_numeric_words(
+            backend, prepared.image, words, get_settings().ocr_min_confidence
+        )
+        prepared.timings["refine"] = time.perf_counter() - started
+        _log_timings(image_path, prepared)
+        return OCRPage(words_to_text(words), words, refined)
+    except Exception as exc:  # pragma: no cover - tesseract runtime
+        logger.exception("OCR failed for %s", image_path)
+        raise OCRError("OCR processing failed") from exc
+
+
+def locate_totals_box(image_path: Path) -> CropBox | None:
+    # A coarse pass over a downscaled copy is enough to find which lines hold
+    # the Production/Collections labels; the caller then reads only that band
+    # at full resolution.
+    backend = get_ocr_backend()
+    try:
+        with Image.open(image_path) as image:
+            prepared = preprocess_image(
+                image, PreprocessConfig(target_width=LAYOUT_SCAN_WIDTH, autocrop=False)
+            )
+        words = backend.image_to_data(prepared.image)
+    except Exception as exc:  # pragma: no cover - tesseract runtime
+        raise OCRError("Layout analysis failed") from exc
+
+    labels = [word for word in words if TOTALS_KEYWORD.match(word.text.strip())]
+    if not labels:
+        return None
+    height = prepared.image.size[1]
+    line_height = max(word.height for word in labels)
+    top = min(word.top for word in labels) - line_height
+    bottom = max(word.top + word.height for word in labels) + line_height * 2
+    return (0.0, max(0.0, top / height), 1.0, min(1.0, bottom / height))
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import sqlite3
+import struct
+import zlib
+from datetime import datetime, timezone
+
+from apps.api.src.db.database import get_connection
+from apps.api.src.services.ocr_service import OCRWord
+
+# Columnar layout: a word count, then confidence (uint8), left/top/width/
+# height/line (uint16 each) for every word, then the texts joined by \x1f.
+# Roughly 11 bytes per word before compression.
+_HEADER = struct.Struct("<I")
+_SEPARATOR = "\x1f"
+_UINT16_MAX = 0xFFFF
+
+
+def _clamp(value: int) -> int:
+    return max(0, min(int(value), _UINT16_MAX))
+
+
+def encode_words(words: list[OCRWord]) -> bytes:
+    count = len(words)
+    numbers = struct.pack(
+        f"<{count}B{count * 5}H",
+        *(max(0, min(100, round(word.confidence))) for word in words),
+        *(
+            _clamp(value)
+            for word in words
+            for value in (word.left, word.top, word.width, word.height, word.line)
+        ),
+    )
+    texts = _SEPARATOR.join(word.text.replace(_SEPARATOR, " ") for word in words)
+    return zlib.compress(_HEADER.pack(count) + numbers + texts.encode("utf-8"))
+
+
+def decode_words(data: bytes) -> list[OCRWord]:
+    raw = zlib.decompress(data)
+    (count,) = _HEADER.unpack_from(raw)
+    if not count:
+        return []
+    numbers_format = f"<{count}B{count * 5}H"
+    numbers = struct.unpack_from(numbers_format, raw, _HEADER.size)
+    texts = raw[_HEADER.size + struct.calcsize(numbers_format) :].decode("utf-8").split(_SEPARATOR)
+    confidences, boxes = numbers[:count], numbers[count:]
+    return [
+        OCRWord(texts[index], float(confidences[index]), *boxes[index * 5 : index * 5 + 5])
+        for index in range(count)
+    ]
+
+
+def store_ocr_words(
+    connection: sqlite3.Connection, upload_id: int, words: list[OCRWord], refined: int
+) -> None:
+    connection.execute(
+        """
+        INSERT OR REPLACE INTO ocr_words (upload_id, word_count, refined_count, data, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (
+            upload_id,
+            len(words),
+            refined,
+            encode_words(words),
+            datetime.now(tz=timezone.utc).isoformat(),
+        ),
+    )
+
+
+def has_ocr_words(upload_id: int) -> bool:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT 1 FROM ocr_words WHERE upload_id = ?", (upload_id,)
+        ).fetchone()
+    return row is not None
+
+
+def get_ocr_words(upload_id: int) -> list[OCRWord] | None:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT data FROM ocr_words WHERE upload_id = ?", (upload_id,)
+        ).fetchone()
+    return decode_words(row["data"]) if row else None
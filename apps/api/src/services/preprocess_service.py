@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps, ImageStat
+
+from apps.api.src.utils.config import Settings, get_settings, load_clinics_config
+
+CropBox = Tuple[float, float, float, float]
+
+THRESHOLD_RADIUS = 12
+THRESHOLD_OFFSET = 12
+AUTOCROP_MARGIN = 16
+DARK_BACKGROUND_MEAN = 110
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    enabled: bool = True
+    target_width: int = 1240
+    threshold: bool = True
+    autocrop: bool = True
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PreprocessConfig":
+        return cls(
+            enabled=settings.ocr_preprocess,
+            target_width=settings.ocr_target_width,
+            threshold=settings.ocr_threshold,
+            autocrop=settings.ocr_autocrop,
+        )
+
+    def signature(self) -> str:
+        if not self.enabled:
+            return "raw"
+        return (
+            f"w{self.target_width}"
+            f"{'+thr' if self.threshold else ''}{'+crop' if self.autocrop else ''}"
+        )
+
+
+@dataclass
+class PreprocessResult:
+    image: Image.Image
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def _scaled_crop(image: Image.Image, crop_box: CropBox) -> Image.Image:
+    width, height = image.size
+    left, top, right, bottom = crop_box
+    return image.crop(
+        (int(left * width), int(top * height), int(right * width), int(bottom * height))
+    )
+
+
+def _resize(image: Image.Image, target_width: int) -> Image.Image:
+    width, height = image.size
+    # Screenshots arrive at 2-3x device density; text stays legible for
+    # Tesseract at ~1200px wide, and tiny crops get scaled up instead.
+    if width > target_width or width < target_width // 2:
+        scale = target_width / width
+        return image.resize(
+            (target_width, max(1, round(height * scale))), Image.Resampling.LANCZOS
+        )
+    return image
+
+
+def _adaptive_threshold(image: Image.Image) -> Image.Image:
+    local_mean = image.filter(ImageFilter.BoxBlur(THRESHOLD_RADIUS))
+    darker = ImageChops.subtract(local_mean, image)
+    ink = darker.point(lambda value: 255 if value > THRESHOLD_OFFSET else 0)
+    return ImageOps.invert(ink)
+
+
+def _autocrop(image: Image.Image) -> Image.Image:
+    bbox = ImageOps.invert(image).getbbox()
+    if not bbox:
+        return image
+    width, height = image.size
+    left, top, right, bottom = bbox
+    return image.crop(
+        (
+            max(0, left - AUTOCROP_MARGIN),
+            max(0, top - AUTOCROP_MARGIN),
+            min(width, right + AUTOCROP_MARGIN),
+            min(height, bottom + AUTOCROP_MARGIN),
+        )
+    )
+
+
+def preprocess_image(
+    image: Image.Image, config: PreprocessConfig, crop_box: Optional[CropBox] = None
+) -> PreprocessResult:
+    timings: dict[str, float] = {}
+
+    def stage(name: str, func, *args) -> Image.Image:
+        started = time.perf_counter()
+        result = func(*args)
+        timings[name] = time.perf_counter() - started
+        return result
+
+    image = stage("grayscale", ImageOps.grayscale, image)
+    if crop_box:
+        image = stage("clinic_crop", _scaled_crop, image, crop_box)
+    if not config.enabled:
+        return PreprocessResult(image, timings)
+
+    if ImageStat.Stat(image).mean[0] < DARK_BACKGROUND_MEAN:
+        image = stage("invert", ImageOps.invert, image)
+    image = stage("resize", _resize, image, config.target_width)
+    if config.threshold:
+        image = stage("threshold", _adaptive_threshold, image)
+        if config.autocrop:
+            image = stage("autocrop", _autocrop, image)
+    return PreprocessResult(image, timings)
+
+
+CLINIC_BOX_KEYS = ("crop_box", "totals_box")
+
+
+def parse_box(name: str, value: object) -> CropBox:
+    if (
+        not isinstance(value, (list, tuple))
+        or len(value) != 4
+        or not all(0 <= float(part) <= 1 for part in value)
+    ):
+        raise ValueError(f"{name} must be 4 fractions in [0, 1]")
+    return tuple(float(part) for part in value)
+
+
+@lru_cache(maxsize=8)
+def _clinic_boxes(config_path: Path, mtime: float) -> dict[tuple[str, str], CropBox]:
+    boxes: dict[tuple[str, str], CropBox] = {}
+    for clinic in load_clinics_config(config_path):
+        name = clinic.get("name")
+        if not name:
+            continue
+        for key in CLINIC_BOX_KEYS:
+            if clinic.get(key):
+                boxes[(name.lower(), key)] = parse_box(f"{key} for {name}", clinic[key])
+    return boxes
+
+
+def _clinic_box(clinic_name: str | None, key: str) -> Optional[CropBox]:
+    if not clinic_name:
+        return None
+    config_path = get_settings().clinics_config_path
+    if not config_path.exists():
+        return None
+    boxes = _clinic_boxes(config_path, config_path.stat().st_mtime)
+    return boxes.get((clinic_name.lower(), key))
+
+
+def clinic_crop_box(clinic_name: str | None) -> Optional[CropBox]:
+    return _clinic_box(clinic_name, "crop_box")
+
+
+def clinic_totals_box(clinic_name: str | None) -> Optional[CropBox]:
+    return _clinic_box(clinic_name, "totals_box")
@@ -1,215 +1,604 @@
 from __future__ import annotations
 
+import json
 import logging
-import shutil
+import multiprocessing
+import sqlite3
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator
 
 from apps.api.src.db.database import get_connection
-from apps.api.src.services.clinic_service import detect_clinic_id
-from apps.api.src.services.detail_service import parse_detail_lines
-from apps.api.src.services.ocr_service import OCRError, run_ocr
+from apps.api.src.services.clinic_service import detect_clinic_id, is_configured_clinic
+from apps.api.src.services.detail_service import iter_detail_rows, write_entry_details
+from apps.api.src.services.job_service import BACKGROUND_PRIORITY, enqueue_job
+from apps.api.src.services.ocr_cache_service import get_cached_ocr, store_cached_ocr
+from apps.api.src.services.ocr_service import (
+    OCRError,
+    OCRPage,
+    hash_image,
+    locate_totals_box,
+    ocr_cache_version,
+    run_ocr,
+    run_ocr_words,
+)
+from apps.api.src.services.ocr_words_service import has_ocr_words, store_ocr_words
+from apps.api.src.services.preprocess_service import (
+    CropBox,
+    clinic_crop_box,
+    clinic_totals_box,
+    parse_box,
+)
+from apps.api.src.services.rollup_service import apply_upload_delta, upload_contribution
 from apps.api.src.services.rules import get_parser
-from apps.api.src.utils.config import load_settings
+from apps.api.src.services.rules.base import ParseResult
+from apps.api.src.services.storage_service import (
+    record_storage_path,
+    shard_path,
+    store_file,
+    stored_file,
+)
+from apps.api.src.utils.config import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
 
-def process_new_uploads() -> list[int]:
-    settings = load_settings()
-    settings.processed_dir.mkdir(parents=True, exist_ok=True)
+@dataclass
+class PendingUpload:
+    upload_id: int
+    filename: str
+    clinic_id: int
+    clinic_name: str | None
+    entry_date: str | None
+    file_path: Path
+    crop_box: CropBox | None = None
+    image_hash: str | None = None
+    ocr_cached: bool = False
 
-    processed_ids: list[int] = []
+
+def _pending_from_row(row: sqlite3.Row, settings: Settings) -> PendingUpload:
+    return PendingUpload(
+        upload_id=int(row["id"]),
+        filename=row["filename"],
+        clinic_id=row["clinic_id"],
+        clinic_name=row["clinic_name"],
+        entry_date=row["entry_date"],
+        file_path=settings.uploads_dir / row["filename"],
+        crop_box=clinic_crop_box(row["clinic_name"]),
+        image_hash=row["content_hash"],
+    )
+
+
+PENDING_SELECT = """
+    SELECT uploads.id, uploads.filename, uploads.clinic_id, clinics.name as clinic_name,
+           uploads.entry_date, uploads.content_hash
+    FROM uploads
+    LEFT JOIN clinics ON clinics.id = uploads.clinic_id
+"""
+
+
+NEW_UPLOADS_SQL = f"{PENDING_SELECT} WHERE uploads.status = 'new' ORDER BY uploads.created_at"
+
+UNQUEUED_UPLOADS_SQL = """
+    SELECT uploads.id FROM uploads
+    WHERE uploads.status = 'new' AND uploads.created_at < ?
+      AND NOT EXISTS (
+          SELECT 1 FROM jobs
+          WHERE jobs.kind = 'process_upload'
+            AND jobs.status IN ('queued', 'running')
+            AND json_extract(jobs.payload, '$.upload_id') = uploads.id
+      )
+    ORDER BY uploads.created_at, uploads.id
+"""
+
+
+def process_new_uploads(force_ocr: bool = False) -> list[int]:
+    with get_connection() as connection:
+        rows = connection.execute(NEW_UPLOADS_SQL).fetchall()
+    return _process_rows(rows, force_ocr)
+
+
+def process_uploads(
+    upload_ids: list[int], force_ocr: bool = False, pool: OCRPool | None = None
+) -> list[int]:
     with get_connection() as connection:
         rows = connection.execute(
-            """
-            SELECT uploads.id, uploads.filename, uploads.clinic_id, clinics.name as clinic_name,
-                   uploads.entry_date
-            FROM uploads
-            LEFT JOIN clinics ON clinics.id = uploads.clinic_id
-            WHERE uploads.status = 'new'
-            ORDER BY uploads.created_at
-            """
+            f"""
+            {PENDING_SELECT}
+            WHERE uploads.id IN (SELECT value FROM json_each(?)) AND uploads.status = 'new'
+            ORDER BY uploads.id
+            """,
+            (json.dumps(upload_ids),),
         ).fetchall()
+    return _process_rows(rows, force_ocr, pool)
+
+
+def unqueued_upload_ids(registered_before: str) -> list[int]:
+    # 'new' uploads that no process_upload job will pick up, e.g. left behind
+    # when the watcher stopped or crashed between registering and processing.
+    with get_connection() as connection:
+        rows = connection.execute(UNQUEUED_UPLOADS_SQL, (registered_before,)).fetchall()
+    return [int(row["id"]) for row in rows]
+
+
+def _process_rows(
+    rows: list[sqlite3.Row], force_ocr: bool, pool: OCRPool | None = None
+) -> list[int]:
+    settings = get_settings()
+    settings.processed_dir.mkdir(parents=True, exist_ok=True)
+    pending = [_pending_from_row(row, settings) for row in rows]
+
+    processed_ids: list[int] = []
+    for upload, outcome in _run_ocr_stage(pending, settings, force_ocr, pool):
+        if _write_result(upload, outcome, settings):
+            processed_ids.append(upload.upload_id)
+    return processed_ids
+
+
+def process_upload(upload_id: int, force_ocr: bool = False) -> bool:
+    settings = get_settings()
+    settings.processed_dir.mkdir(parents=True, exist_ok=True)
+
+    with get_connection() as connection:
+        row = _upload_row(connection, upload_id)
+
+    if not row:
+        return False
+    if row["status"] == "processed":
+        return True
+
+    pending = _pending_from_row(row, settings)
+    if settings.ocr_fast_totals and _apply_fast_totals(pending, row["totals_box"], force_ocr):
+        return True
+    upload, outcome = next(_run_ocr_stage([pending], settings, force_ocr))
+    return _write_result(upload, outcome, settings)
+
+
+def _upload_row(connection: sqlite3.Connection, upload_id: int) -> sqlite3.Row | None:
+    return connection.execute(
+        """
+        SELECT uploads.id, uploads.filename, uploads.clinic_id, clinics.name as clinic_name,
+               uploads.entry_date, uploads.status, uploads.raw_ocr_text, clinics.totals_box,
+               uploads.content_hash, uploads.storage_path, uploads.archive_path
+        FROM uploads
+        LEFT JOIN clinics ON clinics.id = uploads.clinic_id
+        WHERE uploads.id = ?
+        """,
+        (upload_id,),
+    ).fetchone()
+
+
+def _totals_boxes(
+    upload: PendingUpload, learned_box: str | None
+) -> Iterator[tuple[CropBox, bool]]:
+    configured = clinic_totals_box(upload.clinic_name)
+    if configured:
+        yield configured, False
+        return
+    if learned_box:
+        yield parse_box("clinics.totals_box", json.loads(learned_box)), False
+    located = locate_totals_box(upload.file_path)
+    if located:
+        yield located, True
+
+
+def _apply_fast_totals(
+    upload: PendingUpload, learned_box: str | None, force_ocr: bool
+) -> bool:
+    # Rollups only need the two totals, so read just the band that holds
+    # them now and leave the full page (details, clinic detection) to a
+    # background job.
+    if not upload.file_path.exists():
+        return False
+    try:
+        if _lookup_cached_text(upload, force_ocr) is not None:
+            return False
+        parser = get_parser(upload.clinic_name)
+        for box, located in _totals_boxes(upload, learned_box):
+            parsed = parser.parse(run_ocr(upload.file_path, box))
+            if parsed.production_amount is None or parsed.collections_amount is None:
+                continue
+            payload = {"upload_id": upload.upload_id, "force_ocr": force_ocr}
+            with get_connection() as connection:
+                apply_ocr_totals(connection, upload.upload_id, parsed)
+                # A located band is only learned for a clinic that is known to
+                # be right; otherwise (e.g. "Unassigned") it waits for the
+                # clinic detected on the full page.
+                if located and is_configured_clinic(upload.clinic_name):
+                    _learn_totals_box(connection, upload.clinic_id, box)
+                elif located:
+                    payload["totals_box"] = list(box)
+            enqueue_job("process_details", payload, priority=BACKGROUND_PRIORITY)
+            logger.info("Read totals for %s from region %s", upload.filename, box)
+            return True
+    except Exception:
+        logger.exception("Totals fast path failed for %s", upload.filename)
+    return False
+
+
+def _learn_totals_box(connection: sqlite3.Connection, clinic_id: int, box: CropBox) -> None:
+    connection.execute(
+        "UPDATE clinics SET totals_box = ? WHERE id = ?", (json.dumps(box), clinic_id)
+    )
+
+
+def apply_ocr_totals(
+    connection: sqlite3.Connection, upload_id: int, parsed: ParseResult
+) -> None:
+    before = upload_contribution(connection, upload_id)
+    connection.execute(
+        """
+        UPDATE uploads
+        SET production_amount = ?, collections_amount = ?,
+            status = 'processed', error_reason = NULL
+        WHERE id = ?
+        """,
+        (parsed.production_amount, parsed.collections_amount, upload_id),
+    )
+    apply_upload_delta(connection, before, upload_contribution(connection, upload_id))
+
+
+def complete_upload_details(
+    upload_id: int, force_ocr: bool = False, totals_box: CropBox | None = None
+) -> None:
+    settings = get_settings()
+    with get_connection() as connection:
+        row = _upload_row(connection, upload_id)
+        if not row or row["status"] != "processed" or row["raw_ocr_text"] is not None:
+            return
+        file_path = _stored_file(row, settings)
+        crop_box = clinic_crop_box(row["clinic_name"])
+        raw_text = _full_page_text(
+            connection, upload_id, file_path, crop_box, force_ocr, row["content_hash"]
+        )
+        detected_clinic_id = apply_ocr_text(
+            connection,
+            upload_id,
+            raw_text,
+            row["clinic_id"],
+            row["clinic_name"],
+            row["entry_date"],
+        )
+        if totals_box and detected_clinic_id:
+            _learn_totals_box(connection, detected_clinic_id, totals_box)
+    _move_processed(upload_id, file_path, row["content_hash"], settings)
+
+
+def _lookup_cached_text(upload: PendingUpload, force_ocr: bool) -> str | None:
+    if not upload.file_path.exists():
+        return None
+    if upload.image_hash is None:
+        upload.image_hash = hash_image(upload.file_path)
+    if force_ocr or _needs_word_data(upload.upload_id):
+        return None
+    cached = get_cached_ocr(upload.image_hash, ocr_cache_version(upload.crop_box))
+    upload.ocr_cached = cached is not None
+    return cached
+
+
+def _needs_word_data(upload_id: int) -> bool:
+    # Word data is stored per upload, not in the OCR cache, so a cached text
+    # cannot supply it.
+    return get_settings().ocr_word_data and not has_ocr_words(upload_id)
 
-        for row in rows:
-            upload_id = row["id"]
-            filename = row["filename"]
-            clinic_id = row["clinic_id"]
-            clinic_name = row["clinic_name"]
-            entry_date = row["entry_date"]
-            file_path = settings.uploads_dir / filename
+
+def read_full_page(file_path: Path, crop_box: CropBox | None) -> str | OCRPage:
+    if get_settings().ocr_word_data:
+        return run_ocr_words(file_path, crop_box)
+    return run_ocr(file_path, crop_box)
+
+
+def _store_page(
+    connection: sqlite3.Connection, upload_id: int, outcome: str | OCRPage
+) -> str:
+    if isinstance(outcome, OCRPage):
+        store_ocr_words(connection, upload_id, outcome.words, outcome.refined)
+        return outcome.text
+    return outcome
+
+
+# Workers start from a fresh interpreter: the parent may be running watchdog
+# or job threads, which a forked child would inherit in an undefined state.
+OCR_POOL_START_METHOD = "spawn"
+
+
+class OCRPool:
+    # Worker processes for full-page OCR. Each keeps its OCR engine loaded, so
+    # long-running callers (the watcher) hold one pool across batches. One
+    # dead worker (e.g. a native crash in the engine) breaks the whole
+    # executor, so it is replaced on demand.
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def submit(self, upload: PendingUpload) -> Future[str | OCRPage]:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(OCR_POOL_START_METHOD),
+            )
+        return self._executor.submit(read_full_page, upload.file_path, upload.crop_box)
+
+    def restart(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def _submit_ocr(
+    pool: OCRPool, upload: PendingUpload, force_ocr: bool
+) -> Future[str | OCRPage]:
+    try:
+        cached = _lookup_cached_text(upload, force_ocr)
+        if cached is None:
+            return pool.submit(upload)
+    except Exception as exc:
+        failed: Future[str | OCRPage] = Future()
+        failed.set_exception(exc)
+        return failed
+    future: Future[str | OCRPage] = Future()
+    future.set_result(cached)
+    return future
+
+
+def _future_outcome(future: Future[str | OCRPage]) -> str | OCRPage | Exception:
+    try:
+        return future.result()
+    except Exception as exc:
+        return exc
+
+
+def _isolated_ocr(pool: OCRPool, upload: PendingUpload) -> str | OCRPage | Exception:
+    # Nothing else is in flight, so a worker that dies now died on this upload.
+    outcome = _future_outcome(pool.submit(upload))
+    if isinstance(outcome, BrokenProcessPool):
+        pool.restart()
+        return OCRError("OCR worker crashed")
+    return outcome
+
+
+def _fill_window(
+    pool: OCRPool,
+    queue: Iterator[PendingUpload],
+    in_flight: deque[tuple[PendingUpload, Future[str | OCRPage]]],
+    window: int,
+    force_ocr: bool,
+) -> None:
+    while len(in_flight) < window:
+        upload = next(queue, None)
+        if upload is None:
+            return
+        in_flight.append((upload, _submit_ocr(pool, upload, force_ocr)))
+
+
+def _run_ocr_stage(
+    pending: list[PendingUpload],
+    settings: Settings,
+    force_ocr: bool,
+    pool: OCRPool | None = None,
+) -> Iterator[tuple[PendingUpload, str | OCRPage | Exception]]:
+    workers = pool.workers if pool else min(settings.ocr_workers, len(pending))
+    if workers <= 1:
+        for upload in pending:
             try:
-                raw_text = run_ocr(file_path)
-                detected_clinic_id = detect_clinic_id(raw_text)
-                if detected_clinic_id:
-                    clinic_id = detected_clinic_id
-                    clinic_name_row = connection.execute(
-                        "SELECT name FROM clinics WHERE id = ?",
-                        (clinic_id,),
-                    ).fetchone()
-                    clinic_name = clinic_name_row["name"] if clinic_name_row else None
-                parser = get_parser(clinic_name)
-                parsed = parser.parse(raw_text)
-                parsed_details = parse_detail_lines(
-                    raw_text,
-                    datetime.fromisoformat(entry_date).date() if entry_date else None,
+                cached = _lookup_cached_text(upload, force_ocr)
+                yield upload, (
+                    cached
+                    if cached is not None
+                    else read_full_page(upload.file_path, upload.crop_box)
                 )
+            except Exception as exc:
+                yield upload, exc
+        return
 
-                connection.execute(
-                    """
-                    UPDATE uploads
-                    SET raw_ocr_text = ?, production_amount = ?, collections_amount = ?,
-                        status = 'processed', error_reason = NULL, clinic_id = ?
-                    WHERE id = ?
-                    """,
-                    (
-                        raw_text,
-                        parsed.production_amount,
-                        parsed.collections_amount,
-                        clinic_id,
-                        upload_id,
-                    ),
-                )
-                connection.execute(
-                    "DELETE FROM entry_details WHERE upload_id = ?",
-                    (upload_id,),
-                )
-                created_at = datetime.now(tz=timezone.utc).isoformat()
-                for detail in parsed_details:
-                    connection.execute(
-                        """
-                        INSERT INTO entry_details (
-                            upload_id, entry_date, patient_name, tooth_number, treatment_code,
-                            description, charges, payments, phone_number, raw_line, created_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            upload_id,
-                            detail["entry_date"].isoformat()
-                            if detail["entry_date"]
-                            else None,
-                            detail["patient_name"],
-                            detail["tooth_number"],
-                            detail["treatment_code"],
-                            detail["description"],
-                            detail["charges"],
-                            detail["payments"],
-                            detail["phone_number"],
-                            detail["raw_line"],
-                            created_at,
-                        ),
-                    )
-                _move_processed(file_path, settings.processed_dir)
-                processed_ids.append(int(upload_id))
-                logger.info("Processed upload %s", filename)
-            except (OCRError, Exception) as exc:
-                logger.exception("Failed to process %s", filename)
-                connection.execute(
-                    "UPDATE uploads SET status = 'failed', error_reason = ? WHERE id = ?",
-                    (str(exc), upload_id),
+    # Keep a bounded window of in-flight images so a large backlog does not
+    # hold every OCR result in memory before the writer catches up.
+    window = workers * 2
+    queue = iter(pending)
+    in_flight: deque[tuple[PendingUpload, Future[str | OCRPage]]] = deque()
+    owned = pool is None
+    pool = pool or OCRPool(workers)
+    try:
+        _fill_window(pool, queue, in_flight, window, force_ocr)
+        while in_flight:
+            upload, future = in_flight.popleft()
+            outcome = _future_outcome(future)
+            if not isinstance(outcome, BrokenProcessPool):
+                _fill_window(pool, queue, in_flight, window, force_ocr)
+                yield upload, outcome
+                continue
+            # Every unfinished future died with the pool. Rerun those uploads
+            # one at a time so only the one that crashes a worker fails.
+            logger.error("OCR worker crashed; retrying in-flight uploads one at a time")
+            pool.restart()
+            stranded = [(upload, future), *in_flight]
+            in_flight.clear()
+            for upload, future in stranded:
+                outcome = _future_outcome(future)
+                if isinstance(outcome, BrokenProcessPool):
+                    outcome = _isolated_ocr(pool, upload)
+                yield upload, outcome
+            _fill_window(pool, queue, in_flight, window, force_ocr)
+    finally:
+        if owned:
+            pool.shutdown()
+
+
+def _write_result(
+    upload: PendingUpload, outcome: str | OCRPage | Exception, settings: Settings
+) -> bool:
+    try:
+        if isinstance(outcome, Exception):
+            raise outcome
+        with get_connection() as connection:
+            raw_text = _store_page(connection, upload.upload_id, outcome)
+            apply_ocr_text(
+                connection,
+                upload.upload_id,
+                raw_text,
+                upload.clinic_id,
+                upload.clinic_name,
+                upload.entry_date,
+            )
+            if upload.image_hash and not upload.ocr_cached:
+                store_cached_ocr(
+                    connection,
+                    upload.image_hash,
+                    ocr_cache_version(upload.crop_box),
+                    raw_text,
                 )
-    return processed_ids
+        _move_processed(upload.upload_id, upload.file_path, upload.image_hash, settings)
+        logger.info("Processed upload %s", upload.filename)
+        return True
+    except (OCRError, Exception) as exc:
+        logger.exception("Failed to process %s", upload.filename)
+        with get_connection() as connection:
+            mark_upload_failed(connection, upload.upload_id, str(exc))
+        return False
 
 
-def _move_processed(file_path: Path, processed_dir: Path) -> None:
-    if file_path.exists():
-        destination = processed_dir / file_path.name
-        shutil.move(str(file_path), str(destination))
+def mark_upload_failed(
+    connection: sqlite3.Connection, upload_id: int, reason: str
+) -> None:
+    before = upload_contribution(connection, upload_id)
+    connection.execute(
+        "UPDATE uploads SET status = 'failed', error_reason = ? WHERE id = ?",
+        (reason, upload_id),
+    )
+    apply_upload_delta(connection, before, upload_contribution(connection, upload_id))
 
 
-def reprocess_upload(upload_id: int) -> bool:
-    settings = load_settings()
-    with get_connection() as connection:
-        row = connection.execute(
-            """
-            SELECT uploads.id, uploads.filename, uploads.clinic_id, clinics.name as clinic_name,
-                   uploads.entry_date
-            FROM uploads
-            LEFT JOIN clinics ON clinics.id = uploads.clinic_id
-            WHERE uploads.id = ?
-            """,
-            (upload_id,),
+def apply_ocr_text(
+    connection: sqlite3.Connection,
+    upload_id: int,
+    raw_text: str,
+    clinic_id: int,
+    clinic_name: str | None,
+    entry_date: str | None,
+) -> int | None:
+    before = upload_contribution(connection, upload_id)
+    detected_clinic_id = detect_clinic_id(raw_text)
+    if detected_clinic_id:
+        clinic_id = detected_clinic_id
+        clinic_name_row = connection.execute(
+            "SELECT name FROM clinics WHERE id = ?",
+            (clinic_id,),
         ).fetchone()
+        clinic_name = clinic_name_row["name"] if clinic_name_row else None
+    parser = get_parser(clinic_name)
+    parsed = parser.parse(raw_text)
+
+    connection.execute(
+        """
+        UPDATE uploads
+        SET raw_ocr_text = ?, production_amount = ?, collections_amount = ?,
+            status = 'processed', error_reason = NULL, clinic_id = ?
+        WHERE id = ?
+        """,
+        (
+            raw_text,
+            parsed.production_amount,
+            parsed.collections_amount,
+            clinic_id,
+            upload_id,
+        ),
+    )
+    apply_upload_delta(connection, before, upload_contribution(connection, upload_id))
+    write_entry_details(
+        connection,
+        upload_id,
+        iter_detail_rows(
+            upload_id,
+            raw_text,
+            datetime.fromisoformat(entry_date).date() if entry_date else None,
+            datetime.now(tz=timezone.utc).isoformat(),
+        ),
+    )
+    return detected_clinic_id
+
+
+def _move_processed(
+    upload_id: int, file_path: Path, content_hash: str | None, settings: Settings
+) -> None:
+    # Only files still in uploads/ move; stored and archived copies stay put.
+    if not file_path.exists() or not file_path.is_relative_to(settings.uploads_dir):
+        return
+    content_hash = content_hash or hash_image(file_path)
+    relative = shard_path(content_hash, file_path.suffix)
+    # Recorded first: until the rename lands, stored_file() still finds the
+    # original in uploads/.
+    with get_connection() as connection:
+        record_storage_path(connection, upload_id, relative)
+    store_file(file_path, content_hash, settings.processed_dir)
+    if settings.archive_originals:
+        # The lossless encode is slow; keep it off the writer thread.
+        enqueue_job("archive_upload", {"upload_id": upload_id}, priority=BACKGROUND_PRIORITY)
+
+
+def _stored_file(row: sqlite3.Row, settings: Settings) -> Path:
+    return stored_file(
+        row["filename"], row["storage_path"], row["content_hash"], settings, row["archive_path"]
+    )
+
+
+def _full_page_text(
+    connection: sqlite3.Connection,
+    upload_id: int,
+    file_path: Path,
+    crop_box: CropBox | None,
+    force_ocr: bool,
+    image_hash: str | None = None,
+) -> str:
+    cache_version = ocr_cache_version(crop_box)
+    # The upload's own hash keys the cache even when reading the archive copy.
+    if image_hash is None and file_path.exists():
+        image_hash = hash_image(file_path)
+    raw_text = None
+    if image_hash and not force_ocr and not _needs_word_data(upload_id):
+        raw_text = get_cached_ocr(image_hash, cache_version)
+    if raw_text is None:
+        raw_text = _store_page(connection, upload_id, read_full_page(file_path, crop_box))
+        if image_hash:
+            store_cached_ocr(connection, image_hash, cache_version, raw_text)
+    return raw_text
+
+
+def reprocess_upload(upload_id: int, force_ocr: bool = False) -> bool:
+    settings = get_settings()
+    with get_connection() as connection:
+        row = _upload_row(connection, upload_id)
 
         if not row:
             return False
 
         filename = row["filename"]
-        clinic_id = row["clinic_id"]
-        clinic_name = row["clinic_name"]
-        entry_date = row["entry_date"]
-        file_path = settings.processed_dir / filename
-        if not file_path.exists():
-            file_path = settings.uploads_dir / filename
+        file_path = _stored_file(row, settings)
 
         try:
-            raw_text = run_ocr(file_path)
-            detected_clinic_id = detect_clinic_id(raw_text)
-            if detected_clinic_id:
-                clinic_id = detected_clinic_id
-                clinic_name_row = connection.execute(
-                    "SELECT name FROM clinics WHERE id = ?",
-                    (clinic_id,),
-                ).fetchone()
-                clinic_name = clinic_name_row["name"] if clinic_name_row else None
-            parser = get_parser(clinic_name)
-            parsed = parser.parse(raw_text)
-            parsed_details = parse_detail_lines(
-                raw_text,
-                datetime.fromisoformat(entry_date).date() if entry_date else None,
-            )
-            connection.execute(
-                """
-                UPDATE uploads
-                SET raw_ocr_text = ?, production_amount = ?, collections_amount = ?,
-                    status = 'processed', error_reason = NULL, clinic_id = ?
-                WHERE id = ?
-                """,
-                (
-                    raw_text,
-                    parsed.production_amount,
-                    parsed.collections_amount,
-                    clinic_id,
-                    upload_id,
-                ),
+            crop_box = clinic_crop_box(row["clinic_name"])
+            raw_text = _full_page_text(
+                connection, upload_id, file_path, crop_box, force_ocr, row["content_hash"]
             )
-            connection.execute(
-                "DELETE FROM entry_details WHERE upload_id = ?",
-                (upload_id,),
+            apply_ocr_text(
+                connection,
+                upload_id,
+                raw_text,
+                row["clinic_id"],
+                row["clinic_name"],
+                row["entry_date"],
             )
-            created_at = datetime.now(tz=timezone.utc).isoformat()
-            for detail in parsed_details:
-                connection.execute(
-                    """
-                    INSERT INTO entry_details (
-                        upload_id, entry_date, patient_name, tooth_number, treatment_code,
-                        description, charges, payments, phone_number, raw_line, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        upload_id,
-                        detail["entry_date"].isoformat()
-                        if detail["entry_date"]
-                        else None,
-                        detail["patient_name"],
-                        detail["tooth_number"],
-                        detail["treatment_code"],
-                        detail["description"],
-                        detail["charges"],
-                        detail["payments"],
-                        detail["phone_number"],
-                        detail["raw_line"],
-                        created_at,
-                    ),
-                )
-            if file_path.parent != settings.processed_dir:
-                _move_processed(file_path, settings.processed_dir)
+            _move_processed(upload_id, file_path, row["content_hash"], settings)
             return True
         except (OCRError, Exception) as exc:
             logger.exception("Failed to reprocess %s", filename)
-            connection.execute(
-                "UPDATE uploads SET status = 'failed', error_reason = ? WHERE id = ?",
-                (str(exc), upload_id),
-            )
+            mark_upload_failed(connection, upload_id, str(exc))
             return False
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from dataclasses import dataclass
+
+from apps.api.src.db.database import get_connection
+from apps.api.src.services.batch_parse_service import (
+    UploadText,
+    parse_upload_batch,
+    write_parsed_batch,
+)
+from apps.api.src.services.process_service import apply_ocr_text
+
+logger = logging.getLogger(__name__)
+
+REPARSE_BATCH_SIZE = 500
+
+
+@dataclass
+class ReparseSummary:
+    reparsed: int = 0
+    failed: int = 0
+
+
+def reparse_uploads(batch_size: int = REPARSE_BATCH_SIZE) -> ReparseSummary:
+    summary = ReparseSummary()
+    clinic_names: dict[int, str] | None = None
+    last_id = 0
+    while True:
+        with get_connection() as connection:
+            rows = connection.execute(
+                """
+                SELECT uploads.id, uploads.clinic_id, clinics.name AS clinic_name,
+                       uploads.entry_date, uploads.raw_ocr_text
+                FROM uploads
+                LEFT JOIN clinics ON clinics.id = uploads.clinic_id
+                WHERE uploads.id > ? AND uploads.raw_ocr_text IS NOT NULL
+                ORDER BY uploads.id
+                LIMIT ?
+                """,
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+
+            if clinic_names is None:
+                clinic_names = dict(connection.execute("SELECT id, name FROM clinics"))
+            _reparse_batch(connection, rows, clinic_names, summary)
+        last_id = int(rows[-1]["id"])
+        logger.info("Reparsed uploads through id %s", last_id)
+    return summary
+
+
+def _reparse_batch(
+    connection: sqlite3.Connection,
+    rows: list[sqlite3.Row],
+    clinic_names: dict[int, str],
+    summary: ReparseSummary,
+) -> None:
+    batch = parse_upload_batch(
+        [
+            UploadText(
+                int(row["id"]),
+                row["clinic_id"],
+                row["clinic_name"],
+                row["entry_date"],
+                row["raw_ocr_text"],
+            )
+            for row in rows
+        ],
+        clinic_names,
+    )
+    summary.failed += len(batch.failures)
+    connection.execute("BEGIN")
+    try:
+        write_parsed_batch(connection, batch)
+    except Exception:
+        logger.exception("Batch write failed; reparsing uploads one at a time")
+        connection.rollback()
+    else:
+        connection.commit()
+        summary.reparsed += len(batch.upload_ids)
+        return
+
+    # One transaction for the fallback too; savepoints keep a bad upload
+    # from discarding the rest of the batch.
+    connection.execute("BEGIN")
+    for row in rows:
+        if int(row["id"]) in batch.failures:
+            continue
+        connection.execute("SAVEPOINT reparse_upload")
+        try:
+            apply_ocr_text(
+                connection,
+                int(row["id"]),
+                row["raw_ocr_text"],
+                row["clinic_id"],
+                row["clinic_name"],
+                row["entry_date"],
+            )
+        except Exception:
+            logger.exception("Failed to reparse upload %s", row["id"])
+            connection.execute("ROLLBACK TO reparse_upload")
+            summary.failed += 1
+        else:
+            summary.reparsed += 1
+        connection.execute("RELEASE reparse_upload")
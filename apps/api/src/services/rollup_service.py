@@ -1,32 +1,39 @@
 from __future__ import annotations
 
+import json
 import logging
+import sqlite3
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Sequence
 
 from apps.api.src.db.database import get_connection
-from apps.api.src.utils.config import load_settings
+from apps.api.src.services.dashboard_service import invalidate_dashboard
+from apps.api.src.utils.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+WEEK_ENTRIES_SQL = """
+    SELECT uploads.clinic_id, clinics.pay_percentage,
+           COALESCE(uploads.production_amount, 0) AS production_amount,
+           COALESCE(uploads.collections_amount, 0) AS collections_amount
+    FROM uploads
+    JOIN clinics ON clinics.id = uploads.clinic_id
+    WHERE uploads.status = 'processed'
+      AND uploads.entry_date >= ?
+      AND uploads.entry_date < ?
+"""
+
+
 def generate_weekly_rollups(week_start: date) -> list[int]:
     week_end = week_start + timedelta(days=7)
     created_at = datetime.now(tz=timezone.utc).isoformat()
-    settings = load_settings()
+    settings = get_settings()
 
     with get_connection() as connection:
         entries = connection.execute(
-            """
-            SELECT uploads.clinic_id, clinics.pay_percentage,
-                   COALESCE(uploads.production_amount, 0) AS production_amount,
-                   COALESCE(uploads.collections_amount, 0) AS collections_amount
-            FROM uploads
-            JOIN clinics ON clinics.id = uploads.clinic_id
-            WHERE uploads.status = 'processed'
-              AND uploads.entry_date >= ?
-              AND uploads.entry_date < ?
-            """,
-            (week_start.isoformat(), week_end.isoformat()),
+            WEEK_ENTRIES_SQL, (week_start.isoformat(), week_end.isoformat())
         ).fetchall()
 
         totals_by_clinic: dict[int, dict[str, float]] = {}
@@ -38,22 +45,26 @@ def generate_weekly_rollups(week_start: date) -> list[int]:
                     "production": 0.0,
                     "collections": 0.0,
                     "pay_percentage": float(entry["pay_percentage"]),
+                    "count": 0,
                 },
             )
             totals["production"] += float(entry["production_amount"])
             totals["collections"] += float(entry["collections_amount"])
+            totals["count"] += 1
 
         rollup_ids: list[int] = []
         overall_production = 0.0
         overall_collections = 0.0
+        overall_count = 0
 
         for clinic_id, totals in totals_by_clinic.items():
             estimated_pay = totals["collections"] * totals["pay_percentage"]
             cursor = connection.execute(
                 """
                 INSERT INTO rollups (
-                    week_start, clinic_id, total_production, total_collections, estimated_pay, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?)
+                    week_start, clinic_id, total_production, total_collections, estimated_pay,
+                    upload_count, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     week_start.isoformat(),
@@ -61,30 +72,35 @@ def generate_weekly_rollups(week_start: date) -> list[int]:
                     totals["production"],
                     totals["collections"],
                     estimated_pay,
+                    int(totals["count"]),
                     created_at,
                 ),
             )
             rollup_ids.append(int(cursor.lastrowid))
             overall_production += totals["production"]
             overall_collections += totals["collections"]
+            overall_count += int(totals["count"])
 
         if totals_by_clinic:
             overall_pay = overall_collections * settings.pay_percentage
             cursor = connection.execute(
                 """
                 INSERT INTO rollups (
-                    week_start, clinic_id, total_production, total_collections, estimated_pay, created_at
-                ) VALUES (?, NULL, ?, ?, ?, ?)
+                    week_start, clinic_id, total_production, total_collections, estimated_pay,
+                    upload_count, created_at
+                ) VALUES (?, NULL, ?, ?, ?, ?, ?)
                 """,
                 (
                     week_start.isoformat(),
                     overall_production,
                     overall_collections,
                     overall_pay,
+                    overall_count,
                     created_at,
                 ),
             )
             rollup_ids.append(int(cursor.lastrowid))
+        invalidate_dashboard()
 
     logger.info("Generated %s rollups for week %s", len(rollup_ids), week_start)
     return rollup_ids
@@ -93,4 +109,382 @@ def generate_weekly_rollups(week_start: date) -> list[int]:
 def refresh_weekly_rollups(week_start: date) -> list[int]:
     with get_connection() as connection:
         connection.execute("DELETE FROM rollups WHERE week_start = ?", (week_start.isoformat(),))
+        invalidate_dashboard()
     return generate_weekly_rollups(week_start)
+
+
+@dataclass(frozen=True)
+class UploadContribution:
+    day: date | None
+    clinic_id: int | None
+    production: float
+    collections: float
+
+    @property
+    def week_start(self) -> date | None:
+        if self.day is None:
+            return None
+        return self.day - timedelta(days=self.day.weekday())
+
+    @property
+    def counted(self) -> bool:
+        return self.day is not None and self.clinic_id is not None
+
+
+NO_CONTRIBUTION = UploadContribution(None, None, 0.0, 0.0)
+
+
+def entry_day(entry_date: str | None) -> date | None:
+    if not entry_date:
+        return None
+    try:
+        return date.fromisoformat(entry_date)
+    except ValueError:
+        return None
+
+
+_CONTRIBUTION_SELECT = """
+    SELECT uploads.id, uploads.status, uploads.entry_date, uploads.production_amount,
+           uploads.collections_amount, clinics.id AS clinic_id
+    FROM uploads
+    LEFT JOIN clinics ON clinics.id = uploads.clinic_id
+"""
+
+
+def _contribution_from_row(row: sqlite3.Row | None) -> UploadContribution:
+    if not row or row["status"] != "processed" or row["clinic_id"] is None:
+        return NO_CONTRIBUTION
+    return UploadContribution(
+        day=entry_day(row["entry_date"]),
+        clinic_id=int(row["clinic_id"]),
+        production=float(row["production_amount"] or 0),
+        collections=float(row["collections_amount"] or 0),
+    )
+
+
+def upload_contribution(
+    connection: sqlite3.Connection, upload_id: int
+) -> UploadContribution:
+    row = connection.execute(
+        f"{_CONTRIBUTION_SELECT} WHERE uploads.id = ?", (upload_id,)
+    ).fetchone()
+    return _contribution_from_row(row)
+
+
+def upload_contributions(
+    connection: sqlite3.Connection, upload_ids: Sequence[int]
+) -> dict[int, UploadContribution]:
+    contributions = dict.fromkeys(upload_ids, NO_CONTRIBUTION)
+    rows = connection.execute(
+        f"{_CONTRIBUTION_SELECT} WHERE uploads.id IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(upload_ids)),),
+    )
+    for row in rows:
+        contributions[int(row["id"])] = _contribution_from_row(row)
+    return contributions
+
+
+def apply_upload_delta(
+    connection: sqlite3.Connection,
+    before: UploadContribution,
+    after: UploadContribution,
+) -> None:
+    if before == after:
+        return
+    if before.counted:
+        _add_to_rollups(connection, before, sign=-1)
+    if after.counted:
+        _add_to_rollups(connection, after, sign=1)
+
+
+def apply_upload_deltas(
+    connection: sqlite3.Connection,
+    changes: Iterable[tuple[UploadContribution, UploadContribution]],
+) -> None:
+    # Net the changes per (week, clinic) and (day, clinic) first so a batch of
+    # uploads costs one upsert per touched row instead of two per upload.
+    settings = get_settings()
+    pay_percentages: dict[int, float] = {}
+    deltas: dict[tuple[str, int | None], list[float]] = {}
+    fact_deltas: dict[tuple[str, int], list[float]] = {}
+    for before, after in changes:
+        if before == after:
+            continue
+        for contribution, sign in ((before, -1), (after, 1)):
+            if not contribution.counted:
+                continue
+            clinic_id = contribution.clinic_id
+            if clinic_id not in pay_percentages:
+                pay_percentages[clinic_id] = _clinic_pay(connection, clinic_id)
+            week_start = contribution.week_start.isoformat()
+            for key, pay_percentage in (
+                ((week_start, clinic_id), pay_percentages[clinic_id]),
+                ((week_start, None), settings.pay_percentage),
+            ):
+                delta = deltas.setdefault(key, [0.0, 0.0, 0.0, 0])
+                delta[0] += sign * contribution.production
+                delta[1] += sign * contribution.collections
+                delta[2] += sign * contribution.collections * pay_percentage
+                delta[3] += sign
+            fact = fact_deltas.setdefault(
+                (contribution.day.isoformat(), clinic_id), [0.0, 0.0, 0]
+            )
+            fact[0] += sign * contribution.production
+            fact[1] += sign * contribution.collections
+            fact[2] += sign
+    for (week_start, clinic_id), (production, collections, pay, count) in deltas.items():
+        _upsert_rollup(connection, week_start, clinic_id, production, collections, pay, count)
+    for (day, clinic_id), (production, collections, count) in fact_deltas.items():
+        _upsert_daily_fact(connection, day, clinic_id, production, collections, count)
+
+
+def _clinic_pay(connection: sqlite3.Connection, clinic_id: int) -> float:
+    clinic = connection.execute(
+        "SELECT pay_percentage FROM clinics WHERE id = ?",
+        (clinic_id,),
+    ).fetchone()
+    return float(clinic["pay_percentage"]) if clinic else get_settings().pay_percentage
+
+
+def _add_to_rollups(
+    connection: sqlite3.Connection, contribution: UploadContribution, sign: int
+) -> None:
+    settings = get_settings()
+    clinic_pay = _clinic_pay(connection, contribution.clinic_id)
+    for clinic_id, pay_percentage in (
+        (contribution.clinic_id, clinic_pay),
+        (None, settings.pay_percentage),
+    ):
+        _upsert_rollup(
+            connection,
+            contribution.week_start.isoformat(),
+            clinic_id,
+            sign * contribution.production,
+            sign * contribution.collections,
+            sign * contribution.collections * pay_percentage,
+            sign,
+        )
+    _upsert_daily_fact(
+        connection,
+        contribution.day.isoformat(),
+        contribution.clinic_id,
+        sign * contribution.production,
+        sign * contribution.collections,
+        sign,
+    )
+
+
+def rollup_delta_sql(clinic_id: int | None) -> str:
+    clinic_filter = "clinic_id IS NULL" if clinic_id is None else "clinic_id = ?"
+    return f"""
+        UPDATE rollups
+        SET total_production = total_production + ?,
+            total_collections = total_collections + ?,
+            estimated_pay = estimated_pay + ?,
+            upload_count = upload_count + ?
+        WHERE week_start = ? AND {clinic_filter}
+    """
+
+
+def _upsert_rollup(
+    connection: sqlite3.Connection,
+    week_start: str,
+    clinic_id: int | None,
+    production: float,
+    collections: float,
+    estimated_pay: float,
+    count: int,
+) -> None:
+    invalidate_dashboard()
+    clinic_filter = "clinic_id IS NULL" if clinic_id is None else "clinic_id = ?"
+    key = (week_start,) if clinic_id is None else (week_start, clinic_id)
+    cursor = connection.execute(
+        rollup_delta_sql(clinic_id), (production, collections, estimated_pay, count, *key)
+    )
+    if cursor.rowcount == 0:
+        if count <= 0:
+            return
+        connection.execute(
+            """
+            INSERT INTO rollups (
+                week_start, clinic_id, total_production, total_collections, estimated_pay,
+                upload_count, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                week_start,
+                clinic_id,
+                production,
+                collections,
+                estimated_pay,
+                count,
+                datetime.now(tz=timezone.utc).isoformat(),
+            ),
+        )
+    elif count < 0:
+        connection.execute(
+            f"DELETE FROM rollups WHERE week_start = ? AND {clinic_filter} AND upload_count <= 0",
+            key,
+        )
+
+
+DAILY_FACT_UPSERT_SQL = """
+    INSERT INTO daily_facts (
+        day, clinic_id, total_production, total_collections, upload_count
+    ) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (day, clinic_id) DO UPDATE SET
+        total_production = total_production + excluded.total_production,
+        total_collections = total_collections + excluded.total_collections,
+        upload_count = upload_count + excluded.upload_count
+"""
+
+
+def _upsert_daily_fact(
+    connection: sqlite3.Connection,
+    day: str,
+    clinic_id: int,
+    production: float,
+    collections: float,
+    count: int,
+) -> None:
+    # Pay is not stored per day: range reports apply the clinic's current
+    # percentage, as rebuild_rollups() does.
+    connection.execute(DAILY_FACT_UPSERT_SQL, (day, clinic_id, production, collections, count))
+    if count < 0:
+        connection.execute(
+            "DELETE FROM daily_facts WHERE day = ? AND clinic_id = ? AND upload_count <= 0",
+            (day, clinic_id),
+        )
+
+
+_EXPECTED_DAILY_FACTS_SQL = """
+    SELECT date(uploads.entry_date) AS day, uploads.clinic_id,
+           SUM(COALESCE(uploads.production_amount, 0)) AS total_production,
+           SUM(COALESCE(uploads.collections_amount, 0)) AS total_collections,
+           COUNT(*) AS upload_count
+    FROM uploads
+    JOIN clinics ON clinics.id = uploads.clinic_id
+    WHERE uploads.status = 'processed' AND date(uploads.entry_date) IS NOT NULL
+    GROUP BY date(uploads.entry_date), uploads.clinic_id
+"""
+
+
+_EXPECTED_ROLLUPS_SQL = """
+    WITH weekly AS (
+        SELECT date(uploads.entry_date, '-6 days', 'weekday 1') AS week_start,
+               uploads.clinic_id,
+               clinics.pay_percentage,
+               COALESCE(uploads.production_amount, 0) AS production_amount,
+               COALESCE(uploads.collections_amount, 0) AS collections_amount
+        FROM uploads
+        JOIN clinics ON clinics.id = uploads.clinic_id
+        WHERE uploads.status = 'processed' AND uploads.entry_date IS NOT NULL
+    )
+    SELECT week_start, clinic_id, SUM(production_amount) AS total_production,
+           SUM(collections_amount) AS total_collections,
+           SUM(collections_amount) * pay_percentage AS estimated_pay,
+           COUNT(*) AS upload_count, :created_at AS created_at
+    FROM weekly
+    WHERE week_start IS NOT NULL
+    GROUP BY week_start, clinic_id
+    UNION ALL
+    SELECT week_start, NULL, SUM(production_amount), SUM(collections_amount),
+           SUM(collections_amount) * :pay_percentage, COUNT(*), :created_at
+    FROM weekly
+    WHERE week_start IS NOT NULL
+    GROUP BY week_start
+"""
+
+
+def rebuild_rollups() -> int:
+    settings = get_settings()
+    created_at = datetime.now(tz=timezone.utc).isoformat()
+    with get_connection() as connection:
+        connection.execute("DELETE FROM rollups")
+        connection.execute(
+            f"""
+            INSERT INTO rollups (
+                week_start, clinic_id, total_production, total_collections, estimated_pay,
+                upload_count, created_at
+            )
+            {_EXPECTED_ROLLUPS_SQL}
+            """,
+            {"pay_percentage": settings.pay_percentage, "created_at": created_at},
+        )
+        connection.execute("DELETE FROM daily_facts")
+        connection.execute(
+            f"""
+            INSERT INTO daily_facts (
+                day, clinic_id, total_production, total_collections, upload_count
+            )
+            {_EXPECTED_DAILY_FACTS_SQL}
+            """
+        )
+        count = connection.execute("SELECT COUNT(*) FROM rollups").fetchone()[0]
+        invalidate_dashboard()
+    logger.info("Rebuilt %s rollup rows from uploads", count)
+    return int(count)
+
+
+def _compare_rows(
+    expected: dict[tuple, sqlite3.Row],
+    actual: dict[tuple, sqlite3.Row],
+    columns: Sequence[str],
+    tolerance: float,
+) -> list[str]:
+    mismatches: list[str] = []
+    for key in sorted(set(expected) | set(actual), key=lambda item: (item[0], item[1] or 0)):
+        want = expected.get(key)
+        have = actual.get(key)
+        if want is None or have is None:
+            mismatches.append(
+                f"{key}: expected {'a row' if want else 'no row'}, "
+                f"found {'a row' if have else 'no row'}"
+            )
+            continue
+        for column in columns:
+            if abs(float(want[column]) - float(have[column])) > tolerance:
+                mismatches.append(
+                    f"{key}: {column} expected {want[column]}, found {have[column]}"
+                )
+    return mismatches
+
+
+def verify_rollups(tolerance: float = 0.005) -> list[str]:
+    settings = get_settings()
+    with get_connection() as connection:
+        expected = {
+            (row["week_start"], row["clinic_id"]): row
+            for row in connection.execute(
+                _EXPECTED_ROLLUPS_SQL,
+                {"pay_percentage": settings.pay_percentage, "created_at": ""},
+            )
+        }
+        actual = {
+            (row["week_start"], row["clinic_id"]): row
+            for row in connection.execute(
+                """
+                SELECT week_start, clinic_id, total_production, total_collections,
+                       estimated_pay, upload_count
+                FROM rollups
+                """
+            )
+        }
+        expected_facts = {
+            ("day " + row["day"], row["clinic_id"]): row
+            for row in connection.execute(_EXPECTED_DAILY_FACTS_SQL)
+        }
+        actual_facts = {
+            ("day " + row["day"], row["clinic_id"]): row
+            for row in connection.execute(
+                """
+                SELECT day, clinic_id, total_production, total_collections, upload_count
+                FROM daily_facts
+                """
+            )
+        }
+
+    totals = ("total_production", "total_collections", "upload_count")
+    return _compare_rows(
+        expected, actual, (*totals, "estimated_pay"), tolerance
+    ) + _compare_rows(expected_facts, actual_facts, totals, tolerance)
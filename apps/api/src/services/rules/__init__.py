@@ -1,13 +1,44 @@
 from __future__ import annotations
 
+import logging
+from pathlib import Path
 from typing import Dict
 
 from apps.api.src.services.rules.base import BaseParser
+from apps.api.src.services.rules.declarative import RuleParser, load_parser_rules
+from apps.api.src.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
 
 PARSER_REGISTRY: Dict[str, BaseParser] = {}
+DEFAULT_PARSER = BaseParser()
+
+_rule_cache: dict[Path, tuple[int, dict[str, RuleParser]]] = {}
+
+
+def clinic_rule_parsers() -> dict[str, RuleParser]:
+    path = get_settings().parsers_config_path
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _rule_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        parsers = load_parser_rules(path)
+        logger.info("Loaded parser rules for %s clinics from %s", len(parsers), path)
+    except (OSError, ValueError) as exc:
+        # Keep the last good rules while a file is being edited.
+        logger.error("Ignoring invalid parser rules in %s: %s", path, exc)
+        parsers = cached[1] if cached else {}
+    _rule_cache[path] = (mtime, parsers)
+    return parsers
 
 
 def get_parser(clinic_name: str | None) -> BaseParser:
-    if clinic_name and clinic_name in PARSER_REGISTRY:
+    if not clinic_name:
+        return DEFAULT_PARSER
+    if clinic_name in PARSER_REGISTRY:
         return PARSER_REGISTRY[clinic_name]
-    return BaseParser()
+    return clinic_rule_parsers().get(clinic_name.lower(), DEFAULT_PARSER)
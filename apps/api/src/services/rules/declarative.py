@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any
+
+from apps.api.src.services.rules.base import BaseParser
+
+RULE_FIELDS = ("production", "collections")
+
+
+class RuleParser(BaseParser):
+    def __init__(
+        self,
+        clinic: str,
+        production_patterns: list[re.Pattern[str]],
+        collections_patterns: list[re.Pattern[str]],
+    ) -> None:
+        self.clinic = clinic
+        self.production_patterns = production_patterns
+        self.collections_patterns = collections_patterns
+
+
+def _compile_patterns(clinic: str, key: str, values: Any) -> list[re.Pattern[str]]:
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"{key} for {clinic} must be a list of regex strings")
+    patterns = []
+    for value in values:
+        try:
+            pattern = re.compile(value, re.I)
+        except re.error as exc:
+            raise ValueError(f"{key} pattern {value!r} for {clinic}: {exc}") from exc
+        if pattern.groups < 1:
+            raise ValueError(f"{key} pattern {value!r} for {clinic} needs a capture group")
+        patterns.append(pattern)
+    return patterns
+
+
+def compile_rule(rule: dict[str, Any]) -> RuleParser:
+    clinic = rule.get("clinic")
+    if not isinstance(clinic, str) or not clinic.strip():
+        raise ValueError("Parser rules need a clinic name")
+    inherit = rule.get("inherit", True)
+    compiled = {}
+    for key in RULE_FIELDS:
+        patterns = _compile_patterns(clinic, key, rule.get(key, []))
+        if inherit:
+            patterns += getattr(BaseParser, f"{key}_patterns")
+        compiled[key] = patterns
+    return RuleParser(clinic, compiled["production"], compiled["collections"])
+
+
+def load_parser_rules(path: Path) -> dict[str, RuleParser]:
+    with path.open("r", encoding="utf-8") as file_handle:
+        data = json.load(file_handle)
+    if not isinstance(data, list):
+        raise ValueError("Parser rules must be a list of clinic rules")
+    parsers: dict[str, RuleParser] = {}
+    for rule in data:
+        if not isinstance(rule, dict):
+            raise ValueError("Each parser rule must be an object")
+        parser = compile_rule(rule)
+        parsers[parser.clinic.lower()] = parser
+    return parsers
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import errno
+import json
+import logging
+import os
+import shutil
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+from apps.api.src.db.database import get_connection
+from apps.api.src.services.ocr_service import hash_image
+from apps.api.src.utils.config import Settings
+
+logger = logging.getLogger(__name__)
+
+MIGRATE_BATCH_SIZE = 500
+ARCHIVE_SUFFIX = ".webp"
+
+
+def shard_path(content_hash: str, suffix: str) -> str:
+    return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{suffix.lower()}"
+
+
+def atomic_move(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(source, destination)
+        return
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+    # Across filesystems: copy next to the destination, fsync, then rename so
+    # readers only ever see a missing or a complete file.
+    temp = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    try:
+        with source.open("rb") as reader, temp.open("wb") as writer:
+            shutil.copyfileobj(reader, writer)
+            writer.flush()
+            os.fsync(writer.fileno())
+        os.replace(temp, destination)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    source.unlink()
+
+
+def store_file(file_path: Path, content_hash: str, processed_dir: Path) -> str:
+    relative = shard_path(content_hash, file_path.suffix)
+    destination = processed_dir / relative
+    if destination.exists():
+        # Content-addressed, so the same bytes are already stored.
+        file_path.unlink()
+    else:
+        atomic_move(file_path, destination)
+    return relative
+
+
+def record_storage_path(connection: sqlite3.Connection, upload_id: int, relative: str) -> None:
+    connection.execute(
+        "UPDATE uploads SET storage_path = ? WHERE id = ?", (relative, upload_id)
+    )
+
+
+def stored_file(
+    filename: str,
+    storage_path: str | None,
+    content_hash: str | None,
+    settings: Settings,
+    archive_path: str | None = None,
+) -> Path:
+    content_hash = content_hash or (Path(storage_path).stem if storage_path else None)
+    candidates = []
+    if storage_path:
+        candidates.append(settings.processed_dir / storage_path)
+    if content_hash:
+        candidates.append(
+            settings.processed_dir / shard_path(content_hash, Path(filename).suffix)
+        )
+    # Pruned originals are read back from the lossless archive copy.
+    if archive_path:
+        candidates.append(settings.archive_dir / archive_path)
+    if content_hash:
+        candidates.append(settings.archive_dir / shard_path(content_hash, ARCHIVE_SUFFIX))
+    # Flat layout from before sharding, then not yet processed.
+    candidates.append(settings.processed_dir / filename)
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return settings.uploads_dir / filename
+
+
+@dataclass
+class StorageMigrationSummary:
+    moved: int = 0
+    orphaned: int = 0
+
+
+def migrate_flat_storage(
+    settings: Settings, batch_size: int = MIGRATE_BATCH_SIZE, dry_run: bool = False
+) -> StorageMigrationSummary:
+    summary = StorageMigrationSummary()
+    processed_dir = settings.processed_dir
+    if not processed_dir.exists():
+        return summary
+
+    with os.scandir(processed_dir) as entries:
+        names = [
+            entry.name
+            for entry in entries
+            if entry.is_file() and not entry.name.startswith(".")
+        ]
+    for start in range(0, len(names), batch_size):
+        batch = names[start : start + batch_size]
+        with get_connection() as connection:
+            rows = connection.execute(
+                """
+                SELECT id, filename, content_hash FROM uploads
+                WHERE filename IN (SELECT value FROM json_each(?))
+                """,
+                (json.dumps(batch),),
+            ).fetchall()
+            by_name = {row["filename"]: row for row in rows}
+            moves = []
+            for name in batch:
+                row = by_name.get(name)
+                if row is None:
+                    summary.orphaned += 1
+                    logger.warning("No upload row for %s; left in place", name)
+                    continue
+                file_path = processed_dir / name
+                content_hash = row["content_hash"] or hash_image(file_path)
+                moves.append((file_path, content_hash, row["id"]))
+            if not dry_run:
+                # Recorded before moving: until a file moves, stored_file()
+                # still finds it in the flat directory.
+                connection.executemany(
+                    "UPDATE uploads SET storage_path = ? WHERE id = ?",
+                    [
+                        (shard_path(content_hash, file_path.suffix), upload_id)
+                        for file_path, content_hash, upload_id in moves
+                    ],
+                )
+        if not dry_run:
+            for file_path, content_hash, _ in moves:
+                store_file(file_path, content_hash, processed_dir)
+        summary.moved += len(moves)
+        logger.info("Migrated %s of %s files", min(start + batch_size, len(names)), len(names))
+    return summary
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import AsyncIterator, Callable, NamedTuple
+
+import anyio
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from apps.api.src.db.async_database import get_async_connection
+
+# Partial files live in a subdirectory so ingest never registers them.
+INCOMING_DIR = ".incoming"
+MAX_FIELD_BYTES = 16 * 1024
+# Boundaries, part headers and the small text fields around the file.
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class UploadFormError(ValueError):
+    pass
+
+
+class ReceivedUpload(NamedTuple):
+    path: Path
+    content_hash: str
+    size: int
+
+
+class UploadForm(NamedTuple):
+    fields: dict[str, str]
+    received: ReceivedUpload | None
+
+
+def format_size(size: int) -> str:
+    for unit, scale in (("MB", 1024 * 1024), ("KB", 1024)):
+        if size >= scale:
+            return f"{size / scale:.1f}".removesuffix(".0") + f" {unit}"
+    return f"{size} bytes"
+
+
+def check_content_length(content_length: str | None, max_bytes: int) -> None:
+    # Rejects an oversized body before any of it is read.
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_bytes + FORM_OVERHEAD_BYTES:
+            raise _too_large(max_bytes)
+
+
+def _too_large(max_bytes: int) -> UploadTooLargeError:
+    return UploadTooLargeError(f"Upload exceeds the {format_size(max_bytes)} limit.")
+
+
+async def receive_form_upload(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    uploads_dir: Path,
+    file_field: str,
+    stored_name: Callable[[str], str],
+    max_bytes: int,
+) -> UploadForm:
+    # The multipart body is parsed as it arrives (instead of being spooled to a
+    # temp file first), so the file is hashed on its way into .incoming/ and
+    # the size cap stops an oversized upload after max_bytes.
+    media_type, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise UploadFormError("Expected a multipart/form-data upload.")
+
+    events: list[tuple[str, bytes]] = []
+    parser = MultipartParser(
+        boundary,
+        callbacks={
+            "on_header_field": lambda data, start, end: events.append(("name", data[start:end])),
+            "on_header_value": lambda data, start, end: events.append(("value", data[start:end])),
+            "on_header_end": lambda: events.append(("header", b"")),
+            "on_headers_finished": lambda: events.append(("headers", b"")),
+            "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+            "on_part_end": lambda: events.append(("end", b"")),
+        },
+    )
+    fields: dict[str, str] = {}
+    received: ReceivedUpload | None = None
+    header_name = bytearray()
+    header_value = bytearray()
+    disposition = b""
+    part_name = ""
+    is_file = False
+    value = bytearray()
+    buffer = None
+    path: Path | None = None
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in chunks:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as exc:
+                raise UploadFormError("Malformed multipart upload.") from exc
+            for kind, data in events:
+                if kind == "name":
+                    header_name += data
+                elif kind == "value":
+                    header_value += data
+                elif kind == "header":
+                    if header_name.lower() == b"content-disposition":
+                        disposition = bytes(header_value)
+                    header_name.clear()
+                    header_value.clear()
+                elif kind == "headers":
+                    _, params = parse_options_header(disposition)
+                    part_name = params.get(b"name", b"").decode("utf-8", "replace")
+                    filename = params.get(b"filename")
+                    is_file = filename is not None
+                    disposition = b""
+                    if filename and part_name == file_field and path is None:
+                        incoming = uploads_dir / INCOMING_DIR
+                        incoming.mkdir(parents=True, exist_ok=True)
+                        path = incoming / stored_name(filename.decode("utf-8", "replace"))
+                        buffer = await anyio.open_file(path, "wb")
+                elif kind == "data":
+                    if buffer is not None:
+                        size += len(data)
+                        if size > max_bytes:
+                            raise _too_large(max_bytes)
+                        digest.update(data)
+                        await buffer.write(data)
+                    elif not is_file:
+                        value += data
+                        if len(value) > MAX_FIELD_BYTES:
+                            raise UploadFormError(f"Form field {part_name!r} is too large.")
+                elif kind == "end":
+                    if buffer is not None:
+                        await buffer.aclose()
+                        buffer = None
+                        received = ReceivedUpload(path, digest.hexdigest(), size)
+                    elif not is_file:
+                        fields[part_name] = value.decode("utf-8", "replace")
+                    value.clear()
+            events.clear()
+    except BaseException:
+        if buffer is not None:
+            await buffer.aclose()
+        if path is not None:
+            path.unlink(missing_ok=True)
+        raise
+    return UploadForm(fields, received)
+
+
+async def find_upload_by_hash(content_hash: str) -> int | None:
+    async with get_async_connection() as connection:
+        async with connection.execute(
+            "SELECT id FROM uploads WHERE content_hash = ?", (content_hash,)
+        ) as cursor:
+            row = await cursor.fetchone()
+    return int(row["id"]) if row else None
+
+
+async def register_upload(
+    received: ReceivedUpload, uploads_dir: Path, clinic_id: int, entry_date: str, created_at: str
+) -> tuple[int, bool]:
+    destination = uploads_dir / received.path.name
+    try:
+        async with get_async_connection() as connection:
+            cursor = await connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at,
+                                     content_hash)
+                VALUES (?, ?, ?, 'new', ?, ?)
+                """,
+                (destination.name, clinic_id, entry_date, created_at, received.content_hash),
+            )
+            # Renamed inside the transaction so a failed move leaves no row behind.
+            os.replace(received.path, destination)
+            return int(cursor.lastrowid), True
+    except sqlite3.IntegrityError:
+        # Lost a race with an identical upload that committed first.
+        received.path.unlink(missing_ok=True)
+        existing = await find_upload_by_hash(received.content_hash)
+        if existing is None:
+            raise
+        return existing, False
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+from apps.api.src.services.ingest_service import ingest_settled_uploads
+from apps.api.src.services.process_service import (
+    OCRPool,
+    process_uploads,
+    unqueued_upload_ids,
+)
+from apps.api.src.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# A burst that keeps producing events is still cut into a batch after this
+# many settle periods.
+MAX_BATCH_WAIT_FACTOR = 5
+# Dashboard uploads get their job right after the row commits; only rows
+# older than this without a job are treated as left behind.
+ORPHAN_GRACE_SECONDS = 60
+
+
+def _start_observer(directory: Path, notify: Callable[[], None]):
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        logger.info("watchdog is not installed; polling %s", directory)
+        return None
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event) -> None:
+            # Files leaving the folder (processed, deleted) need no scan.
+            if not event.is_directory and event.event_type != "deleted":
+                notify()
+
+    observer = Observer()
+    observer.schedule(_Handler(), str(directory), recursive=False)
+    observer.daemon = True
+    observer.start()
+    logger.info("Watching %s for new uploads", directory)
+    return observer
+
+
+class UploadWatcher:
+    def __init__(
+        self,
+        settle_seconds: float | None = None,
+        poll_seconds: float | None = None,
+        max_batch: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.settle_seconds = (
+            settings.watch_settle_seconds if settle_seconds is None else settle_seconds
+        )
+        self.poll_seconds = settings.watch_poll_seconds if poll_seconds is None else poll_seconds
+        self.max_batch = max_batch or settings.watch_max_batch
+        self.rescan_seconds = max(self.poll_seconds, settings.watch_rescan_seconds)
+        # One pool for every batch, so workers keep their OCR engine loaded.
+        self._ocr_pool = OCRPool(settings.ocr_workers) if settings.ocr_workers > 1 else None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._running = False
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        # A running loop may be inside a batch (stop() can come from a signal
+        # handler on the same thread); it shuts the pool down as it exits.
+        if not self._running:
+            self._shutdown_pool()
+
+    def _shutdown_pool(self) -> None:
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown()
+
+    def run_once(self) -> tuple[list[int], int]:
+        run = ingest_settled_uploads(settle_seconds=self.settle_seconds)
+        cutoff = datetime.now(tz=timezone.utc) - timedelta(seconds=ORPHAN_GRACE_SECONDS)
+        left_behind = unqueued_upload_ids(cutoff.isoformat())
+        upload_ids = sorted(set(run.upload_ids) | set(left_behind))
+        processed: list[int] = []
+        for start in range(0, len(upload_ids), self.max_batch):
+            if self._stop.is_set():
+                break
+            batch = upload_ids[start : start + self.max_batch]
+            processed.extend(process_uploads(batch, pool=self._ocr_pool))
+        if upload_ids:
+            logger.info(
+                "Registered %s uploads, resumed %s, processed %s",
+                len(run.upload_ids),
+                len(left_behind),
+                len(processed),
+            )
+        return processed, run.deferred
+
+    def _wait_for_quiet(self) -> None:
+        deadline = time.monotonic() + self.settle_seconds * MAX_BATCH_WAIT_FACTOR
+        while not self._stop.is_set():
+            self._wake.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._wake.wait(min(self.settle_seconds, remaining)):
+                return
+
+    def run(self) -> None:
+        uploads_dir = get_settings().uploads_dir
+        uploads_dir.mkdir(parents=True, exist_ok=True)
+        # Without watchdog the poll interval is the only trigger; with it, a
+        # much rarer rescan is a safety net for missed events.
+        observer = _start_observer(uploads_dir, self.notify)
+        idle_seconds = self.poll_seconds if observer is None else self.rescan_seconds
+        self._running = True
+        try:
+            while not self._stop.is_set():
+                try:
+                    _, deferred = self.run_once()
+                except Exception:
+                    logger.exception("Upload watcher pass failed")
+                    deferred = 0
+                # Files skipped as still being written are re-checked once
+                # they have had time to settle.
+                timeout = self.settle_seconds if deferred else idle_seconds
+                if self._wake.wait(timeout) and not self._stop.is_set():
+                    self._wait_for_quiet()
+        finally:
+            self._running = False
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self._shutdown_pool()
@@ -12,25 +12,125 @@ class Settings:
     database_url: str
     uploads_dir: Path
     processed_dir: Path
+    archive_dir: Path
     clinics_config_path: Path
+    parsers_config_path: Path
     pay_percentage: float
+    ocr_workers: int
+    job_workers: int
+    job_max_attempts: int
+    job_retry_seconds: float
+    ocr_preprocess: bool
+    ocr_target_width: int
+    ocr_threshold: bool
+    ocr_autocrop: bool
+    ocr_backend: str
+    ocr_fast_totals: bool
+    ocr_word_data: bool
+    ocr_min_confidence: float
+    dashboard_cache: bool
+    max_upload_bytes: int
+    watch_settle_seconds: float
+    watch_poll_seconds: float
+    watch_rescan_seconds: float
+    watch_max_batch: int
+    archive_originals: bool
+    archive_prune_days: float
+    thumbnail_size: int
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() not in {"0", "false", "no", "off"}
 
 
 def load_settings() -> Settings:
     database_url = os.getenv("DATABASE_URL", "sqlite:///data/db.sqlite3")
     uploads_dir = Path(os.getenv("UPLOADS_DIR", "data/uploads")).resolve()
     processed_dir = Path(os.getenv("PROCESSED_DIR", "data/processed")).resolve()
+    archive_dir = Path(os.getenv("ARCHIVE_DIR") or processed_dir.parent / "archive").resolve()
     clinics_config_path = Path(os.getenv("CLINICS_CONFIG", "data/clinics.json")).resolve()
+    parsers_config_path = Path(os.getenv("PARSERS_CONFIG", "data/parsers.json")).resolve()
     pay_percentage = float(os.getenv("PAY_PERCENTAGE", "0.35"))
+    ocr_workers = max(1, int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1))))
+    job_workers = max(1, int(os.getenv("JOB_WORKERS", "2")))
+    job_max_attempts = max(1, int(os.getenv("JOB_MAX_ATTEMPTS", "3")))
+    job_retry_seconds = float(os.getenv("JOB_RETRY_SECONDS", "5"))
+    ocr_target_width = max(200, int(os.getenv("OCR_TARGET_WIDTH", "1240")))
+    max_upload_bytes = int(float(os.getenv("MAX_UPLOAD_MB", "20")) * 1024 * 1024)
     return Settings(
         database_url=database_url,
         uploads_dir=uploads_dir,
         processed_dir=processed_dir,
+        archive_dir=archive_dir,
         clinics_config_path=clinics_config_path,
+        parsers_config_path=parsers_config_path,
         pay_percentage=pay_percentage,
+        ocr_workers=ocr_workers,
+        job_workers=job_workers,
+        job_max_attempts=job_max_attempts,
+        job_retry_seconds=job_retry_seconds,
+        ocr_preprocess=_env_flag("OCR_PREPROCESS", "0"),
+        ocr_target_width=ocr_target_width,
+        ocr_threshold=_env_flag("OCR_THRESHOLD", "1"),
+        ocr_autocrop=_env_flag("OCR_AUTOCROP", "1"),
+        ocr_backend=os.getenv("OCR_BACKEND", "auto").strip().lower(),
+        ocr_fast_totals=_env_flag("OCR_FAST_TOTALS", "1"),
+        ocr_word_data=_env_flag("OCR_WORD_DATA", "0"),
+        ocr_min_confidence=float(os.getenv("OCR_MIN_CONFIDENCE", "80")),
+        dashboard_cache=_env_flag("DASHBOARD_CACHE", "1"),
+        max_upload_bytes=max_upload_bytes,
+        watch_settle_seconds=float(os.getenv("WATCH_SETTLE_SECONDS", "2")),
+        watch_poll_seconds=float(os.getenv("WATCH_POLL_SECONDS", "5")),
+        watch_rescan_seconds=float(os.getenv("WATCH_RESCAN_SECONDS", "300")),
+        watch_max_batch=max(1, int(os.getenv("WATCH_MAX_BATCH", "16"))),
+        archive_originals=_env_flag("ARCHIVE_ORIGINALS", "1"),
+        archive_prune_days=float(os.getenv("ARCHIVE_PRUNE_DAYS", "90")),
+        thumbnail_size=max(32, int(os.getenv("THUMBNAIL_SIZE", "320"))),
     )
 
 
+_SETTINGS_ENV_VARS = (
+    "DATABASE_URL",
+    "UPLOADS_DIR",
+    "PROCESSED_DIR",
+    "ARCHIVE_DIR",
+    "CLINICS_CONFIG",
+    "PARSERS_CONFIG",
+    "PAY_PERCENTAGE",
+    "OCR_WORKERS",
+    "JOB_WORKERS",
+    "JOB_MAX_ATTEMPTS",
+    "JOB_RETRY_SECONDS",
+    "OCR_PREPROCESS",
+    "OCR_TARGET_WIDTH",
+    "OCR_THRESHOLD",
+    "OCR_AUTOCROP",
+    "OCR_BACKEND",
+    "OCR_FAST_TOTALS",
+    "OCR_WORD_DATA",
+    "OCR_MIN_CONFIDENCE",
+    "DASHBOARD_CACHE",
+    "MAX_UPLOAD_MB",
+    "WATCH_SETTLE_SECONDS",
+    "WATCH_POLL_SECONDS",
+    "WATCH_RESCAN_SECONDS",
+    "WATCH_MAX_BATCH",
+    "ARCHIVE_ORIGINALS",
+    "ARCHIVE_PRUNE_DAYS",
+    "THUMBNAIL_SIZE",
+)
+_settings_cache: dict[tuple[str | None, ...], Settings] = {}
+
+
+def get_settings() -> Settings:
+    key = tuple(os.environ.get(name) for name in _SETTINGS_ENV_VARS)
+    settings = _settings_cache.get(key)
+    if settings is None:
+        settings = load_settings()
+        _settings_cache[key] = settings
+    return settings
+
+
 def load_clinics_config(path: Path) -> list[dict[str, Any]]:
     if not path.exists():
         return []
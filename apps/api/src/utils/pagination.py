@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise CursorError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise CursorError("Invalid cursor")
+    # Cursors are (sort values..., id); anything else would reach SQL as garbage.
+    *sort_values, last_id = values
+    if type(last_id) is not int or not all(
+        value is None or isinstance(value, str) for value in sort_values
+    ):
+        raise CursorError("Invalid cursor")
+    return values
+
+
+def clamp_page_size(limit: int | None) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
@@ -1,8 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[3]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
+
+from apps.api.src.db.async_database import close_async_connections
+
+
+@pytest.fixture(autouse=True)
+def _close_async_connections():
+    yield
+    asyncio.run(close_async_connections())
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from apps.api.src.db.database import init_db
+from apps.api.src.services.clinic_service import (
+    ClinicMatcher,
+    create_clinic,
+    detect_clinic_id,
+)
+
+
+def test_clinic_matcher_prefers_longest_name() -> None:
+    matcher = ClinicMatcher(
+        [(1, "Dental"), (2, "Downtown Dental"), (3, "Downtown Dental Group"), (4, "Oak")]
+    )
+    assert matcher.match("DOWNTOWN DENTAL group production") == 3
+    assert matcher.match("Visit downtown dental today") == 2
+    assert matcher.match("Oakland Dental") == 1
+    assert matcher.match("Dentalplex") is None
+
+
+def test_detect_clinic_id_sees_new_clinics(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("CLINICS_CONFIG", str(tmp_path / "missing.json"))
+    init_db()
+
+    assert detect_clinic_id("Uptown Smiles daily report") is None
+    clinic = create_clinic("Uptown Smiles", 0.32)
+    assert detect_clinic_id("Uptown Smiles daily report") == clinic["id"]
+
+
+def test_detect_clinic_id_sees_clinics_added_elsewhere(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "test.sqlite3"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+    monkeypatch.setenv("CLINICS_CONFIG", str(tmp_path / "missing.json"))
+    init_db()
+
+    assert detect_clinic_id("Uptown Smiles daily report") is None
+    # Another process (seed script, CLI) writes without touching this cache.
+    other = sqlite3.connect(db_path)
+    with other:
+        other.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('Uptown Smiles', 0.3)")
+    other.close()
+    assert detect_clinic_id("Uptown Smiles daily report") == 1
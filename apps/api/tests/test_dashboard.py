@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.api.src.db.database import database_path, get_connection, init_db
+from apps.api.src.routes import dashboard
+from apps.api.src.services import dashboard_service, upload_service
+from apps.api.src.services.clinic_service import create_clinic
+from apps.api.src.services.rollup_service import rebuild_rollups
+
+
+def test_dashboard_is_cached_until_rollups_or_clinics_change(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+    clinic = create_clinic("Downtown Dental", 0.4)
+    with get_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at,
+                                 collections_amount)
+            VALUES ('a.png', ?, '2024-02-06', 'processed', 't', 100)
+            """,
+            (clinic["id"],),
+        )
+    rebuild_rollups()
+    app = FastAPI()
+    app.include_router(dashboard.router)
+    client = TestClient(app)
+
+    first = client.get("/")
+    assert first.status_code == 200
+    assert "$100.00" in first.text
+    etag = first.headers["etag"]
+
+    loads = []
+    load = dashboard_service._load_dashboard_data
+
+    async def counted_load():
+        loads.append(1)
+        return await load()
+
+    monkeypatch.setattr(dashboard_service, "_load_dashboard_data", counted_load)
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/").text == first.text
+    assert loads == []
+
+    # New clinics reload the data; the page itself (and its ETag) is unchanged.
+    create_clinic("Uptown Smiles", 0.3)
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+    assert len(loads) == 1
+
+    with get_connection() as connection:
+        connection.execute("UPDATE uploads SET collections_amount = 250")
+    rebuild_rollups()
+    refreshed = client.get("/")
+    assert "$250.00" in refreshed.text
+    assert refreshed.headers["etag"] != etag
+
+    # Another process signals a change by touching the marker file.
+    marker = database_path().with_name(f"{database_path().name}-dashboard")
+    os.utime(marker, ns=(1, 1))
+    client.get("/")
+    assert len(loads) == 3
+
+
+def test_format_size_keeps_small_limits_readable() -> None:
+    assert upload_service.format_size(20 * 1024 * 1024) == "20 MB"
+    assert upload_service.format_size(1536 * 1024) == "1.5 MB"
+    assert upload_service.format_size(512 * 1024) == "512 KB"
+    assert upload_service.format_size(20) == "20 bytes"
+
+
+def test_upload_streams_file_dedups_and_enforces_size(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("MAX_UPLOAD_MB", str(20 / (1024 * 1024)))
+    init_db()
+    app = FastAPI()
+    app.include_router(dashboard.router)
+    client = TestClient(app)
+
+    def upload(name: str, content: bytes):
+        return client.post(
+            "/upload",
+            data={"entry_date": "2024-02-06"},
+            files={"file": (name, content, "image/png")},
+            follow_redirects=False,
+        )
+
+    response = upload("sheet.png", b"not really a png")
+    assert response.status_code == 303
+    assert "job=" in response.headers["location"]
+    duplicate = upload("same-sheet.png", b"not really a png")
+    assert duplicate.headers["location"] == "/?uploaded=1&duplicate=1"
+    too_big = upload("big.png", b"x" * 21)
+    assert too_big.status_code == 413
+    assert "exceeds the 20 bytes limit" in too_big.text
+
+    # A declared Content-Length over the cap is refused before the body is read.
+    consumed: list[bytes] = []
+    boundary = "bound"
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="huge.png"'
+        f"\r\n\r\n{'x' * 100_000}\r\n--{boundary}--\r\n"
+    ).encode()
+
+    def stream(content: bytes):
+        consumed.append(content)
+        yield content
+
+    declared = client.post(
+        "/upload",
+        content=stream(body),
+        headers={
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(len(body)),
+        },
+    )
+    assert declared.status_code == 413
+    assert consumed == []
+    # Without a Content-Length the cap still applies while streaming.
+    chunked = client.post(
+        "/upload",
+        content=stream(body),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    assert chunked.status_code == 413
+    assert not any((tmp_path / "uploads" / upload_service.INCOMING_DIR).iterdir())
+
+    with get_connection() as connection:
+        upload = connection.execute("SELECT * FROM uploads").fetchone()
+        job, *other_jobs = connection.execute("SELECT kind, payload FROM jobs").fetchall()
+        clinic = connection.execute(
+            "SELECT name FROM clinics WHERE id = ?", (upload["clinic_id"],)
+        ).fetchone()
+    assert [path.name for path in (tmp_path / "uploads").rglob("*.png")] == [upload["filename"]]
+    assert (tmp_path / "uploads" / upload["filename"]).read_bytes() == b"not really a png"
+    assert upload["content_hash"] == hashlib.sha256(b"not really a png").hexdigest()
+    assert other_jobs == []
+    assert clinic["name"] == "Unassigned"
+    assert job["kind"] == "process_upload"
+    assert f'"upload_id": {upload["id"]}' in job["payload"]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from apps.api.src.db.database import call_after_commit, get_connection, init_db, pool_stats
+from apps.api.src.db.migrations import MIGRATIONS
+
+
+def test_connections_are_reused_and_nested_blocks_share_a_transaction(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+
+    before = pool_stats()
+    with get_connection() as outer:
+        with get_connection() as inner:
+            assert inner is outer
+    after = pool_stats()
+    assert after["checkouts"] - before["checkouts"] == 2
+    assert after["opened"] - before["opened"] <= 1
+
+    with pytest.raises(RuntimeError):
+        with get_connection() as connection:
+            connection.execute(
+                "INSERT INTO clinics (name, pay_percentage) VALUES ('Rolled Back', 0.3)"
+            )
+            with get_connection():
+                raise RuntimeError("boom")
+
+    with get_connection() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM clinics").fetchone()[0] == 0
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # A nested block whose error is caught leaves only the outer writes.
+    callbacks: list[str] = []
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('Kept', 0.3)")
+        try:
+            with get_connection() as nested:
+                nested.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('Undone', 0.3)")
+                call_after_commit(lambda: callbacks.append("undone"))
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        with get_connection() as nested:
+            nested.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('Nested', 0.3)")
+            call_after_commit(lambda: callbacks.append("nested"))
+    with get_connection() as connection:
+        names = [row[0] for row in connection.execute("SELECT name FROM clinics ORDER BY id")]
+    assert names == ["Kept", "Nested"]
+    assert callbacks == ["nested"]
+
+    # The same holds when the failing nested block opened the transaction.
+    with get_connection() as connection:
+        try:
+            with get_connection() as nested:
+                nested.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('First', 0.3)")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert not connection.in_transaction
+
+    # A nested block that starts the transaction does not commit on its own.
+    with pytest.raises(RuntimeError):
+        with get_connection() as connection:
+            with get_connection() as nested:
+                nested.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('Gone', 0.3)")
+            raise RuntimeError("boom")
+    with get_connection() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM clinics").fetchone()[0] == 2
+
+
+def test_readers_do_not_wait_for_open_write_transaction(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+
+    counts: list[int] = []
+
+    def read_clinics() -> None:
+        with get_connection() as connection:
+            counts.append(connection.execute("SELECT COUNT(*) FROM clinics").fetchone()[0])
+
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES ('Pending', 0.3)"
+        )
+        reader = threading.Thread(target=read_clinics)
+        reader.start()
+        reader.join(timeout=2)
+        assert counts == [0]
+
+
+def test_init_db_migrates_legacy_schema(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "legacy.sqlite3"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+    legacy = sqlite3.connect(db_path)
+    legacy.executescript(
+        """
+        CREATE TABLE clinics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, pay_percentage REAL NOT NULL
+        );
+        CREATE TABLE rollups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, week_start TEXT NOT NULL, clinic_id INTEGER,
+            total_production REAL NOT NULL, total_collections REAL NOT NULL,
+            estimated_pay REAL NOT NULL, created_at TEXT NOT NULL
+        );
+        INSERT INTO rollups (week_start, clinic_id, total_production, total_collections,
+                             estimated_pay, created_at)
+        VALUES ('2024-02-05', NULL, 0, 0, 0, '2024-02-05');
+        """
+    )
+    legacy.close()
+
+    init_db()
+    init_db()
+
+    with get_connection() as connection:
+        assert connection.execute("PRAGMA user_version").fetchone()[0] == MIGRATIONS[-1].version
+        assert connection.execute("SELECT upload_count FROM rollups").fetchone()[0] == 0
+        indexes = {row["name"] for row in connection.execute("PRAGMA index_list(uploads)")}
+    assert "idx_uploads_filename" in indexes
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services import ingest_service, process_service, watch_service
+from apps.api.src.services.ingest_service import ingest_uploads
+from apps.api.src.services.watch_service import UploadWatcher
+
+
+def worker_read_full_page(file_path: Path, crop_box=None) -> str:
+    # Module-level so the OCR pool can pickle it.
+    return f"Collections: $100.00\nworker {os.getpid()}"
+
+
+def test_ingest_only_hashes_new_or_changed_files(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    uploads_dir = tmp_path / "uploads"
+    monkeypatch.setenv("UPLOADS_DIR", str(uploads_dir))
+    init_db()
+    (uploads_dir / ".incoming").mkdir(parents=True)
+    (uploads_dir / ".incoming" / "partial.png").write_bytes(b"partial")
+    (uploads_dir / "2024-02-05_a.png").write_bytes(b"sheet a")
+    (uploads_dir / "2024-02-06_copy.png").write_bytes(b"sheet a")
+    (uploads_dir / "via-dashboard.png").write_bytes(b"sheet c")
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.3)")
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+            VALUES ('via-dashboard.png', 1, '2024-02-07', 'new', 't')
+            """
+        )
+
+    hashed: list[str] = []
+    hash_image = ingest_service.hash_image
+    monkeypatch.setattr(
+        ingest_service, "hash_image", lambda path: hashed.append(path.name) or hash_image(path)
+    )
+
+    assert ingest_uploads() == [2]
+    with get_connection() as connection:
+        uploads = connection.execute("SELECT filename, entry_date FROM uploads").fetchall()
+        manifest = connection.execute(
+            "SELECT name, upload_id FROM ingest_manifest ORDER BY name"
+        ).fetchall()
+    assert [tuple(row) for row in uploads] == [
+        ("via-dashboard.png", "2024-02-07"),
+        ("2024-02-05_a.png", "2024-02-05"),
+    ]
+    assert [tuple(row) for row in manifest] == [
+        ("2024-02-05_a.png", 2),
+        ("2024-02-06_copy.png", 2),
+        ("via-dashboard.png", 1),
+    ]
+    assert sorted(hashed) == ["2024-02-05_a.png", "2024-02-06_copy.png", "via-dashboard.png"]
+
+    hashed.clear()
+    assert ingest_uploads() == []
+    assert hashed == []
+
+    os.utime(uploads_dir / "2024-02-05_a.png", ns=(1, 1))
+    (uploads_dir / "2024-02-08_new.png").write_bytes(b"sheet d")
+    new_ids = ingest_uploads()
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT id FROM uploads WHERE filename = '2024-02-08_new.png'"
+        ).fetchone()
+    assert new_ids == [row["id"]]
+    assert sorted(hashed) == ["2024-02-05_a.png", "2024-02-08_new.png"]
+
+    # Files that left the folder (processed, deleted) drop out of the manifest.
+    (uploads_dir / "2024-02-06_copy.png").unlink()
+    (uploads_dir / "2024-02-09_new.png").write_bytes(b"sheet e")
+    ingest_uploads()
+    with get_connection() as connection:
+        names = [row[0] for row in connection.execute("SELECT name FROM ingest_manifest")]
+    assert "2024-02-06_copy.png" not in names
+    assert "2024-02-09_new.png" in names
+
+
+def test_watcher_defers_fresh_files_and_processes_in_micro_batches(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    uploads_dir = tmp_path / "uploads"
+    monkeypatch.setenv("UPLOADS_DIR", str(uploads_dir))
+    init_db()
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.3)")
+    uploads_dir.mkdir()
+    for index in range(5):
+        path = uploads_dir / f"sheet-{index}.png"
+        path.write_bytes(f"sheet {index}".encode())
+        os.utime(path, ns=(1, 1))
+    (uploads_dir / "still-copying.png").write_bytes(b"partial")
+
+    batches: list[list[int]] = []
+    def fake_process(upload_ids: list[int], pool=None) -> list[int]:
+        batches.append(upload_ids)
+        return upload_ids
+
+    monkeypatch.setattr(watch_service, "process_uploads", fake_process)
+    watcher = UploadWatcher(settle_seconds=60, poll_seconds=1, max_batch=2)
+
+    processed, deferred = watcher.run_once()
+    assert processed == [1, 2, 3, 4, 5]
+    assert batches == [[1, 2], [3, 4], [5]]
+    assert deferred == 1
+
+    os.utime(uploads_dir / "still-copying.png", ns=(1, 1))
+    assert watcher.run_once() == ([6], 0)
+
+
+def test_watcher_resumes_uploads_left_by_a_stopped_pass(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    uploads_dir = tmp_path / "uploads"
+    monkeypatch.setenv("UPLOADS_DIR", str(uploads_dir))
+    init_db()
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.3)")
+    uploads_dir.mkdir()
+    for index in range(4):
+        (uploads_dir / f"sheet-{index}.png").write_bytes(f"sheet {index}".encode())
+
+    watcher = UploadWatcher(settle_seconds=0, poll_seconds=1, max_batch=2)
+
+    def process_then_stop(upload_ids: list[int], pool=None) -> list[int]:
+        with get_connection() as connection:
+            connection.executemany(
+                "UPDATE uploads SET status = 'processed' WHERE id = ?",
+                [(upload_id,) for upload_id in upload_ids],
+            )
+        watcher.stop()
+        return upload_ids
+
+    monkeypatch.setattr(watch_service, "process_uploads", process_then_stop)
+    assert watcher.run_once() == ([1, 2], 0)
+
+    # A dashboard upload whose job is still queued belongs to the job workers.
+    from apps.api.src.services.job_service import enqueue_job
+
+    with get_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, status, created_at)
+            VALUES ('dashboard.png', 1, 'new', '2024-01-01T00:00:00+00:00')
+            """
+        )
+    enqueue_job("process_upload", {"upload_id": 5})
+
+    seen: list[list[int]] = []
+    monkeypatch.setattr(watch_service, "ORPHAN_GRACE_SECONDS", 0)
+    monkeypatch.setattr(
+        watch_service, "process_uploads", lambda ids, pool=None: seen.append(ids) or ids
+    )
+    restarted = UploadWatcher(settle_seconds=0, poll_seconds=1, max_batch=2)
+    assert restarted.run_once() == ([3, 4], 0)
+    assert seen == [[3, 4]]
+
+
+def test_watcher_keeps_one_ocr_pool_across_batches(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    uploads_dir = tmp_path / "uploads"
+    monkeypatch.setenv("UPLOADS_DIR", str(uploads_dir))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "2")
+    monkeypatch.setenv("OCR_WORD_DATA", "0")
+    monkeypatch.setenv("OCR_FAST_TOTALS", "0")
+    monkeypatch.setenv("ARCHIVE_ORIGINALS", "0")
+    monkeypatch.setattr(process_service, "read_full_page", worker_read_full_page)
+    executors: list[ProcessPoolExecutor] = []
+
+    class CountedExecutor(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            executors.append(self)
+
+    monkeypatch.setattr(process_service, "ProcessPoolExecutor", CountedExecutor)
+    init_db()
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.3)")
+    uploads_dir.mkdir()
+    for index in range(4):
+        (uploads_dir / f"sheet-{index}.png").write_bytes(f"sheet {index}".encode())
+
+    watcher = UploadWatcher(settle_seconds=0, poll_seconds=1, max_batch=2)
+    assert watcher.run_once() == ([1, 2, 3, 4], 0)
+    assert len(executors) == 1
+    with get_connection() as connection:
+        texts = [row[0] for row in connection.execute("SELECT raw_ocr_text FROM uploads")]
+    assert all(f"worker {os.getpid()}" not in text for text in texts)
+
+    watcher.stop()
+    assert executors[0]._shutdown_thread
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services import job_worker, process_service
+from apps.api.src.services.job_service import claim_next_job, enqueue_job, get_job
+
+
+def test_jobs_retry_with_backoff_then_fail(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("JOB_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("JOB_RETRY_SECONDS", "60")
+    monkeypatch.setattr(job_worker, "process_upload", lambda upload_id, force_ocr: False)
+
+    init_db()
+    job_id = enqueue_job("process_upload", {"upload_id": 7})
+
+    assert job_worker.run_next_job()
+    job = get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["attempts"] == 1
+    assert job["run_after"] > job["updated_at"]
+    assert "upload 7" in job["last_error"]
+    assert claim_next_job() is None
+
+    monkeypatch.setenv("JOB_RETRY_SECONDS", "0")
+    enqueue_job("process_upload", {"upload_id": 8})
+    assert job_worker.run_next_job()
+    assert job_worker.run_next_job()
+    assert get_job(job_id + 1)["status"] == "failed"
+    assert not job_worker.run_next_job()
+
+
+def test_jobs_complete(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    processed: list[int] = []
+
+    def fake_process(upload_id: int, force_ocr: bool) -> bool:
+        processed.append(upload_id)
+        return True
+
+    monkeypatch.setattr(job_worker, "process_upload", fake_process)
+
+    init_db()
+    job_id = enqueue_job("process_upload", {"upload_id": 3})
+    assert job_worker.run_next_job()
+    assert processed == [3]
+    assert get_job(job_id)["status"] == "succeeded"
+
+
+def test_totals_fast_path_defers_full_page_to_background_job(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("CLINICS_CONFIG", str(tmp_path / "clinics.json"))
+    totals_box = (0.0, 0.1, 1.0, 0.2)
+    ocr_calls: list[object] = []
+
+    def fake_ocr(image_path: Path, crop_box=None) -> str:
+        ocr_calls.append(crop_box)
+        if crop_box == totals_box:
+            return "Production: $1,000.00\nCollections: $800.00"
+        return (
+            "Uptown Smiles\nProduction: $1,000.00\nCollections: $800.00\n"
+            "02/05/2024 Patient: Jane Roe D1110 $120.00"
+        )
+
+    monkeypatch.setattr(process_service, "run_ocr", fake_ocr)
+    monkeypatch.setattr(process_service, "locate_totals_box", lambda path: totals_box)
+
+    init_db()
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "a.png").write_bytes(b"a")
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES ('Unassigned', 0.4)"
+        )
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES ('Uptown Smiles', 0.4)"
+        )
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+            VALUES ('a.png', 1, '2024-02-05', 'new', '2024-02-05T00:00:00Z')
+            """
+        )
+
+    assert process_service.process_upload(1)
+    assert ocr_calls == [totals_box]
+    with get_connection() as connection:
+        upload = connection.execute("SELECT * FROM uploads").fetchone()
+        rollup = connection.execute(
+            "SELECT * FROM rollups WHERE clinic_id = 1"
+        ).fetchone()
+        learned = [row[0] for row in connection.execute("SELECT totals_box FROM clinics")]
+    assert upload["status"] == "processed"
+    assert upload["raw_ocr_text"] is None
+    assert rollup["total_collections"] == 800.0
+    # The upload is still on the default clinic, so the band is not learned yet.
+    assert learned == [None, None]
+
+    urgent = enqueue_job("process_upload", {"upload_id": 99})
+    assert claim_next_job()["id"] == urgent
+
+    assert job_worker.run_next_job()
+    assert ocr_calls == [totals_box, None]
+    with get_connection() as connection:
+        upload = connection.execute("SELECT * FROM uploads").fetchone()
+        details = connection.execute("SELECT COUNT(*) FROM entry_details").fetchone()[0]
+        rollup_count = connection.execute(
+            "SELECT upload_count FROM rollups WHERE clinic_id = 2"
+        ).fetchone()[0]
+        learned = [row[0] for row in connection.execute("SELECT totals_box FROM clinics")]
+    assert upload["raw_ocr_text"].startswith("Uptown Smiles")
+    assert upload["clinic_id"] == 2
+    assert learned[0] is None and json.loads(learned[1]) == list(totals_box)
+    assert details == 1
+    assert rollup_count == 1
+    assert (tmp_path / "processed" / upload["storage_path"]).read_bytes() == b"a"
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.routes import dashboard, entries
+from apps.api.src.services.listing_service import ListingFilters, details_page
+from apps.api.src.utils.pagination import encode_cursor
+
+
+def _seed(count: int) -> None:
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.3)")
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('B', 0.3)")
+        for index in range(count):
+            cursor = connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, ?, ?, 'processed', ?)
+                """,
+                (f"{index}.png", 1 + index % 2, f"2024-02-{1 + index % 14:02d}", f"t{index:03d}"),
+            )
+            connection.execute(
+                """
+                INSERT INTO entry_details (upload_id, entry_date, raw_line, created_at)
+                VALUES (?, ?, 'line', 't')
+                """,
+                (cursor.lastrowid, f"2024-02-{1 + index % 14:02d}"),
+            )
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(dashboard.router)
+    app.include_router(entries.router)
+    return TestClient(app)
+
+
+def test_details_keyset_pages_cover_all_rows(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+    _seed(25)
+
+    seen: list[int] = []
+    after = None
+    while True:
+        page = asyncio.run(details_page(ListingFilters(), after, 7))
+        seen.extend(item["id"] for item in page.items)
+        if not page.next_cursor:
+            break
+        after = page.next_cursor
+    assert sorted(seen) == list(range(1, 26))
+    assert len(set(seen)) == 25
+
+    week = asyncio.run(
+        details_page(ListingFilters(clinic_id=1, week_start=date(2024, 2, 7)), None, 100)
+    )
+    assert {item["entry_date"] for item in week.items} <= {
+        f"2024-02-{day:02d}" for day in range(5, 12)
+    }
+    assert all(item["clinic_name"] == "A" for item in week.items)
+
+
+def test_entries_routes_paginate_and_stream(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+    _seed(12)
+    client = _client()
+
+    first = client.get("/entries", params={"limit": 5})
+    assert first.status_code == 200
+    assert [row["id"] for row in first.json()] == [12, 11, 10, 9, 8]
+    second = client.get("/entries", params={"limit": 5, "after": first.headers["x-next-cursor"]})
+    assert [row["id"] for row in second.json()] == [7, 6, 5, 4, 3]
+
+    streamed = client.get("/entries", params={"format": "ndjson", "limit": 5})
+    assert [json.loads(line)["id"] for line in streamed.text.splitlines()] == list(
+        range(12, 0, -1)
+    )
+
+    assert client.get("/entries", params={"after": "not-a-cursor"}).status_code == 400
+    for values in (["2024", "abc"], [{"a": 1}, 1], ["2024", True]):
+        bad = encode_cursor(*values)
+        assert client.get("/entries", params={"after": bad}).status_code == 400
+    details = client.get("/details", params={"format": "json", "limit": 3})
+    assert len(details.json()["items"]) == 3
+    assert details.json()["next_cursor"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from apps.api.src.services import ocr_service
+
+
+class FakeTessAPI:
+    instances = 0
+
+    def __init__(self, lang: str) -> None:
+        FakeTessAPI.instances += 1
+        self.image = None
+
+    def SetImage(self, image) -> None:
+        self.image = image
+
+    def GetUTF8Text(self) -> str:
+        return f"Production: ${self.image.size[0]}.00"
+
+    def Clear(self) -> None:
+        self.image = None
+
+    def End(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fresh_backends(monkeypatch):
+    monkeypatch.setattr(ocr_service, "_local", threading.local())
+    monkeypatch.setenv("OCR_PREPROCESS", "0")
+    FakeTessAPI.instances = 0
+    ocr_service._engine_version.cache_clear()
+    yield
+    ocr_service._engine_version.cache_clear()
+
+
+def test_tesserocr_engine_is_reused_across_images(
+    tmp_path: Path, monkeypatch, fresh_backends
+) -> None:
+    fake = types.SimpleNamespace(
+        PyTessBaseAPI=FakeTessAPI, tesseract_version=lambda: "tesseract 5.3.0\n leptonica"
+    )
+    monkeypatch.setitem(sys.modules, "tesserocr", fake)
+    monkeypatch.setenv("OCR_BACKEND", "auto")
+    for width in (100, 200, 300):
+        Image.new("RGB", (width, 50), "white").save(tmp_path / f"{width}.png")
+
+    texts = [ocr_service.run_ocr(tmp_path / f"{width}.png") for width in (100, 200, 300)]
+
+    assert texts == ["Production: $100.00", "Production: $200.00", "Production: $300.00"]
+    assert FakeTessAPI.instances == 1
+    assert isinstance(ocr_service.get_ocr_backend(), ocr_service.TesserocrBackend)
+    assert ocr_service.ocr_engine_version().startswith("tesserocr-5.3.0|")
+
+
+def test_auto_backend_falls_back_to_pytesseract(monkeypatch, fresh_backends) -> None:
+    monkeypatch.setitem(sys.modules, "tesserocr", None)
+    monkeypatch.setenv("OCR_BACKEND", "auto")
+    assert isinstance(ocr_service.get_ocr_backend(), ocr_service.PytesseractBackend)
+
+    monkeypatch.setenv("OCR_BACKEND", "tesserocr")
+    with pytest.raises(ocr_service.OCRError):
+        ocr_service.get_ocr_backend()
+
+
+def test_incomplete_backend_fails_on_instantiation() -> None:
+    class PartialBackend(ocr_service.OCRBackend):
+        def version(self) -> str:
+            return "1"
+
+    with pytest.raises(TypeError, match="image_to_string"):
+        PartialBackend()
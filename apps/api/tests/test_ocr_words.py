@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from PIL import Image
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services import ocr_service, process_service
+from apps.api.src.services.ocr_service import (
+    OCRBackend,
+    OCRWord,
+    refine_numeric_words,
+    words_to_text,
+)
+from apps.api.src.services.ocr_words_service import decode_words, encode_words, get_ocr_words
+
+PAGE = [
+    OCRWord("Production:", 96.0, 10, 10, 120, 20, 0),
+    OCRWord("$12,345.67", 91.0, 140, 10, 110, 20, 0),
+    OCRWord("Collections:", 95.0, 10, 40, 130, 20, 1),
+    OCRWord("$8,7G5.43", 41.0, 150, 40, 100, 20, 1),
+    OCRWord("Smile", 30.0, 10, 70, 60, 20, 2),
+]
+
+
+class FakeBackend(OCRBackend):
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.digit_reads: list[tuple[int, int]] = []
+
+    def version(self) -> str:
+        return "1"
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return "\n".join(word.text for word in PAGE)
+
+    def image_to_data(self, image: Image.Image) -> list[OCRWord]:
+        return list(PAGE)
+
+    def read_digits(self, image: Image.Image) -> tuple[str, float]:
+        self.digit_reads.append(image.size)
+        return "$8,765.43", 88.0
+
+
+def test_word_data_round_trips_compactly() -> None:
+    words = PAGE * 200
+    data = encode_words(words)
+    assert decode_words(data) == [
+        word._replace(confidence=float(round(word.confidence))) for word in words
+    ]
+    assert len(data) < 2 * len(words)
+    assert decode_words(encode_words([])) == []
+
+
+def test_only_low_confidence_numbers_are_reread() -> None:
+    backend = FakeBackend()
+    words, refined = refine_numeric_words(backend, Image.new("L", (400, 100), 255), PAGE, 80)
+
+    assert refined == 1
+    assert backend.digit_reads == [(108 * 3, 28 * 3)]
+    assert words[3].text == "$8,765.43"
+    assert words[4].text == "Smile"
+    assert words_to_text(words).splitlines()[1] == "Collections: $8,765.43"
+
+
+def test_process_stores_word_data_per_upload(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "1")
+    monkeypatch.setenv("OCR_WORD_DATA", "1")
+    monkeypatch.setenv("OCR_PREPROCESS", "0")
+    monkeypatch.setattr(ocr_service, "get_ocr_backend", FakeBackend)
+
+    init_db()
+    (tmp_path / "uploads").mkdir()
+    Image.new("RGB", (400, 100), "white").save(tmp_path / "uploads" / "a.png")
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.4)")
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+            VALUES ('a.png', 1, '2024-02-05', 'new', '2024-02-05T00:00:00Z')
+            """
+        )
+
+    assert process_service.process_new_uploads() == [1]
+    with get_connection() as connection:
+        upload = connection.execute("SELECT * FROM uploads").fetchone()
+        stored = connection.execute(
+            "SELECT word_count, refined_count FROM ocr_words"
+        ).fetchone()
+    assert upload["collections_amount"] == 8765.43
+    assert tuple(stored) == (5, 1)
+    assert [word.text for word in get_ocr_words(1)][3] == "$8,765.43"
+
+
+def test_cached_text_does_not_skip_missing_word_data(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "1")
+    monkeypatch.setenv("OCR_FAST_TOTALS", "0")
+    monkeypatch.setenv("OCR_PREPROCESS", "0")
+    monkeypatch.setattr(ocr_service, "get_ocr_backend", FakeBackend)
+
+    init_db()
+    (tmp_path / "uploads").mkdir()
+    Image.new("RGB", (400, 100), "white").save(tmp_path / "uploads" / "a.png")
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.4)")
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+            VALUES ('a.png', 1, '2024-02-05', 'new', '2024-02-05T00:00:00Z')
+            """
+        )
+
+    # First pass without word data fills the OCR cache for this image.
+    assert process_service.process_new_uploads() == [1]
+    assert get_ocr_words(1) is None
+
+    monkeypatch.setenv("OCR_WORD_DATA", "1")
+    assert process_service.reprocess_upload(1)
+    assert len(get_ocr_words(1)) == len(PAGE)
+
+    # Once stored, the cached text is used again.
+    monkeypatch.setattr(process_service, "read_full_page", None)
+    assert process_service.reprocess_upload(1)
@@ -1,5 +1,17 @@
 from __future__ import annotations
 
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services.detail_service import (
+    iter_detail_rows,
+    parse_detail_lines,
+    write_entry_details,
+)
+from apps.api.src.services.rules import DEFAULT_PARSER, get_parser
 from apps.api.src.services.rules.base import BaseParser
 
 
@@ -9,3 +21,124 @@ def test_base_parser_extracts_values() -> None:
     result = parser.parse(text)
     assert result.production_amount == 12345.67
     assert result.collections_amount == 8765.43
+
+
+def test_detail_lines_match_per_field_search() -> None:
+    text = "\n".join(
+        [
+            "01/15/2024 Patient: John Doe D1110 tooth #3 $120.00 $20.00",
+            "Pt: Jane Roe 555.123.4567 D0150",
+            "D1234/5/24 Exam 1.00",
+            "Production: $1.00",
+        ]
+    )
+    records = parse_detail_lines(text, date(2024, 2, 5))
+
+    assert len(records) == 3
+    first, dotted_phone, overlapping = records
+    assert first.entry_date == date(2024, 1, 15)
+    assert (first.patient_name, first.treatment_code, first.tooth_number) == (
+        "John Doe D",
+        "D1110",
+        "3",
+    )
+    assert (first.charges, first.payments, first.description) == (120.0, 20.0, "1110 tooth")
+    assert dotted_phone.phone_number == "555.123.4567"
+    assert (dotted_phone.charges, dotted_phone.payments) == (555.12, 3.45)
+    # "34/5/24" starts inside the code; it is the leftmost date but not a valid one.
+    assert overlapping.entry_date == date(2024, 2, 5)
+    assert overlapping.description == "D12 Exam"
+
+
+def test_write_entry_details_replaces_rows_for_upload(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+    text = "\n".join(
+        [
+            "01/15/2024 Patient: John Doe D1110 tooth #3 $120.00 $20.00",
+            "Pt: Jane Roe 555.123.4567 D0150",
+            "Production: $1.00",
+        ]
+    )
+    default_date = date(2024, 2, 5)
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('Test', 0.3)")
+        for name in ("a.png", "b.png"):
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, 1, '2024-02-05', 'processed', 't')
+                """,
+                (name,),
+            )
+        write_entry_details(connection, 2, iter_detail_rows(2, "D0150 Exam 1.00", None, "t"))
+        write_entry_details(connection, 1, iter_detail_rows(1, "D9999 Stale 1.00", None, "t"))
+        written = write_entry_details(
+            connection, 1, iter_detail_rows(1, text, default_date, "2024-02-05T00:00:00Z")
+        )
+        rows = connection.execute(
+            """
+            SELECT entry_date, patient_name, tooth_number, treatment_code, description,
+                   charges, payments, phone_number, raw_line, created_at
+            FROM entry_details WHERE upload_id = 1 ORDER BY id
+            """
+        ).fetchall()
+        other = connection.execute(
+            "SELECT COUNT(*) FROM entry_details WHERE upload_id = 2"
+        ).fetchone()[0]
+
+    expected = [
+        (
+            record.entry_date.isoformat() if record.entry_date else None,
+            record.patient_name,
+            record.tooth_number,
+            record.treatment_code,
+            record.description,
+            record.charges,
+            record.payments,
+            record.phone_number,
+            record.raw_line,
+            "2024-02-05T00:00:00Z",
+        )
+        for record in parse_detail_lines(text, default_date)
+    ]
+    assert written == 2
+    assert [tuple(row) for row in rows] == expected
+    assert rows[0]["entry_date"] == "2024-01-15" and rows[1]["entry_date"] == "2024-02-05"
+    assert other == 1
+
+
+def test_clinic_rules_compile_and_hot_reload(tmp_path: Path, monkeypatch) -> None:
+    rules_path = tmp_path / "parsers.json"
+    monkeypatch.setenv("PARSERS_CONFIG", str(rules_path))
+
+    def write_rules(rules: object, mtime_ns: int) -> None:
+        rules_path.write_text(json.dumps(rules), encoding="utf-8")
+        os.utime(rules_path, ns=(mtime_ns, mtime_ns))
+
+    assert get_parser("Uptown Smiles") is DEFAULT_PARSER
+
+    write_rules(
+        [{"clinic": "Uptown Smiles", "production": [r"gross\s+\$?([\d,]+\.\d{2})"]}],
+        1_000_000_000,
+    )
+    parser = get_parser("uptown smiles")
+    result = parser.parse("Gross $1,500.00\nCollections: $900.00")
+    assert (result.production_amount, result.collections_amount) == (1500.0, 900.0)
+    assert get_parser("Uptown Smiles") is parser
+
+    write_rules(
+        [
+            {
+                "clinic": "Uptown Smiles",
+                "collections": [r"received\s+\$?([\d,]+\.\d{2})"],
+                "inherit": False,
+            }
+        ],
+        2_000_000_000,
+    )
+    result = get_parser("Uptown Smiles").parse("Production: $1.00\nReceived $20.00")
+    assert (result.production_amount, result.collections_amount) == (None, 20.0)
+
+    write_rules([{"clinic": "Uptown Smiles", "production": ["no group"]}], 3_000_000_000)
+    assert get_parser("Uptown Smiles").parse("Received $5.00").collections_amount == 5.0
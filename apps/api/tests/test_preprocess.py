@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from apps.api.src.services.preprocess_service import (
+    PreprocessConfig,
+    clinic_crop_box,
+    preprocess_image,
+)
+
+
+def _screenshot(background: int, ink: int) -> Image.Image:
+    image = Image.new("RGB", (1170, 2532), (background,) * 3)
+    draw = ImageDraw.Draw(image)
+    for row in range(12):
+        top = 900 + row * 60
+        draw.rectangle((120, top, 900, top + 24), fill=(ink,) * 3)
+    return image
+
+
+def test_preprocess_downscales_binarizes_and_crops() -> None:
+    result = preprocess_image(_screenshot(250, 20), PreprocessConfig())
+
+    width, height = result.image.size
+    assert result.image.mode == "L"
+    assert width < 1170 and height < 1000
+    assert set(result.image.getdata()) <= {0, 255}
+    assert list(result.timings) == ["grayscale", "resize", "threshold", "autocrop"]
+
+
+def test_preprocess_inverts_dark_mode_and_disables_cleanly() -> None:
+    dark = preprocess_image(_screenshot(20, 235), PreprocessConfig())
+    assert "invert" in dark.timings
+    assert dark.image.size[1] < 1000
+
+    raw = preprocess_image(_screenshot(250, 20), PreprocessConfig(enabled=False))
+    assert raw.image.size == (1170, 2532)
+    assert list(raw.timings) == ["grayscale"]
+
+
+def test_clinic_crop_box_from_config(tmp_path: Path, monkeypatch) -> None:
+    config = tmp_path / "clinics.json"
+    config.write_text(
+        json.dumps(
+            [
+                {"name": "Downtown Dental", "pay_percentage": 0.35, "crop_box": [0, 0.25, 1, 0.75]},
+                {"name": "Uptown Smiles", "pay_percentage": 0.32},
+                {"pay_percentage": 0.3, "crop_box": [0, 0, 1, 0.5]},
+            ]
+        )
+    )
+    monkeypatch.setenv("CLINICS_CONFIG", str(config))
+
+    assert clinic_crop_box("downtown dental") == (0.0, 0.25, 1.0, 0.75)
+    assert clinic_crop_box("Uptown Smiles") is None
+    cropped = preprocess_image(
+        _screenshot(250, 20), PreprocessConfig(enabled=False), clinic_crop_box("Downtown Dental")
+    )
+    assert cropped.image.size == (1170, 1266)
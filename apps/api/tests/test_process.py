@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services import process_service
+from apps.api.src.services.ocr_service import OCRError
+
+POOL_UPLOADS = 6
+
+
+def pool_read_full_page(file_path: Path, crop_box=None) -> str:
+    # Module-level so the process pool can pickle it. Earlier uploads finish
+    # last, so results arrive out of submission order.
+    index = int(file_path.stem.split("-")[1])
+    time.sleep((POOL_UPLOADS - index) * 0.05)
+    if index == 2:
+        raise OCRError("OCR processing failed")
+    return f"Production: ${index},000.00\nCollections: ${index}00.00\nworker {os.getpid()}"
+
+
+def crashing_read_full_page(file_path: Path, crop_box=None) -> str:
+    # Stands in for a native crash inside the OCR engine.
+    if file_path.name == "upload-4.png":
+        os._exit(1)
+    time.sleep(0.02)
+    return "Production: $1,000.00\nCollections: $800.00"
+
+
+def test_process_new_uploads_isolates_failures(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "1")
+
+    def fake_ocr(image_path: Path, crop_box=None) -> str:
+        if image_path.name == "broken.png":
+            raise OCRError("OCR processing failed")
+        return "Production: $1,000.00\nCollections: $800.00"
+
+    monkeypatch.setattr(process_service, "run_ocr", fake_ocr)
+
+    init_db()
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
+            ("Test Clinic", 0.4),
+        )
+        for index, filename in enumerate(("good.png", "broken.png", "later.png")):
+            (uploads_dir / filename).write_bytes(filename.encode())
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, 1, '2024-02-05', 'new', ?)
+                """,
+                (filename, f"2024-02-05T00:00:0{index}Z"),
+            )
+
+    processed = process_service.process_new_uploads()
+    assert processed == [1, 3]
+
+    with get_connection() as connection:
+        rows = {
+            row["filename"]: row
+            for row in connection.execute("SELECT * FROM uploads").fetchall()
+        }
+    assert rows["good.png"]["status"] == "processed"
+    assert rows["good.png"]["collections_amount"] == 800.0
+    assert rows["broken.png"]["status"] == "failed"
+    assert rows["later.png"]["status"] == "processed"
+    good_hash = hashlib.sha256(b"good.png").hexdigest()
+    assert rows["good.png"]["storage_path"] == f"{good_hash[:2]}/{good_hash[2:4]}/{good_hash}.png"
+    assert (tmp_path / "processed" / rows["good.png"]["storage_path"]).read_bytes() == b"good.png"
+    assert not (uploads_dir / "good.png").exists()
+    assert (uploads_dir / "broken.png").exists()
+
+
+def test_reprocess_upload_reuses_cached_ocr(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "1")
+
+    calls: list[Path] = []
+
+    def fake_ocr(image_path: Path, crop_box=None) -> str:
+        calls.append(image_path)
+        return "Production: $1,000.00\nCollections: $800.00"
+
+    monkeypatch.setattr(process_service, "run_ocr", fake_ocr)
+
+    init_db()
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
+            ("Test Clinic", 0.4),
+        )
+        for filename in ("first.png", "duplicate.png"):
+            (uploads_dir / filename).write_bytes(b"same image bytes")
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, 1, '2024-02-05', 'new', ?)
+                """,
+                (filename, f"2024-02-05T00:00:00Z-{filename}"),
+            )
+
+    assert process_service.process_new_uploads() == [2, 1]
+    assert len(calls) == 1
+
+    assert process_service.reprocess_upload(1)
+    assert len(calls) == 1
+
+    assert process_service.reprocess_upload(1, force_ocr=True)
+    assert len(calls) == 2
+
+
+def test_process_pool_keeps_order_and_isolates_failures(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "2")
+    monkeypatch.setenv("OCR_WORD_DATA", "0")
+    monkeypatch.setattr(process_service, "read_full_page", pool_read_full_page)
+
+    init_db()
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
+            ("Test Clinic", 0.4),
+        )
+        for index in range(POOL_UPLOADS):
+            filename = f"upload-{index}.png"
+            (uploads_dir / filename).write_bytes(filename.encode())
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, 1, '2024-02-05', 'new', ?)
+                """,
+                (filename, f"2024-02-05T00:00:0{index}Z"),
+            )
+
+    processed = process_service.process_new_uploads()
+    assert processed == [1, 2, 4, 5, 6]
+
+    with get_connection() as connection:
+        rows = connection.execute(
+            "SELECT status, collections_amount, raw_ocr_text FROM uploads ORDER BY id"
+        ).fetchall()
+    assert [row["status"] for row in rows] == [
+        "processed",
+        "processed",
+        "failed",
+        "processed",
+        "processed",
+        "processed",
+    ]
+    assert [row["collections_amount"] for row in rows] == [0.0, 100.0, None, 300.0, 400.0, 500.0]
+    workers = {row["raw_ocr_text"].rsplit(" ", 1)[1] for row in rows if row["raw_ocr_text"]}
+    assert str(os.getpid()) not in workers
+    assert (uploads_dir / "upload-2.png").exists()
+
+
+def test_crashed_ocr_worker_fails_only_its_upload(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "2")
+    monkeypatch.setenv("OCR_WORD_DATA", "0")
+    monkeypatch.setattr(process_service, "read_full_page", crashing_read_full_page)
+
+    init_db()
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
+            ("Test Clinic", 0.4),
+        )
+        for index in range(10):
+            filename = f"upload-{index}.png"
+            (uploads_dir / filename).write_bytes(filename.encode())
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, 1, '2024-02-05', 'new', ?)
+                """,
+                (filename, f"2024-02-05T00:00:0{index}Z"),
+            )
+
+    processed = process_service.process_new_uploads()
+    assert processed == [1, 2, 3, 4, 6, 7, 8, 9, 10]
+
+    with get_connection() as connection:
+        failed = connection.execute(
+            "SELECT filename, error_reason FROM uploads WHERE status != 'processed'"
+        ).fetchall()
+    assert [tuple(row) for row in failed] == [("upload-4.png", "OCR worker crashed")]
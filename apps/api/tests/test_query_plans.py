@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services.archive_service import ARCHIVE_PRUNE_SQL
+from apps.api.src.services.clinic_service import CLINIC_BY_NAME_SQL
+from apps.api.src.services.dashboard_service import LATEST_WEEK_SQL, WEEK_ROLLUPS_SQL
+from apps.api.src.services.detail_service import ENTRY_DETAIL_DELETE
+from apps.api.src.services.ingest_service import (
+    KNOWN_FILENAMES_SQL,
+    MANIFEST_LOOKUP_SQL,
+    MANIFEST_UPSERT_SQL,
+)
+from apps.api.src.services.job_service import CLAIM_JOB_SQL
+from apps.api.src.services.listing_service import ListingFilters, details_query, entries_query
+from apps.api.src.services.process_service import NEW_UPLOADS_SQL, UNQUEUED_UPLOADS_SQL
+from apps.api.src.services.report_service import GRAIN_PERIODS, range_query
+from apps.api.src.services.rollup_service import WEEK_ENTRIES_SQL, rollup_delta_sql
+from apps.api.src.utils.pagination import encode_cursor
+
+CURSOR = encode_cursor("2024-02-05", 10)
+
+HOT_PATH_QUERIES = {
+    "pending uploads": (NEW_UPLOADS_SQL, ()),
+    "unqueued uploads": (UNQUEUED_UPLOADS_SQL, ("2024-02-05",)),
+    "weekly rollup range": (WEEK_ENTRIES_SQL, ("2024-02-05", "2024-02-12")),
+    "latest rollup week": (LATEST_WEEK_SQL, ()),
+    "dashboard rollups": (WEEK_ROLLUPS_SQL, ("2024-02-05",)),
+    "rollup delta": (rollup_delta_sql(1), (1.0, 1.0, 1.0, 1, "2024-02-05", 1)),
+    "overall rollup delta": (rollup_delta_sql(None), (1.0, 1.0, 1.0, 1, "2024-02-05")),
+    "archive prune": (ARCHIVE_PRUNE_SQL, ("ab/cd/abcd.webp", "ab/cd/abcd.png")),
+    "entry details by upload": (ENTRY_DETAIL_DELETE, (1,)),
+    "clinic by name": (CLINIC_BY_NAME_SQL, ("Unassigned",)),
+    "known upload filenames": (KNOWN_FILENAMES_SQL, ('["a.png"]',)),
+    "manifest lookup": (MANIFEST_LOOKUP_SQL, ('["a.png"]',)),
+    "manifest upsert": (
+        MANIFEST_UPSERT_SQL,
+        {
+            "name": "a.png",
+            "size": 1,
+            "mtime_ns": 1,
+            "content_hash": "ab",
+            "seen_at": "2024-02-05",
+        },
+    ),
+    "next job": (CLAIM_JOB_SQL, ("2024-02-05", "2024-02-05")),
+    "details page": details_query(ListingFilters(), CURSOR, 100),
+    "entries page": entries_query(ListingFilters(), CURSOR, 100),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_PATH_QUERIES))
+def test_hot_path_queries_use_indexes(name: str, tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+
+    sql, params = HOT_PATH_QUERIES[name]
+    with get_connection() as connection:
+        plan = [row["detail"] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    for detail in plan:
+        assert not (detail.startswith("SCAN") and "INDEX" not in detail), plan
+        assert "TEMP B-TREE" not in detail, plan
+
+
+@pytest.mark.parametrize("grain", sorted(GRAIN_PERIODS))
+@pytest.mark.parametrize("clinic_id", [None, 1])
+def test_range_rollups_seek_daily_facts(
+    grain: str, clinic_id: int | None, tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+
+    sql, params = range_query(grain, date(2020, 1, 1), date(2024, 12, 31), clinic_id)
+    with get_connection() as connection:
+        plan = [row["detail"] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    # Grouping by a period expression needs a sort; reading the facts must not.
+    searches = [detail for detail in plan if "daily_facts" in detail]
+    assert len(searches) == 1 and searches[0].startswith("SEARCH"), plan
+    assert "day>? AND day<?" in searches[0], plan
+    if clinic_id is not None:
+        assert "clinic_id=?" in searches[0], plan
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import math
+from datetime import date
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.routes import reprocess
+from apps.api.src.services import batch_parse_service
+from apps.api.src.services.batch_parse_service import UploadText
+from apps.api.src.services.job_service import get_job
+from apps.api.src.services.job_worker import run_next_job
+from apps.api.src.services.reparse_service import reparse_uploads
+from apps.api.src.services.rollup_service import rebuild_rollups, verify_rollups
+
+
+def test_reparse_uploads_rewrites_amounts_and_details(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+
+    init_db()
+    raw_text = (
+        "Production: $1,200.00\n"
+        "Collections: $900.00\n"
+        "02/06/2024 Patient: Jane Roe D2391 $150.00 $75.00"
+    )
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
+            ("Test Clinic", 0.4),
+        )
+        for index in range(3):
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at,
+                                     raw_ocr_text)
+                VALUES (?, 1, '2024-02-05', 'processed', '2024-02-05T00:00:00Z', ?)
+                """,
+                (f"upload-{index}.png", raw_text),
+            )
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+            VALUES ('pending.png', 1, '2024-02-05', 'new', '2024-02-05T00:00:00Z')
+            """
+        )
+
+    rebuild_rollups()
+    summary = reparse_uploads(batch_size=2)
+    assert summary.reparsed == 3
+    assert summary.failed == 0
+
+    with get_connection() as connection:
+        uploads = connection.execute(
+            "SELECT production_amount, collections_amount FROM uploads WHERE raw_ocr_text IS NOT NULL"
+        ).fetchall()
+        details = connection.execute("SELECT * FROM entry_details").fetchall()
+        overall = connection.execute(
+            "SELECT total_collections FROM rollups WHERE clinic_id IS NULL"
+        ).fetchone()
+
+    assert all(row["production_amount"] == 1200.0 for row in uploads)
+    assert len(details) == 3
+    assert details[0]["charges"] == 150.0
+    assert overall["total_collections"] == 2700.0
+    assert verify_rollups() == []
+
+
+def test_parse_upload_batch_builds_columns_and_isolates_failures(monkeypatch) -> None:
+    def detect(raw_text: str) -> int | None:
+        if "unreadable" in raw_text:
+            raise ValueError("unreadable")
+        return None
+
+    monkeypatch.setattr(batch_parse_service, "detect_clinic_id", detect)
+    batch = batch_parse_service.parse_upload_batch(
+        [
+            UploadText(1, 1, "Test Clinic", "2024-02-05", "Production: $10.00\nD2391 $5.00"),
+            UploadText(2, 1, "Test Clinic", "2024-02-05", "unreadable"),
+            UploadText(3, 1, "Test Clinic", None, "Collections: $7.50\nD1110\nD0150"),
+        ],
+        {1: "Test Clinic"},
+    )
+
+    assert batch.upload_ids.tolist() == [1, 3]
+    assert batch.production[0] == 10.0 and math.isnan(batch.production[1])
+    assert batch.failures == {2: "unreadable"}
+    assert batch.detail_upload_ids.tolist() == [1, 3, 3]
+    assert batch.details.treatment_code == ("D2391", "D1110", "D0150")
+    assert batch.details.entry_date == (date(2024, 2, 5), None, None)
+
+
+def test_reparse_route_queues_a_job(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    init_db()
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.4)")
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at,
+                                 raw_ocr_text)
+            VALUES ('a.png', 1, '2024-02-05', 'processed', 't', 'Collections: $900.00')
+            """
+        )
+    app = FastAPI()
+    app.include_router(reprocess.router)
+
+    response = TestClient(app).post("/reparse")
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    with get_connection() as connection:
+        assert connection.execute("SELECT collections_amount FROM uploads").fetchone()[0] is None
+
+    assert run_next_job()
+    assert get_job(job_id)["status"] == "succeeded"
+    with get_connection() as connection:
+        assert connection.execute("SELECT collections_amount FROM uploads").fetchone()[0] == 900.0
@@ -44,3 +44,125 @@ def test_generate_weekly_rollups(tmp_path: Path, monkeypatch) -> None:
     clinic_rollup = next(row for row in rows if row["clinic_id"] == 1)
     assert clinic_rollup["total_collections"] == 800.0
     assert clinic_rollup["estimated_pay"] == 320.0
+
+
+def test_rollups_follow_upload_deltas(tmp_path: Path, monkeypatch) -> None:
+    from apps.api.src.services import process_service
+    from apps.api.src.services.ocr_service import OCRError
+    from apps.api.src.services.rollup_service import rebuild_rollups, verify_rollups
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "1")
+    texts = {"a.png": "Collections: $800.00", "b.png": "Collections: $200.00"}
+    # Processed files are renamed to their content hash; the bytes are the original name.
+    monkeypatch.setattr(
+        process_service, "run_ocr", lambda path, crop_box=None: texts[path.read_text()]
+    )
+
+    init_db()
+    (tmp_path / "uploads").mkdir()
+    with get_connection() as connection:
+        connection.execute(
+            "INSERT INTO clinics (name, pay_percentage) VALUES (?, ?)",
+            ("Test Clinic", 0.4),
+        )
+        for filename, entry_date in (("a.png", "2024-02-05"), ("b.png", "2024-02-07")):
+            (tmp_path / "uploads" / filename).write_bytes(filename.encode())
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, 1, ?, 'new', ?)
+                """,
+                (filename, entry_date, entry_date),
+            )
+
+    process_service.process_new_uploads()
+    assert verify_rollups() == []
+
+    texts["a.png"] = "Collections: $500.00"
+    assert process_service.reprocess_upload(1, force_ocr=True)
+
+    def fail(path: Path, crop_box=None) -> str:
+        raise OCRError("OCR processing failed")
+
+    monkeypatch.setattr(process_service, "run_ocr", fail)
+    assert not process_service.reprocess_upload(2, force_ocr=True)
+    assert verify_rollups() == []
+
+    with get_connection() as connection:
+        rows = connection.execute("SELECT * FROM rollups").fetchall()
+    assert len(rows) == 2
+    assert all(row["total_collections"] == 500.0 for row in rows)
+    assert all(row["upload_count"] == 1 for row in rows)
+
+    assert rebuild_rollups() == 2
+    assert verify_rollups() == []
+
+
+def test_range_rollups_from_daily_facts(tmp_path: Path, monkeypatch) -> None:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from apps.api.src.routes import rollups
+    from apps.api.src.services.rollup_service import rebuild_rollups, verify_rollups
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("PAY_PERCENTAGE", "0.3")
+    init_db()
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.4)")
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('B', 0.5)")
+        for index, (clinic_id, entry_date, collections) in enumerate(
+            (
+                (1, "2023-12-31", 50.0),
+                (1, "2024-01-15", 100.0),
+                (1, "2024-01-15", 10.0),
+                (2, "2024-03-31", 200.0),
+                (2, "2024-04-01", 400.0),
+            )
+        ):
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at,
+                                     production_amount, collections_amount)
+                VALUES (?, ?, ?, 'processed', 't', ?, ?)
+                """,
+                (f"{index}.png", clinic_id, entry_date, collections * 2, collections),
+            )
+    rebuild_rollups()
+    assert verify_rollups() == []
+
+    app = FastAPI()
+    app.include_router(rollups.router)
+    client = TestClient(app)
+
+    response = client.get("/rollups", params={"grain": "quarter", "from": "2024-01-01"})
+    assert response.status_code == 200
+    rows = {(row["period_start"], row["clinic_id"]): row for row in response.json()}
+    assert set(rows) == {
+        ("2024-01-01", None),
+        ("2024-01-01", 1),
+        ("2024-01-01", 2),
+        ("2024-04-01", None),
+        ("2024-04-01", 2),
+    }
+    assert rows[("2024-01-01", None)]["total_collections"] == 310.0
+    assert rows[("2024-01-01", None)]["upload_count"] == 3
+    assert rows[("2024-01-01", 1)]["estimated_pay"] == 44.0
+    assert rows[("2024-01-01", 2)]["estimated_pay"] == 100.0
+    assert rows[("2024-01-01", None)]["estimated_pay"] == 93.0
+
+    response = client.get(
+        "/rollups",
+        params={"grain": "week", "from": "2023-12-31", "to": "2024-01-31", "clinic_id": 1},
+    )
+    assert [(row["period_start"], row["total_collections"]) for row in response.json()] == [
+        ("2023-12-25", 50.0),
+        ("2024-01-15", 110.0),
+    ]
+
+    assert client.get("/rollups", params={"grain": "decade"}).status_code == 422
+    reversed_range = {"from": "2024-02-01", "to": "2024-01-01"}
+    assert client.get("/rollups", params=reversed_range).status_code == 400
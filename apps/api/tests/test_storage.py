@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.routes import entries
+from apps.api.src.services import process_service, storage_service
+from apps.api.src.services.archive_service import prune_originals, thumbnail_path_for
+from apps.api.src.services.job_worker import run_next_job
+from apps.api.src.services.storage_service import atomic_move, migrate_flat_storage, stored_file
+from apps.api.src.utils.config import get_settings
+
+
+def test_migrate_flat_storage_shards_files_and_keeps_them_findable(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    init_db()
+    processed_dir = tmp_path / "processed"
+    processed_dir.mkdir()
+    for name in ("a.png", "b.PNG", "c.png", "orphan.png"):
+        (processed_dir / name).write_bytes(name.encode())
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.3)")
+        for name in ("a.png", "b.PNG", "c.png"):
+            connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, 1, '2024-02-05', 'processed', 't')
+                """,
+                (name,),
+            )
+    settings = get_settings()
+
+    summary = migrate_flat_storage(settings, batch_size=2)
+    assert (summary.moved, summary.orphaned) == (3, 1)
+
+    with get_connection() as connection:
+        rows = connection.execute(
+            "SELECT filename, storage_path, content_hash FROM uploads ORDER BY id"
+        ).fetchall()
+    for row in rows:
+        digest = hashlib.sha256(row["filename"].encode()).hexdigest()
+        assert row["storage_path"] == f"{digest[:2]}/{digest[2:4]}/{digest}.png"
+        path = stored_file(row["filename"], row["storage_path"], row["content_hash"], settings)
+        assert path == processed_dir / row["storage_path"]
+        assert path.read_bytes() == row["filename"].encode()
+    assert sorted(path.name for path in processed_dir.iterdir() if path.is_file()) == [
+        "orphan.png"
+    ]
+    assert migrate_flat_storage(settings).moved == 0
+
+
+def test_atomic_move_copies_across_filesystems(tmp_path: Path, monkeypatch) -> None:
+    source = tmp_path / "source.png"
+    source.write_bytes(b"image")
+    destination = tmp_path / "ab" / "cd" / "abcd.png"
+    replace = os.replace
+
+    def cross_device(src, dst) -> None:
+        if Path(src) == source:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        replace(src, dst)
+
+    monkeypatch.setattr(storage_service.os, "replace", cross_device)
+    atomic_move(source, destination)
+
+    assert destination.read_bytes() == b"image"
+    assert not source.exists()
+    assert sorted(path.name for path in destination.parent.iterdir()) == ["abcd.png"]
+
+
+def test_archive_prunes_originals_and_reprocess_reads_archive(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    monkeypatch.setenv("UPLOADS_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("OCR_WORKERS", "1")
+    monkeypatch.setenv("OCR_FAST_TOTALS", "0")
+    monkeypatch.setenv("THUMBNAIL_SIZE", "64")
+    read: list[Path] = []
+
+    def fake_ocr(path: Path, crop_box=None) -> str:
+        read.append(path)
+        return "Collections: $800.00"
+
+    monkeypatch.setattr(process_service, "run_ocr", fake_ocr)
+    init_db()
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir()
+    original = Image.new("RGB", (400, 300), "white")
+    ImageDraw.Draw(original).text((20, 20), "Collections: $800.00", fill="black")
+    original.save(uploads_dir / "sheet.png")
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('A', 0.3)")
+        connection.execute(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+            VALUES ('sheet.png', 1, '2024-02-05', 'new', '2024-02-05T00:00:00Z')
+            """
+        )
+
+    assert process_service.process_new_uploads() == [1]
+    settings = get_settings()
+    with get_connection() as connection:
+        assert connection.execute("SELECT archive_path FROM uploads").fetchone()[0] is None
+    # Archiving runs as a background job, off the processing thread.
+    assert run_next_job()
+    with get_connection() as connection:
+        row = connection.execute("SELECT * FROM uploads").fetchone()
+    archived = settings.archive_dir / row["archive_path"]
+    with Image.open(archived) as copy:
+        assert list(copy.convert("RGB").getdata()) == list(original.getdata())
+    with Image.open(settings.archive_dir / thumbnail_path_for(row["archive_path"])) as thumb:
+        assert max(thumb.size) == 64
+
+    summary = prune_originals(settings, max_age_days=30)
+    assert summary.pruned == 1 and summary.bytes_freed > 0
+    assert not (settings.processed_dir / row["storage_path"]).exists()
+
+    assert process_service.reprocess_upload(1, force_ocr=True)
+    assert read[-1] == archived
+
+    app = FastAPI()
+    app.include_router(entries.router)
+    thumbnail = TestClient(app).get("/entries/1/thumbnail")
+    assert thumbnail.status_code == 200
+    assert thumbnail.headers["content-type"] == "image/webp"
+
+
+def test_archive_keeps_raw_pixels_of_exif_rotated_original(tmp_path: Path, monkeypatch) -> None:
+    from apps.api.src.services.archive_service import write_archive
+
+    monkeypatch.setenv("PROCESSED_DIR", str(tmp_path / "processed"))
+    monkeypatch.setenv("THUMBNAIL_SIZE", "64")
+    original = Image.new("RGB", (400, 300), "white")
+    ImageDraw.Draw(original).text((20, 20), "Collections: $800.00", fill="black")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display.
+    source = tmp_path / "sheet.jpg"
+    original.save(source, "JPEG", quality=100, exif=exif)
+
+    settings = get_settings()
+    relative = write_archive(source, "ab" * 32, settings)
+    with Image.open(source) as raw, Image.open(settings.archive_dir / relative) as copy:
+        assert copy.size == raw.size == (400, 300)
+        assert list(copy.convert("RGB").getdata()) == list(raw.convert("RGB").getdata())
+    with Image.open(settings.archive_dir / thumbnail_path_for(relative)) as thumb:
+        assert thumb.size[0] < thumb.size[1]
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.database import init_db
+from apps.api.src.services.archive_service import archive_pending, prune_originals
+from apps.api.src.utils.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Archive processed screenshots and prune originals past the retention age."
+    )
+    parser.add_argument(
+        "--prune-days",
+        type=float,
+        default=settings.archive_prune_days,
+        help="Delete originals older than this many days once archived (0 keeps them)",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    archived = archive_pending(settings)
+    logging.info("Archived %s processed uploads", archived.archived)
+    if args.prune_days > 0:
+        pruned = prune_originals(settings, args.prune_days)
+        logging.info(
+            "Pruned %s originals, freed %.1f MB", pruned.pruned, pruned.bytes_freed / 1e6
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services.process_service import apply_ocr_text
+from apps.api.src.services.reparse_service import REPARSE_BATCH_SIZE, reparse_uploads
+from apps.api.src.services.rollup_service import rebuild_rollups, verify_rollups
+from bench_entry_details import synthetic_day_sheet
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _seed(uploads: int, lines: int) -> None:
+    with get_connection() as connection:
+        connection.execute("DELETE FROM entry_details")
+        connection.execute("DELETE FROM uploads")
+        connection.execute("DELETE FROM rollups")
+        connection.execute(
+            "INSERT OR IGNORE INTO clinics (id, name, pay_percentage) VALUES (1, 'Bench', 0.3)"
+        )
+        connection.executemany(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at,
+                                 raw_ocr_text)
+            VALUES (?, 1, ?, 'processed', '2024-02-05', ?)
+            """,
+            (
+                (
+                    f"bench-{index}.png",
+                    f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}",
+                    synthetic_day_sheet(lines, seed=index % 50),
+                )
+                for index in range(uploads)
+            ),
+        )
+    rebuild_rollups()
+
+
+def _per_upload() -> None:
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT uploads.id, uploads.clinic_id, clinics.name AS clinic_name,
+                   uploads.entry_date, uploads.raw_ocr_text
+            FROM uploads
+            LEFT JOIN clinics ON clinics.id = uploads.clinic_id
+            ORDER BY uploads.id
+            """
+        ).fetchall()
+    for row in rows:
+        with get_connection() as connection:
+            apply_ocr_text(
+                connection,
+                int(row["id"]),
+                row["raw_ocr_text"],
+                row["clinic_id"],
+                row["clinic_name"],
+                row["entry_date"],
+            )
+
+
+def _timed(label: str, uploads: int, func) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    with get_connection() as connection:
+        details = connection.execute("SELECT COUNT(*) FROM entry_details").fetchone()[0]
+    logging.info(
+        "%-12s %6d uploads, %8d detail rows in %6.2fs  %8.0f uploads/sec  rollups %s",
+        label,
+        uploads,
+        details,
+        elapsed,
+        uploads / elapsed,
+        "ok" if not verify_rollups() else "MISMATCH",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare per-upload and batched reparsing of stored OCR text."
+    )
+    parser.add_argument("--uploads", type=int, default=5_000)
+    parser.add_argument("--lines", type=int, default=20, help="Detail lines per upload")
+    parser.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir) / 'bench.sqlite3'}"
+        init_db()
+        _seed(args.uploads, args.lines)
+        _timed("per upload", args.uploads, _per_upload)
+        _seed(args.uploads, args.lines)
+        _timed("batched", args.uploads, lambda: reparse_uploads(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
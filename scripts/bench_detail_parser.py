@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.services.detail_service import parse_detail_lines
+
+logging.basicConfig(level=logging.INFO)
+
+# Frozen copy of the per-pattern parser that parse_detail_lines replaced; the
+# benchmark checks the tokenizer against it line for line.
+LEGACY_DATE = re.compile(r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})")
+LEGACY_PHONE = re.compile(r"\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b")
+LEGACY_TREATMENT_CODE = re.compile(r"\b[A-Z]\d{3,4}\b")
+LEGACY_TOOTH = re.compile(r"(?:tooth|tooth#|#)\s*(\d{1,2})", re.IGNORECASE)
+LEGACY_CURRENCY = re.compile(r"\$?\d{1,3}(?:,\d{3})*(?:\.\d{2})")
+LEGACY_PATIENT = re.compile(r"(?:patient|pt)\s*[:\-]\s*([A-Za-z ,.'-]+)", re.IGNORECASE)
+
+
+def _legacy_parse_date(value: str) -> date | None:
+    for separator in ("/", "-"):
+        parts = value.split(separator)
+        if len(parts) != 3:
+            continue
+        if len(parts[0]) == 4:
+            year, month, day = parts
+        else:
+            month, day, year = parts
+        if len(year) == 2:
+            year = f"20{year}"
+        try:
+            return date(int(year), int(month), int(day))
+        except ValueError:
+            return None
+    return None
+
+
+def _legacy_clean_description(line: str, tokens: list[str]) -> str:
+    cleaned = line
+    for token in tokens:
+        if token:
+            cleaned = cleaned.replace(token, "")
+    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip(" -\t")
+    return cleaned
+
+
+def legacy_parse_detail_lines(
+    raw_text: str, default_date: date | None
+) -> list[dict[str, object]]:
+    details = []
+    for line in (line.strip() for line in raw_text.splitlines()):
+        if not line:
+            continue
+        lowered = line.lower()
+        if "production" in lowered or "collections" in lowered:
+            continue
+
+        date_match = LEGACY_DATE.search(line)
+        parsed_date = _legacy_parse_date(date_match.group(1)) if date_match else None
+        phone_match = LEGACY_PHONE.search(line)
+        patient_match = LEGACY_PATIENT.search(line)
+        treatment_match = LEGACY_TREATMENT_CODE.search(line)
+        tooth_match = LEGACY_TOOTH.search(line)
+        amounts = [match.group(0) for match in LEGACY_CURRENCY.finditer(line)]
+
+        charges = None
+        payments = None
+        if amounts:
+            parsed_amounts = []
+            for amount in amounts:
+                raw = amount.replace("$", "").replace(",", "")
+                try:
+                    parsed_amounts.append(float(raw))
+                except ValueError:
+                    continue
+            if parsed_amounts:
+                charges = parsed_amounts[0]
+                if len(parsed_amounts) > 1:
+                    payments = parsed_amounts[1]
+
+        tokens = [
+            date_match.group(1) if date_match else "",
+            phone_match.group(0) if phone_match else "",
+            patient_match.group(0) if patient_match else "",
+            treatment_match.group(0) if treatment_match else "",
+            tooth_match.group(0) if tooth_match else "",
+            *amounts,
+        ]
+        description = _legacy_clean_description(line, tokens)
+        patient_name = patient_match.group(1).strip() if patient_match else None
+        tooth_number = tooth_match.group(1) if tooth_match else None
+
+        has_signal = any(
+            value is not None and value != ""
+            for value in (
+                patient_name,
+                tooth_number,
+                treatment_match.group(0) if treatment_match else None,
+                charges,
+                payments,
+                phone_match.group(0) if phone_match else None,
+            )
+        )
+        if not has_signal:
+            continue
+
+        details.append(
+            {
+                "entry_date": parsed_date or default_date,
+                "patient_name": patient_name,
+                "tooth_number": tooth_number,
+                "treatment_code": treatment_match.group(0) if treatment_match else None,
+                "description": description or line,
+                "charges": charges,
+                "payments": payments,
+                "phone_number": phone_match.group(0) if phone_match else None,
+                "raw_line": line,
+            }
+        )
+    return details
+
+
+NAMES = ["Jane Roe", "John Doe", "Ana O'Neil", "Lee Park-Kim", "Sam Jones, Jr."]
+WORDS = ["Exam", "cleaning", "crown prep", "Adj.", "follow-up", "x-ray", "fluoride"]
+
+
+def _amount(rng: random.Random) -> str:
+    value = rng.randint(0, 125_000)
+    text = f"{value // 100:,}.{value % 100:02d}"
+    return rng.choice(["$", "$", ""]) + text
+
+
+def _phone(rng: random.Random) -> str:
+    separator = rng.choice(["-", "-", ".", " ", ""])
+    return separator.join(
+        (str(rng.randint(200, 999)), str(rng.randint(100, 999)), str(rng.randint(1000, 9999)))
+    )
+
+
+def _date(rng: random.Random) -> str:
+    month, day = rng.randint(1, 12), rng.randint(1, 28)
+    return rng.choice(
+        [
+            f"{month:02d}/{day:02d}/2024",
+            f"{month}/{day}/24",
+            f"{month}-{day}-2024",
+            f"2024-{month:02d}-{day:02d}",
+            f"{month:02d}/{day + 20:02d}/2024",
+        ]
+    )
+
+
+def synthetic_corpus(lines: int, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    rows = ["Production: $12,345.67", "Collections: $8,765.43"]
+    for _ in range(lines):
+        parts = []
+        if rng.random() < 0.8:
+            parts.append(_date(rng))
+        if rng.random() < 0.85:
+            label = rng.choice(["Patient:", "Pt:", "pt -", "PATIENT :", "patient-"])
+            parts.append(f"{label} {rng.choice(NAMES)}")
+        if rng.random() < 0.7:
+            parts.append(f"{rng.choice('DDDDTK')}{rng.randint(100, 9999)}")
+        if rng.random() < 0.5:
+            parts.append(rng.choice(["tooth #", "Tooth ", "#", "tooth#"]) + str(rng.randint(1, 32)))
+        if rng.random() < 0.6:
+            parts.append(rng.choice(WORDS))
+        for _ in range(rng.choice([0, 1, 2, 2, 3])):
+            parts.append(_amount(rng))
+        if rng.random() < 0.5:
+            parts.append(_phone(rng))
+        if rng.random() < 0.05:
+            parts.append(parts[-1] if parts else "note")
+        if rng.random() < 0.2:
+            rng.shuffle(parts)
+        rows.append(" ".join(parts) if rng.random() < 0.9 else "  ".join(parts) + " -")
+    return "\n".join(rows)
+
+
+def _timed(label: str, func, *args) -> tuple[object, float]:
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    logging.info("%-12s %6.2fs", label, elapsed)
+    return result, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100_000)
+    args = parser.parse_args()
+
+    raw_text = synthetic_corpus(args.lines)
+    default_date = date(2024, 2, 5)
+    expected, legacy_seconds = _timed("legacy", legacy_parse_detail_lines, raw_text, default_date)
+    actual, seconds = _timed("tokenizer", parse_detail_lines, raw_text, default_date)
+
+    mismatches = [
+        (old, new._asdict())
+        for old, new in zip(expected, actual)
+        if old != new._asdict()
+    ]
+    if len(expected) != len(actual):
+        logging.error("Record count differs: legacy %d, tokenizer %d", len(expected), len(actual))
+    for old, new in mismatches[:5]:
+        logging.error("Mismatch:\n  legacy    %s\n  tokenizer %s", old, new)
+    logging.info(
+        "%d lines -> %d records, %.1fx faster, %d mismatches",
+        args.lines,
+        len(actual),
+        legacy_seconds / seconds,
+        len(mismatches) + abs(len(expected) - len(actual)),
+    )
+    if mismatches or len(expected) != len(actual):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
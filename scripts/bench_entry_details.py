@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services.detail_service import (
+    ENTRY_DETAIL_INSERT,
+    DetailRecord,
+    iter_detail_rows,
+    parse_detail_lines,
+    write_entry_details,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+NAMES = ["Jane Roe", "John Doe", "Ana Smith", "Lee Park", "Sam Jones"]
+
+
+def synthetic_day_sheet(lines: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    rows = ["Production: $12,345.67", "Collections: $8,765.43"]
+    for _ in range(lines):
+        rows.append(
+            f"02/{rng.randint(1, 28):02d}/2024 Patient: {rng.choice(NAMES)} "
+            f"D{rng.randint(1000, 9999)} tooth #{rng.randint(1, 32)} "
+            f"${rng.randint(10, 999)}.{rng.randint(0, 99):02d} "
+            f"${rng.randint(10, 999)}.{rng.randint(0, 99):02d} "
+            f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}"
+        )
+    return "\n".join(rows)
+
+
+def legacy_write(connection, upload_id: int, details: list[DetailRecord]) -> int:
+    connection.execute("DELETE FROM entry_details WHERE upload_id = ?", (upload_id,))
+    created_at = datetime.now(tz=timezone.utc).isoformat()
+    for detail in details:
+        connection.execute(
+            ENTRY_DETAIL_INSERT,
+            (
+                upload_id,
+                detail.entry_date.isoformat() if detail.entry_date else None,
+                detail.patient_name,
+                detail.tooth_number,
+                detail.treatment_code,
+                detail.description,
+                detail.charges,
+                detail.payments,
+                detail.phone_number,
+                detail.raw_line,
+                created_at,
+            ),
+        )
+    return len(details)
+
+
+def _run(label: str, uploads: int, write) -> None:
+    with get_connection() as connection:
+        connection.execute("DELETE FROM entry_details")
+    rows = 0
+    started = time.perf_counter()
+    for upload_id in range(1, uploads + 1):
+        with get_connection() as connection:
+            rows += write(connection, upload_id)
+    elapsed = time.perf_counter() - started
+    logging.info(
+        "%-32s %8d rows in %6.2fs  %10.0f rows/sec", label, rows, elapsed, rows / elapsed
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=500, help="Detail lines per upload")
+    parser.add_argument("--uploads", type=int, default=200)
+    args = parser.parse_args()
+
+    raw_text = synthetic_day_sheet(args.lines)
+    default_date = date(2024, 2, 5)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir) / 'bench.sqlite3'}"
+        init_db()
+        with get_connection() as connection:
+            connection.execute(
+                "INSERT INTO clinics (name, pay_percentage) VALUES ('Bench', 0.3)"
+            )
+            connection.executemany(
+                """
+                INSERT INTO uploads (filename, clinic_id, status, created_at)
+                VALUES (?, 1, 'processed', '2024-02-05')
+                """,
+                [(f"bench-{index}.png",) for index in range(args.uploads)],
+            )
+
+        details = parse_detail_lines(raw_text, default_date)
+        created_at = datetime.now(tz=timezone.utc).isoformat()
+        rows_by_upload = {
+            upload_id: list(iter_detail_rows(upload_id, raw_text, default_date, created_at))
+            for upload_id in range(1, args.uploads + 1)
+        }
+        _run(
+            "write only, per-row execute",
+            args.uploads,
+            lambda connection, upload_id: legacy_write(connection, upload_id, details),
+        )
+        _run(
+            "write only, executemany",
+            args.uploads,
+            lambda connection, upload_id: write_entry_details(
+                connection, upload_id, rows_by_upload[upload_id]
+            ),
+        )
+        _run(
+            "parse + write, per-row execute",
+            args.uploads,
+            lambda connection, upload_id: legacy_write(
+                connection, upload_id, parse_detail_lines(raw_text, default_date)
+            ),
+        )
+        _run(
+            "parse + write, executemany",
+            args.uploads,
+            lambda connection, upload_id: write_entry_details(
+                connection,
+                upload_id,
+                iter_detail_rows(upload_id, raw_text, default_date, created_at),
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services.ingest_service import _parse_date_from_filename, ingest_uploads
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _write_files(uploads_dir: Path, start: int, count: int) -> None:
+    for index in range(start, start + count):
+        (uploads_dir / f"2024-02-{index % 28 + 1:02d}_{index:07d}.png").write_bytes(
+            index.to_bytes(8, "little") * 64
+        )
+
+
+def _seed_history(count: int) -> None:
+    # Uploads already processed and moved out of the folder.
+    with get_connection() as connection:
+        connection.execute("INSERT INTO clinics (name, pay_percentage) VALUES ('Bench', 0.3)")
+        connection.executemany(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+            VALUES (?, 1, '2023-01-01', 'processed', 't')
+            """,
+            ((f"history-{index:08d}.png",) for index in range(count)),
+        )
+
+
+def legacy_ingest() -> list[int]:
+    # The ingest path before the manifest: every run loads every filename
+    # ever registered and walks the sorted folder with a Path per entry.
+    uploads_dir = Path(os.environ["UPLOADS_DIR"])
+    new_ids: list[int] = []
+    with get_connection() as connection:
+        existing = {row["filename"] for row in connection.execute("SELECT filename FROM uploads")}
+        for file_path in sorted(uploads_dir.iterdir()):
+            if file_path.is_dir() or file_path.name in existing:
+                continue
+            clinic_id = connection.execute(
+                "SELECT id FROM clinics ORDER BY id LIMIT 1"
+            ).fetchone()["id"]
+            cursor = connection.execute(
+                """
+                INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at)
+                VALUES (?, ?, ?, 'new', ?)
+                """,
+                (
+                    file_path.name,
+                    clinic_id,
+                    _parse_date_from_filename(file_path.name),
+                    datetime.now(tz=timezone.utc).isoformat(),
+                ),
+            )
+            new_ids.append(int(cursor.lastrowid))
+    return new_ids
+
+
+def _timed(label: str, func) -> None:
+    started = time.perf_counter()
+    new_ids = func()
+    logging.info(
+        "%-34s %7d registered in %7.3fs", label, len(new_ids), time.perf_counter() - started
+    )
+
+
+def _run(workdir: Path, label: str, ingest, files: int, new: int, history: int) -> None:
+    uploads_dir = workdir / label / "uploads"
+    uploads_dir.mkdir(parents=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / label / 'bench.sqlite3'}"
+    os.environ["UPLOADS_DIR"] = str(uploads_dir)
+    init_db()
+    _seed_history(history)
+    _write_files(uploads_dir, 0, files)
+
+    _timed(f"{label}: first run", ingest)
+    _timed(f"{label}: no changes", ingest)
+    _write_files(uploads_dir, files, new)
+    _timed(f"{label}: {new} new files", ingest)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time incremental ingest runs against the pre-manifest ingest path."
+    )
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--new", type=int, default=50, help="Files added before the last run")
+    parser.add_argument(
+        "--history", type=int, default=500_000, help="Processed uploads no longer in the folder"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        root = Path(workdir)
+        _run(root, "legacy", legacy_ingest, args.files, args.new, args.history)
+        _run(root, "manifest", ingest_uploads, args.files, args.new, args.history)
+        _timed("manifest: full rescan", lambda: ingest_uploads(full_rescan=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import difflib
+import logging
+import sys
+import time
+from collections import defaultdict
+from dataclasses import replace
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from PIL import Image
+
+from apps.api.src.services.ocr_service import OCR_CONFIG
+from apps.api.src.services.preprocess_service import PreprocessConfig, preprocess_image
+from apps.api.src.services.rules import get_parser
+from apps.api.src.utils.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def _ocr(image: Image.Image) -> tuple[str, float]:
+    import pytesseract
+
+    started = time.perf_counter()
+    text = pytesseract.image_to_string(image, config=OCR_CONFIG)
+    return text, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare Tesseract time and output with and without preprocessing."
+    )
+    parser.add_argument("images", type=Path, help="Directory of sample screenshots")
+    args = parser.parse_args()
+
+    images = sorted(
+        path for path in args.images.iterdir() if path.suffix.lower() in IMAGE_SUFFIXES
+    )
+    # The comparison always runs the pipeline, whatever OCR_PREPROCESS says.
+    config = replace(PreprocessConfig.from_settings(get_settings()), enabled=True)
+    amounts_parser = get_parser(None)
+    raw_total = prepared_total = 0.0
+    stage_totals: dict[str, float] = defaultdict(float)
+    amount_mismatches = 0
+
+    for path in images:
+        with Image.open(path) as image:
+            raw_text, raw_seconds = _ocr(image)
+            prepared = preprocess_image(image, config)
+        prepared_text, ocr_seconds = _ocr(prepared.image)
+        for name, seconds in prepared.timings.items():
+            stage_totals[name] += seconds
+        stage_totals["tesseract"] += ocr_seconds
+        raw_total += raw_seconds
+        prepared_total += ocr_seconds + sum(prepared.timings.values())
+
+        raw_parsed = amounts_parser.parse(raw_text)
+        prepared_parsed = amounts_parser.parse(prepared_text)
+        same_amounts = (raw_parsed.production_amount, raw_parsed.collections_amount) == (
+            prepared_parsed.production_amount,
+            prepared_parsed.collections_amount,
+        )
+        amount_mismatches += not same_amounts
+        logging.info(
+            "%-40s raw %6.2fs  prepared %6.2fs  text similarity %.3f%s",
+            path.name,
+            raw_seconds,
+            ocr_seconds + sum(prepared.timings.values()),
+            difflib.SequenceMatcher(None, raw_text, prepared_text).ratio(),
+            "" if same_amounts else "  AMOUNTS DIFFER",
+        )
+
+    if not images:
+        logging.info("No images found in %s", args.images)
+        return
+    logging.info(
+        "%d images: raw %.2fs, prepared %.2fs (%.1fx), %d amount mismatches",
+        len(images),
+        raw_total,
+        prepared_total,
+        raw_total / prepared_total if prepared_total else 0.0,
+        amount_mismatches,
+    )
+    for name, seconds in stage_totals.items():
+        logging.info("  %-12s %8.1f ms/image", name, seconds * 1000 / len(images))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.services.rules import clinic_rule_parsers, get_parser
+from apps.api.src.services.rules.base import BaseParser
+
+logging.basicConfig(level=logging.INFO)
+
+
+def synthetic_rules(clinics: int) -> list[dict[str, object]]:
+    return [
+        {
+            "clinic": f"Clinic {index}",
+            "production": [
+                rf"gross\s+prod\s+{index}\s*[:\-]?\s*\$?([\d,]+(?:\.\d{{2}})?)",
+                rf"p{index}\s+total\s*\$?([\d,]+(?:\.\d{{2}})?)",
+            ],
+            "collections": [
+                rf"net\s+coll\s+{index}\s*[:\-]?\s*\$?([\d,]+(?:\.\d{{2}})?)",
+                rf"c{index}\s+total\s*\$?([\d,]+(?:\.\d{{2}})?)",
+            ],
+        }
+        for index in range(clinics)
+    ]
+
+
+def synthetic_uploads(count: int, clinics: int, seed: int = 5) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    uploads = []
+    for _ in range(count):
+        index = rng.randrange(clinics)
+        body = "\n".join(
+            f"02/{rng.randint(1, 28):02d}/2024 Patient: Jane Roe D{rng.randint(1000, 9999)} "
+            f"${rng.randint(10, 999)}.00"
+            for _ in range(30)
+        )
+        if rng.random() < 0.5:
+            totals = f"Gross Prod {index}: $1,234.00\nNet Coll {index}: $987.65"
+        else:
+            totals = "Production: $1,234.00\nCollections: $987.65"
+        uploads.append((f"Clinic {index}", f"{body}\n{totals}"))
+    return uploads
+
+
+def _timed(label: str, uploads: list[tuple[str, str]], parse) -> None:
+    started = time.perf_counter()
+    missing = 0
+    for clinic_name, text in uploads:
+        result = parse(clinic_name, text)
+        missing += result.production_amount is None or result.collections_amount is None
+    elapsed = time.perf_counter() - started
+    logging.info(
+        "%-28s %6d uploads in %6.3fs  %8.1f us/upload  %d without totals",
+        label,
+        len(uploads),
+        elapsed,
+        elapsed * 1e6 / len(uploads),
+        missing,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time clinic parser lookup and rule evaluation as clinic formats grow."
+    )
+    parser.add_argument("--clinics", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--uploads", type=int, default=20_000)
+    args = parser.parse_args()
+
+    _timed(
+        "base parser per upload",
+        synthetic_uploads(args.uploads, 1),
+        lambda _, text: BaseParser().parse(text),
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        rules_path = Path(workdir) / "parsers.json"
+        os.environ["PARSERS_CONFIG"] = str(rules_path)
+        for clinics in args.clinics:
+            rules_path.write_text(json.dumps(synthetic_rules(clinics)), encoding="utf-8")
+            mtime_ns = clinics * 1_000_000_000
+            os.utime(rules_path, ns=(mtime_ns, mtime_ns))
+
+            started = time.perf_counter()
+            clinic_rule_parsers()
+            logging.info(
+                "Compiled rules for %d clinics in %.1f ms",
+                clinics,
+                (time.perf_counter() - started) * 1000,
+            )
+            _timed(
+                f"{clinics} clinic formats",
+                synthetic_uploads(args.uploads, clinics),
+                lambda clinic_name, text: get_parser(clinic_name).parse(text),
+            )
+
+
+if __name__ == "__main__":
+    main()
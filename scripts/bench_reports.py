@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.async_database import close_async_connections
+from apps.api.src.db.database import get_connection, init_db
+from apps.api.src.services.report_service import GRAIN_PERIODS, range_rollups
+from apps.api.src.services.rollup_service import rebuild_rollups
+
+logging.basicConfig(level=logging.INFO)
+
+RAW_MONTHLY_SQL = """
+    SELECT substr(uploads.entry_date, 1, 7) AS month, uploads.clinic_id,
+           SUM(COALESCE(uploads.production_amount, 0)),
+           SUM(COALESCE(uploads.collections_amount, 0)) * clinics.pay_percentage,
+           COUNT(*)
+    FROM uploads
+    JOIN clinics ON clinics.id = uploads.clinic_id
+    WHERE uploads.status = 'processed' AND uploads.entry_date >= ? AND uploads.entry_date <= ?
+    GROUP BY month, uploads.clinic_id
+"""
+
+
+def _seed(years: int, clinics: int, per_day: int) -> tuple[date, date]:
+    rng = random.Random(7)
+    end = date(2024, 12, 31)
+    start = end - timedelta(days=365 * years - 1)
+    with get_connection() as connection:
+        connection.executemany(
+            "INSERT INTO clinics (name, pay_percentage) VALUES (?, 0.3)",
+            [(f"Clinic {index}",) for index in range(clinics)],
+        )
+        rows = []
+        day = start
+        while day <= end:
+            for clinic_id in range(1, clinics + 1):
+                for _ in range(per_day):
+                    collections = round(rng.uniform(500, 5000), 2)
+                    rows.append(
+                        (
+                            f"{len(rows):08d}.png",
+                            clinic_id,
+                            day.isoformat(),
+                            collections * 1.2,
+                            collections,
+                        )
+                    )
+            day += timedelta(days=1)
+        connection.executemany(
+            """
+            INSERT INTO uploads (filename, clinic_id, entry_date, status, created_at,
+                                 production_amount, collections_amount)
+            VALUES (?, ?, ?, 'processed', 't', ?, ?)
+            """,
+            rows,
+        )
+    logging.info("Seeded %s processed uploads from %s to %s", len(rows), start, end)
+    return start, end
+
+
+def _best_of(runs: int, func) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time range rollups from daily facts against scanning raw uploads."
+    )
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--clinics", type=int, default=10)
+    parser.add_argument("--per-day", type=int, default=2, help="Uploads per clinic per day")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir) / 'bench.sqlite3'}"
+        init_db()
+        start, end = _seed(args.years, args.clinics, args.per_day)
+        rebuild_rollups()
+        with get_connection() as connection:
+            facts = connection.execute("SELECT COUNT(*) FROM daily_facts").fetchone()[0]
+        logging.info("%s daily fact rows", facts)
+
+        def raw_monthly() -> None:
+            with get_connection() as connection:
+                connection.execute(RAW_MONTHLY_SQL, (start.isoformat(), end.isoformat())).fetchall()
+
+        logging.info("%-26s %8.2f ms", "raw uploads, month", _best_of(args.runs, raw_monthly))
+        loop = asyncio.new_event_loop()
+        try:
+            for grain in GRAIN_PERIODS:
+                elapsed = _best_of(
+                    args.runs,
+                    lambda: loop.run_until_complete(range_rollups(grain, start, end)),
+                )
+                logging.info("%-26s %8.2f ms", f"daily facts, {grain}", elapsed)
+            ytd = _best_of(
+                args.runs,
+                lambda: loop.run_until_complete(range_rollups("year", date(end.year, 1, 1), end)),
+            )
+            logging.info("%-26s %8.2f ms", "daily facts, year to date", ytd)
+            loop.run_until_complete(close_async_connections())
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import logging
 import sys
 from pathlib import Path
@@ -16,9 +17,17 @@ logging.basicConfig(level=logging.INFO)
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Register new screenshots in the uploads folder.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the ingest manifest and re-hash every file in the uploads folder",
+    )
+    args = parser.parse_args()
+
     init_db()
     seed_clinics()
-    new_ids = ingest_uploads()
+    new_ids = ingest_uploads(full_rescan=args.full)
     logging.info("Registered %s new uploads", len(new_ids))
 
 
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import statistics
+import time
+
+import httpx
+from PIL import Image, ImageDraw
+
+logging.basicConfig(level=logging.INFO)
+
+
+def synthetic_sheet(lines: int = 40) -> bytes:
+    image = Image.new("L", (1200, 40 + lines * 28), 255)
+    draw = ImageDraw.Draw(image)
+    for index in range(lines):
+        draw.text(
+            (20, 20 + index * 28),
+            f"02/{index % 28 + 1:02d}/2024 Patient: Jane Roe D{1000 + index} ${index + 10}.00",
+            fill=0,
+        )
+    draw.text((20, 20 + lines * 28), "Production: $1,234.00  Collections: $987.65", fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def _reader(client: httpx.AsyncClient, deadline: float, latencies: list[float]) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def _uploader(
+    client: httpx.AsyncClient, deadline: float, sheet: bytes, latencies: list[float]
+) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post(
+            "/upload",
+            data={"entry_date": "2024-02-06"},
+            # Trailing bytes after IEND keep the image valid but defeat upload dedup.
+            files={"file": ("load-test.png", sheet + os.urandom(16), "image/png")},
+        )
+        if response.status_code != 303:
+            response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+def _report(label: str, latencies: list[float], duration: float) -> None:
+    if not latencies:
+        logging.info("%-8s no requests completed", label)
+        return
+    ordered = sorted(latencies)
+    quantiles = statistics.quantiles(ordered, n=100) if len(ordered) > 1 else ordered * 99
+    logging.info(
+        "%-8s %6d requests  %7.1f req/s  p50 %6.1f ms  p95 %6.1f ms  p99 %6.1f ms  max %6.1f ms",
+        label,
+        len(ordered),
+        len(ordered) / duration,
+        quantiles[49] * 1000,
+        quantiles[94] * 1000,
+        quantiles[98] * 1000,
+        ordered[-1] * 1000,
+    )
+
+
+async def run(url: str, readers: int, uploaders: int, duration: float) -> None:
+    sheet = synthetic_sheet()
+    limits = httpx.Limits(max_connections=readers + uploaders)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        read_latencies: list[float] = []
+        upload_latencies: list[float] = []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(_reader(client, deadline, read_latencies) for _ in range(readers)),
+            *(_uploader(client, deadline, sheet, upload_latencies) for _ in range(uploaders)),
+        )
+    _report("reads", read_latencies, duration)
+    if uploaders:
+        _report("uploads", upload_latencies, duration)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure dashboard read latency while uploads are being processed."
+    )
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--readers", type=int, default=50)
+    parser.add_argument("--uploaders", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    args = parser.parse_args()
+
+    if args.uploaders:
+        logging.info("Baseline: %d readers, no uploads", args.readers)
+        asyncio.run(run(args.url, args.readers, 0, min(args.duration, 10.0)))
+    logging.info("%d readers with %d concurrent uploaders", args.readers, args.uploaders)
+    asyncio.run(run(args.url, args.readers, args.uploaders, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.database import init_db
+from apps.api.src.services.storage_service import MIGRATE_BATCH_SIZE, migrate_flat_storage
+from apps.api.src.utils.config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Move processed screenshots from the flat folder into hash-sharded storage."
+    )
+    parser.add_argument("--batch-size", type=int, default=MIGRATE_BATCH_SIZE)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report what would move without touching files"
+    )
+    args = parser.parse_args()
+
+    init_db()
+    summary = migrate_flat_storage(get_settings(), args.batch_size, args.dry_run)
+    logging.info(
+        "%s %s files; %s without an upload row left in place",
+        "Would move" if args.dry_run else "Moved",
+        summary.moved,
+        summary.orphaned,
+    )
+
+
+if __name__ == "__main__":
+    main()
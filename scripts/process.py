@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import logging
 import sys
 from pathlib import Path
@@ -16,9 +17,17 @@ logging.basicConfig(level=logging.INFO)
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--force-ocr",
+        action="store_true",
+        help="Ignore cached OCR results and re-run Tesseract",
+    )
+    args = parser.parse_args()
+
     init_db()
     seed_clinics()
-    processed = process_new_uploads()
+    processed = process_new_uploads(force_ocr=args.force_ocr)
     logging.info("Processed %s uploads", len(processed))
 
 
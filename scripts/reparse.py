@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.database import init_db
+from apps.api.src.services.clinic_service import seed_clinics
+from apps.api.src.services.reparse_service import REPARSE_BATCH_SIZE, reparse_uploads
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    init_db()
+    seed_clinics()
+    summary = reparse_uploads(batch_size=args.batch_size)
+    logging.info(
+        "Reparsed %s uploads (%s failed)", summary.reparsed, summary.failed
+    )
+
+
+if __name__ == "__main__":
+    main()
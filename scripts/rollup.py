@@ -12,21 +12,47 @@ if str(ROOT) not in sys.path:
 
 from apps.api.src.db.database import init_db
 from apps.api.src.services.clinic_service import seed_clinics
-from apps.api.src.services.rollup_service import generate_weekly_rollups
+from apps.api.src.services.rollup_service import (
+    rebuild_rollups,
+    refresh_weekly_rollups,
+    verify_rollups,
+)
 
 logging.basicConfig(level=logging.INFO)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--week-start", required=True, help="YYYY-MM-DD")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--week-start", help="YYYY-MM-DD")
+    action.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Recompute every rollup row from uploads",
+    )
+    action.add_argument(
+        "--verify",
+        action="store_true",
+        help="Compare stored rollups with a full recomputation",
+    )
     args = parser.parse_args()
 
-    week_start = date.fromisoformat(args.week_start)
     init_db()
     seed_clinics()
-    rollup_ids = generate_weekly_rollups(week_start)
-    logging.info("Created %s rollup rows", len(rollup_ids))
+    if args.rebuild:
+        count = rebuild_rollups()
+        logging.info("Rebuilt %s rollup rows", count)
+    elif args.verify:
+        mismatches = verify_rollups()
+        for mismatch in mismatches:
+            logging.error("Rollup mismatch %s", mismatch)
+        logging.info("Found %s rollup mismatches", len(mismatches))
+        if mismatches:
+            sys.exit(1)
+    else:
+        week_start = date.fromisoformat(args.week_start)
+        rollup_ids = refresh_weekly_rollups(week_start)
+        logging.info("Created %s rollup rows", len(rollup_ids))
 
 
 if __name__ == "__main__":
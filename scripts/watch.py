@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from apps.api.src.db.database import init_db
+from apps.api.src.services.clinic_service import seed_clinics
+from apps.api.src.services.watch_service import UploadWatcher
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Continuously ingest and process screenshots dropped into the uploads folder."
+    )
+    parser.add_argument("--settle-seconds", type=float, default=None)
+    parser.add_argument("--poll-seconds", type=float, default=None)
+    parser.add_argument("--max-batch", type=int, default=None)
+    args = parser.parse_args()
+
+    init_db()
+    seed_clinics()
+    watcher = UploadWatcher(args.settle_seconds, args.poll_seconds, args.max_batch)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: watcher.stop())
+    watcher.run()
+
+
+if __name__ == "__main__":
+    main()